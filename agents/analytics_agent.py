@@ -7,11 +7,15 @@ import numpy as np
 from utils.visualization import EngagementVisualizer
 
 class AnalyticsAgent(BaseAgent):
+    # Metrics are aggregated periodically, messages still wake the agent
+    max_cycle_interval = 60.0
+
     def __init__(self):
         super().__init__("analytics")
         self.metrics_history = {}
         self.visualizer = EngagementVisualizer()
         self.analysis_cache = {}
+        self.reported_metrics = {}
         
     async def initialize(self):
         self.logger.info("Initializing Analytics Agent")
@@ -20,16 +24,27 @@ class AnalyticsAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Collect metrics
-            await self.collect_metrics()
+            with self.track_phase("collect_metrics"):
+                await self.collect_metrics()
             # Analyze trends
-            await self.analyze_trends()
+            with self.track_phase("analyze_trends"):
+                await self.analyze_trends()
             # Generate insights
-            await self.generate_insights()
+            with self.track_phase("generate_insights"):
+                await self.generate_insights()
             # Update visualizations
-            await self.update_visualizations()
+            with self.track_phase("update_visualizations"):
+                await self.update_visualizations()
         except Exception as e:
             self.logger.error(f"Error in analytics cycle: {e}")
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Keep the latest metrics reported by other agents"""
+        if message.get("type") in ("evolution_metrics_update", "social_metrics_update"):
+            self.reported_metrics[message.get("sender")] = message["metrics"]
+        else:
+            await super().handle_message(message)
+
     async def collect_metrics(self):
         """Collect metrics from all agents"""
         metrics = {}
@@ -317,8 +332,8 @@ class AnalyticsAgent(BaseAgent):
 
     async def get_agent_metrics(self, agent_type: str) -> Dict[str, Any]:
         """Get metrics from specific agent"""
-        # Implementation would fetch metrics from agent
-        return {}
+        # Agents without metric updates on the bus report nothing yet
+        return self.reported_metrics.get(agent_type, {})
 
     async def load_historical_metrics(self):
         """Load historical metrics data"""
@@ -1,33 +1,163 @@
 from abc import ABC, abstractmethod
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 import asyncio
+import time
+from contextlib import contextmanager
 from data.models import EngagementMetrics
+from utils.message_bus import MessageBus
+from utils.sharding import ShardAssignment
+from utils.metrics import REGISTRY, LatencyHistogram
+
+AGENT_PHASE_SECONDS = REGISTRY.histogram(
+    "agent_phase_duration_seconds",
+    "Duration of agent cycle phases",
+    ("agent", "phase")
+)
+AGENT_CYCLES = REGISTRY.counter("agent_cycles_total", "Completed agent cycles", ("agent",))
+AGENT_OVERRUNS = REGISTRY.counter(
+    "agent_cycle_overruns_total",
+    "Agent cycles exceeding their cycle budget",
+    ("agent",)
+)
 
 class BaseAgent(ABC):
+    # Run loop settings (seconds). Event-driven agents wake on new messages,
+    # trigger() or scheduled timers, and at least every max_cycle_interval.
+    event_driven = True
+    min_cycle_interval = 0.0
+    max_cycle_interval: Optional[float] = 1.0
+    # Cycles slower than this count as overruns, defaults to max_cycle_interval
+    cycle_budget: Optional[float] = None
+
     def __init__(self, name: str):
         self.name = name
         self.logger = logging.getLogger(f"agent.{name}")
         self.running = False
         self.metrics = EngagementMetrics()
+        self.message_bus: Optional[MessageBus] = None
+        self.llm = None  # Shared LLMDispatcher, set when registered in-process
+        self.message_batch_size = 100
+        self._wakeup = asyncio.Event()
+        self.shard: Optional[ShardAssignment] = None
+        self.phase_timings: Dict[str, LatencyHistogram] = {}
+        self.cycle_count = 0
+        self.cycle_overruns = 0
         
     async def start(self):
         """Start the agent's main loop"""
-        self.running = True
         try:
             await self.initialize()
-            while self.running:
-                await self.process_cycle()
-                await asyncio.sleep(1)  # Prevent CPU hogging
+            await self.run()
         except Exception as e:
             self.logger.error(f"Agent {self.name} error: {e}")
             raise
 
+    async def run(self):
+        """Run cycles until the agent is stopped"""
+        self.running = True
+        while self.running:
+            cycle_started = time.monotonic()
+            await self.run_cycle()
+            await self.wait_for_work(cycle_started)
+
+    async def run_cycle(self) -> float:
+        """Handle pending messages and run one cycle, returning its duration"""
+        cycle_started = time.monotonic()
+        self._wakeup.clear()
+        with self.track_phase("handle_messages"):
+            await self.process_messages()
+        await self.process_cycle()
+        duration = time.monotonic() - cycle_started
+        self.record_cycle(duration)
+        return duration
+
     async def stop(self):
         """Stop the agent"""
         self.running = False
+        self.trigger()
         await self.cleanup()
 
+    @contextmanager
+    def track_phase(self, phase: str):
+        """Time a block of work as a named cycle phase"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(phase, time.perf_counter() - started)
+
+    def record_timing(self, phase: str, duration: float):
+        """Record phase duration in seconds"""
+        histogram = self.phase_timings.get(phase)
+        if histogram is None:
+            histogram = self.phase_timings[phase] = AGENT_PHASE_SECONDS.labels(self.name, phase)
+        histogram.observe(duration)
+
+    def record_cycle(self, duration: float):
+        """Record full cycle duration and check it against the budget"""
+        self.cycle_count += 1
+        AGENT_CYCLES.labels(self.name).inc()
+        self.record_timing("cycle", duration)
+        budget = self.cycle_budget or self.max_cycle_interval
+        if budget is not None and duration > budget:
+            self.cycle_overruns += 1
+            AGENT_OVERRUNS.labels(self.name).inc()
+
+    def get_cycle_stats(self) -> Dict[str, Any]:
+        """Get cycle counts and per-phase latency summaries"""
+        return {
+            "cycles": self.cycle_count,
+            "overruns": self.cycle_overruns,
+            "phases": {
+                phase: histogram.get_metrics()
+                for phase, histogram in self.phase_timings.items()
+            }
+        }
+
+    def trigger(self):
+        """Wake the run loop to start a new cycle"""
+        self._wakeup.set()
+
+    def schedule_wakeup(self, delay: float) -> asyncio.TimerHandle:
+        """Request a cycle after delay seconds"""
+        return asyncio.get_running_loop().call_later(delay, self.trigger)
+
+    def configure_run_loop(
+        self,
+        event_driven: Optional[bool] = None,
+        min_cycle_interval: Optional[float] = None,
+        max_cycle_interval: Optional[float] = None
+    ):
+        """Override run loop settings for this agent"""
+        if event_driven is not None:
+            self.event_driven = event_driven
+        if min_cycle_interval is not None:
+            self.min_cycle_interval = min_cycle_interval
+        if max_cycle_interval is not None:
+            self.max_cycle_interval = max_cycle_interval if max_cycle_interval > 0 else None
+        self.trigger()
+
+    async def wait_for_work(self, cycle_started: float):
+        """Sleep until the next cycle is due"""
+        if not self.event_driven:
+            await asyncio.sleep(self.max_cycle_interval or 1)  # Fixed polling interval
+            return
+
+        # Rate limit cycles even when messages keep arriving
+        elapsed = time.monotonic() - cycle_started
+        if elapsed < self.min_cycle_interval:
+            await asyncio.sleep(self.min_cycle_interval - elapsed)
+
+        timeout = None
+        if self.max_cycle_interval is not None:
+            timeout = max(0.0, cycle_started + self.max_cycle_interval - time.monotonic())
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
     @abstractmethod
     async def initialize(self):
         """Initialize agent-specific resources"""
@@ -43,12 +173,79 @@ class BaseAgent(ABC):
         """Cleanup agent resources"""
         pass
 
-    async def send_message(self, target_agent: str, message: Dict[str, Any]):
+    def attach_message_bus(self, message_bus: MessageBus, mailbox_size: Optional[int] = None):
+        """Connect agent to message bus and create its mailbox"""
+        self.message_bus = message_bus
+        mailbox = message_bus.register(self.name, mailbox_size)
+        mailbox.add_listener(self.trigger)
+
+    async def send_message(self, target_agent: str, message: Dict[str, Any]) -> bool:
         """Send message to another agent"""
         self.logger.debug(f"Sending message to {target_agent}: {message}")
-        # Message bus implementation would go here
-        pass
+        if self.message_bus is None:
+            return False
+        return await self.message_bus.send(self.name, target_agent, message)
+
+    async def llm_generate(self, prompt: str, **options) -> str:
+        """Generate LLM response through the shared dispatcher, accounted to this agent"""
+        if self.llm is None:
+            raise RuntimeError(f"Agent {self.name} has no LLM dispatcher attached")
+        return await self.llm.generate(prompt, agent=self.name, **options)
+
+    async def receive_messages(self, timeout: Optional[float] = 0) -> List[Dict[str, Any]]:
+        """Receive a batch of pending messages from the agent mailbox"""
+        if self.message_bus is None:
+            return []
+        return await self.message_bus.receive(self.name, self.message_batch_size, timeout)
+
+    async def process_messages(self):
+        """Drain pending messages and dispatch them to handle_message"""
+        for message in await self.receive_messages():
+            try:
+                await self.handle_message(message)
+            except Exception as e:
+                self.logger.error(f"Error handling message {message.get('type')}: {e}")
+        # A full batch can leave messages behind, run the next cycle without waiting
+        if self.has_pending_messages():
+            self.trigger()
+
+    def has_pending_messages(self) -> bool:
+        """Check if the agent mailbox still holds messages"""
+        mailbox = self.message_bus.get_mailbox(self.name) if self.message_bus else None
+        return mailbox is not None and len(mailbox) > 0
+
+    async def handle_message(self, message: Dict[str, Any]):
+        """Handle message from another agent"""
+        self.logger.debug(f"Unhandled message from {message.get('sender')}: {message.get('type')}")
+
+    def assign_shard(self, shard: ShardAssignment):
+        """Restrict agent to the users owned by a shard"""
+        self.shard = shard
+
+    def owns_user(self, user_id: Any) -> bool:
+        """Check if this agent instance is responsible for user"""
+        return self.shard is None or self.shard.owns(user_id)
+
+    def owned_users(self, user_ids: List[Any]) -> List[Any]:
+        """Filter users down to those owned by this agent instance"""
+        if self.shard is None:
+            return user_ids
+        return [user_id for user_id in user_ids if self.shard.owns(user_id)]
 
     def update_metrics(self, metric_name: str, value: float):
         """Update agent metrics"""
         self.metrics.update(metric_name, value)
+
+    async def get_state(self) -> Dict[str, Any]:
+        """Get agent state for persistence"""
+        return {"name": self.name, "running": self.running}
+
+    async def restore_state(self, state: Dict[str, Any]):
+        """Restore agent state"""
+        pass
+
+    async def update_configuration(self, config: Dict[str, Any]):
+        """Update agent configuration"""
+        run_loop = config.get("run_loop", {})
+        if run_loop:
+            self.configure_run_loop(**run_loop)
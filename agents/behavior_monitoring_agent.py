@@ -4,6 +4,9 @@ import logging
 from datetime import datetime, timedelta
 
 class BehaviorMonitoringAgent(BaseAgent):
+    # Rescan active users for disengagement twice a minute
+    max_cycle_interval = 30.0
+
     def __init__(self):
         super().__init__("behavior_monitoring")
         self.behavior_patterns = {}
@@ -20,15 +23,18 @@ class BehaviorMonitoringAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Monitor active users
-            active_users = await self.get_active_users()
-            for user in active_users:
-                await self.analyze_user_behavior(user)
+            with self.track_phase("analyze_user_behavior"):
+                active_users = self.owned_users(await self.get_active_users())
+                for user in active_users:
+                    await self.analyze_user_behavior(user)
             
             # Check for disengagement signals
-            await self.detect_disengagement()
+            with self.track_phase("detect_disengagement"):
+                await self.detect_disengagement()
             
             # Update engagement metrics
-            await self.update_engagement_metrics()
+            with self.track_phase("update_engagement_metrics"):
+                await self.update_engagement_metrics()
         except Exception as e:
             self.logger.error(f"Error in behavior monitoring cycle: {e}")
 
@@ -130,13 +136,14 @@ class BehaviorMonitoringAgent(BaseAgent):
         if user_id in self.behavior_patterns:
             pattern = self.behavior_patterns[user_id]
             
-            # Share with relevant agents
+            # Share with relevant agents, as bulk traffic behind urgent events
             await self.send_message(
                 "motivation_mapping",
                 {
                     "type": "behavior_insight",
                     "user_id": user_id,
-                    "pattern": pattern
+                    "pattern": pattern,
+                    "priority": "low"
                 }
             )
             
@@ -145,7 +152,8 @@ class BehaviorMonitoringAgent(BaseAgent):
                 {
                     "type": "engagement_pattern",
                     "user_id": user_id,
-                    "pattern": pattern
+                    "pattern": pattern,
+                    "priority": "low"
                 }
             )
 
@@ -4,6 +4,9 @@ import logging
 from datetime import datetime, timedelta
 
 class EmotionalAnchoringAgent(BaseAgent):
+    # Disengagement risks arrive as messages, the timer refreshes milestones and narratives
+    max_cycle_interval = 60.0
+
     def __init__(self):
         super().__init__("emotional_anchoring")
         self.narrative_themes = {}
@@ -17,11 +20,14 @@ class EmotionalAnchoringAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Process user milestones
-            await self.process_milestones()
+            with self.track_phase("process_milestones"):
+                await self.process_milestones()
             # Update narrative experiences
-            await self.update_narratives()
+            with self.track_phase("update_narratives"):
+                await self.update_narratives()
             # Generate emotional touchpoints
-            await self.generate_emotional_touchpoints()
+            with self.track_phase("generate_emotional_touchpoints"):
+                await self.generate_emotional_touchpoints()
         except Exception as e:
             self.logger.error(f"Error in emotional anchoring cycle: {e}")
 
@@ -48,6 +54,14 @@ class EmotionalAnchoringAgent(BaseAgent):
             }
         }
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Reach out to users at risk of disengaging"""
+        if message.get("type") == "disengagement_risk":
+            user_id = message["user_id"]
+            await self.create_emotional_touchpoint(user_id, {"days_inactive": message.get("days_inactive")})
+        else:
+            await super().handle_message(message)
+
     async def create_user_story(self, user_id: str, theme: str) -> Dict[str, Any]:
         """Create personalized story for user"""
         if theme not in self.narrative_themes:
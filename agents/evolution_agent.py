@@ -4,11 +4,15 @@ import logging
 from datetime import datetime, timedelta
 
 class EvolutionAgent(BaseAgent):
+    # Strategy adaptation works on long-term trends
+    max_cycle_interval = 300.0
+
     def __init__(self):
         super().__init__("evolution")
         self.strategy_metrics = {}
         self.feature_performance = {}
         self.adaptation_history = {}
+        self.latest_trends = {}
         
     async def initialize(self):
         self.logger.info("Initializing Evolution Agent")
@@ -17,16 +21,27 @@ class EvolutionAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Analyze current strategies
-            await self.analyze_strategies()
+            with self.track_phase("analyze_strategies"):
+                await self.analyze_strategies()
             # Identify improvement areas
-            await self.identify_improvements()
+            with self.track_phase("identify_improvements"):
+                await self.identify_improvements()
             # Implement adaptations
-            await self.implement_adaptations()
+            with self.track_phase("implement_adaptations"):
+                await self.implement_adaptations()
             # Track evolution metrics
-            await self.track_evolution_metrics()
+            with self.track_phase("track_evolution_metrics"):
+                await self.track_evolution_metrics()
         except Exception as e:
             self.logger.error(f"Error in evolution cycle: {e}")
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Keep the latest trend analysis for strategy evaluation"""
+        if message.get("type") == "trend_analysis":
+            self.latest_trends = message["trends"]
+        else:
+            await super().handle_message(message)
+
     async def analyze_strategies(self):
         """Analyze effectiveness of current engagement strategies"""
         try:
@@ -169,7 +184,8 @@ class EvolutionAgent(BaseAgent):
             "strategy_health": self.calculate_strategy_health()
         }
         
-        self.update_metrics("evolution_metrics", metrics)
+        for metric_name, value in metrics.items():
+            self.update_metrics(metric_name, value)
         
         await self.send_message(
             "analytics",
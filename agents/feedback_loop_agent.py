@@ -4,6 +4,9 @@ import logging
 from datetime import datetime
 
 class FeedbackLoopAgent(BaseAgent):
+    # Notifications arrive as messages, periodic feedback runs each minute
+    max_cycle_interval = 60.0
+
     def __init__(self):
         super().__init__("feedback_loop")
         self.feedback_queue = []
@@ -18,11 +21,14 @@ class FeedbackLoopAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Process pending feedback
-            await self.process_feedback_queue()
+            with self.track_phase("process_feedback_queue"):
+                await self.process_feedback_queue()
             # Generate periodic feedback
-            await self.generate_periodic_feedback()
+            with self.track_phase("generate_periodic_feedback"):
+                await self.generate_periodic_feedback()
             # Process peer recognition
-            await self.process_peer_recognition()
+            with self.track_phase("process_peer_recognition"):
+                await self.process_peer_recognition()
         except Exception as e:
             self.logger.error(f"Error in feedback loop cycle: {e}")
 
@@ -44,9 +50,48 @@ class FeedbackLoopAgent(BaseAgent):
             "recognition": {
                 "title": "Community Recognition",
                 "template": "{user} appreciated your contribution: {contribution}"
+            },
+            "reminder": {
+                "title": "Keep It Going",
+                "template": "{message}"
+            },
+            "touchpoint": {
+                "title": "Your Story Continues",
+                "template": "{content}"
+            },
+            "group_activity": {
+                "title": "New Group Activity",
+                "template": "Your group has a new activity waiting for you"
+            },
+            "collaboration": {
+                "title": "Collaboration Opportunity",
+                "template": "Someone in your community would like to work with you"
             }
         }
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Turn agent events into queued notifications"""
+        message_type = message.get("type")
+        if message_type == "goal_completed":
+            await self.send_notification(message["user_id"], "achievement", {"achievement_name": message["goal"]["type"]})
+        elif message_type == "milestone_celebration":
+            celebration = message["celebration"]
+            await self.send_notification(celebration["user_id"], "milestone", {"milestone_name": celebration["milestone_type"]})
+        elif message_type == "emotional_touchpoint":
+            await self.send_notification(message["user_id"], "touchpoint", {"content": message["touchpoint"]["content"]})
+        elif message_type == "streak_achievement":
+            await self.send_notification(message["user_id"], "streak", {"streak_count": message["achievement"]["value"]})
+        elif message_type == "habit_reminder":
+            await self.send_notification(message["user_id"], "reminder", {"message": message["message"]})
+        elif message_type == "new_group_activity":
+            for user_id in message["users"]:
+                await self.send_notification(user_id, "group_activity", {"activity": message["activity"]})
+        elif message_type == "collaboration_opportunity":
+            for user_id in message["users"]:
+                await self.send_notification(user_id, "collaboration", {"opportunity": message["opportunity"]})
+        else:
+            await super().handle_message(message)
+
     async def send_notification(self, user_id: str, notification_type: str, data: Dict[str, Any]):
         """Send notification to user"""
         if notification_type not in self.notification_templates:
@@ -67,8 +112,9 @@ class FeedbackLoopAgent(BaseAgent):
 
     async def process_feedback_queue(self):
         """Process pending notifications in queue"""
-        while self.feedback_queue:
-            notification = self.feedback_queue.pop(0)
+        # Failed notifications are retried next cycle rather than spinning here
+        pending, self.feedback_queue = self.feedback_queue, []
+        for notification in pending:
             try:
                 # Check user preferences
                 if self.should_send_notification(notification):
@@ -3,10 +3,14 @@ from .base_agent import BaseAgent
 import logging
 
 class GoalSettingAgent(BaseAgent):
+    # Goal requests arrive as messages, progress is rechecked each minute
+    max_cycle_interval = 60.0
+
     def __init__(self):
         super().__init__("goal_setting")
         self.active_goals = {}
         self.goal_hierarchy = {}
+        self.goal_requests = []
 
     async def initialize(self):
         self.logger.info("Initializing Goal Setting Agent")
@@ -15,11 +19,11 @@ class GoalSettingAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Process new goal requests
-            await self.process_goal_requests()
-            # Update goal progress
-            await self.update_goal_progress()
+            with self.track_phase("process_goal_requests"):
+                await self.process_goal_requests()
             # Check for completed goals
-            await self.check_goal_completion()
+            with self.track_phase("check_goal_completion"):
+                await self.check_goal_completion()
         except Exception as e:
             self.logger.error(f"Error in goal setting cycle: {e}")
 
@@ -84,14 +88,31 @@ class GoalSettingAgent(BaseAgent):
                             {
                                 "type": "goal_completed",
                                 "user_id": user_id,
-                                "goal": goal
+                                "goal": goal,
+                                "priority": "high"
                             }
                         )
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Queue goal requests and apply progress updates"""
+        message_type = message.get("type")
+        if message_type == "goal_request":
+            self.goal_requests.append(message)
+        elif message_type == "goal_progress":
+            await self.update_goal_progress(
+                message["user_id"], message["goal_type"], message["action"], message.get("value", 1)
+            )
+        else:
+            await super().handle_message(message)
+
     async def process_goal_requests(self):
         """Process incoming goal creation requests"""
-        # Implementation would process messages from other agents
-        pass
+        requests, self.goal_requests = self.goal_requests, []
+        for request in requests:
+            try:
+                await self.create_user_goal(request["user_id"], request["goal_type"])
+            except Exception as e:
+                self.logger.error(f"Error creating goal for user {request.get('user_id')}: {e}")
 
     async def cleanup(self):
         """Cleanup agent resources"""
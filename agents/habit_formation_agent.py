@@ -4,11 +4,16 @@ import logging
 from datetime import datetime, timedelta
 
 class HabitFormationAgent(BaseAgent):
+    # Reminders are due at minute resolution
+    max_cycle_interval = 60.0
+
     def __init__(self):
         super().__init__("habit_formation")
         self.user_streaks = {}
         self.habit_triggers = {}
         self.engagement_patterns = {}
+        self.behavior_patterns = {}
+        self.strategy_changes = []
         
     async def initialize(self):
         self.logger.info("Initializing Habit Formation Agent")
@@ -18,14 +23,27 @@ class HabitFormationAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Update streaks
-            await self.update_streaks()
+            with self.track_phase("update_streaks"):
+                await self.update_streaks()
             # Check and send reminders
-            await self.process_reminders()
+            with self.track_phase("process_reminders"):
+                await self.process_reminders()
             # Analyze and optimize habits
-            await self.optimize_habits()
+            with self.track_phase("optimize_habits"):
+                await self.optimize_habits()
         except Exception as e:
             self.logger.error(f"Error in habit formation cycle: {e}")
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Track observed behavior and strategy changes from other agents"""
+        message_type = message.get("type")
+        if message_type == "engagement_pattern":
+            self.behavior_patterns[message["user_id"]] = message["pattern"]
+        elif message_type == "strategy_update":
+            self.strategy_changes = message["changes"]
+        else:
+            await super().handle_message(message)
+
     async def load_existing_streaks(self):
         """Load existing user streaks"""
         # Implementation would load from database
@@ -51,7 +69,7 @@ class HabitFormationAgent(BaseAgent):
     async def update_streaks(self):
         """Update user streaks based on activity"""
         try:
-            active_users = await self.get_active_users()
+            active_users = self.owned_users(await self.get_active_users())
             for user_id in active_users:
                 activities = await self.get_user_activities(user_id)
                 await self.process_user_streaks(user_id, activities)
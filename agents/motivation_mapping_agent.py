@@ -4,9 +4,15 @@ import logging
 from data.models import UserProfile
 
 class MotivationMappingAgent(BaseAgent):
+    # Motivation profiles shift slowly
+    max_cycle_interval = 300.0
+
     def __init__(self):
         super().__init__("motivation_mapping")
         self.user_profiles = {}
+        self.behavior_insights = {}
+        self.habit_adjustments = {}
+        self.strategy_changes = []
         
     async def initialize(self):
         self.logger.info("Initializing Motivation Mapping Agent")
@@ -16,13 +22,27 @@ class MotivationMappingAgent(BaseAgent):
     async def process_cycle(self):
         """Analyze user behaviors and update motivation profiles"""
         try:
-            users = await self.get_active_users()
-            for user in users:
-                profile = await self.analyze_user_motivation(user)
-                await self.update_user_profile(user, profile)
+            # One phase per cycle, per-user timings would flood the histograms
+            with self.track_phase("map_user_motivations"):
+                users = await self.get_active_users()
+                for user in users:
+                    profile = await self.analyze_user_motivation(user)
+                    await self.update_user_profile(user, profile)
         except Exception as e:
             self.logger.error(f"Error in motivation mapping cycle: {e}")
 
+    async def handle_message(self, message: Dict[str, Any]):
+        """Track behavior insights, habit adjustments and strategy changes"""
+        message_type = message.get("type")
+        if message_type == "behavior_insight":
+            self.behavior_insights[message["user_id"]] = message["pattern"]
+        elif message_type == "habit_adjustment":
+            self.habit_adjustments[message["user_id"]] = message["adjustments"]
+        elif message_type == "strategy_update":
+            self.strategy_changes = message["changes"]
+        else:
+            await super().handle_message(message)
+
     async def analyze_user_motivation(self, user: Dict[str, Any]) -> Dict[str, float]:
         """Analyze user's motivation factors"""
         motivators = {
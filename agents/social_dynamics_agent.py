@@ -4,6 +4,9 @@ import logging
 from datetime import datetime
 
 class SocialDynamicsAgent(BaseAgent):
+    # Social graph and group activities change slowly
+    max_cycle_interval = 120.0
+
     def __init__(self):
         super().__init__("social_dynamics")
         self.social_connections = {}
@@ -17,20 +20,24 @@ class SocialDynamicsAgent(BaseAgent):
     async def process_cycle(self):
         try:
             # Update social connections
-            await self.update_social_networks()
+            with self.track_phase("update_social_networks"):
+                await self.update_social_networks()
             # Process group activities
-            await self.manage_group_activities()
+            with self.track_phase("manage_group_activities"):
+                await self.manage_group_activities()
             # Generate collaboration opportunities
-            await self.generate_collaborations()
+            with self.track_phase("generate_collaborations"):
+                await self.generate_collaborations()
             # Update social metrics
-            await self.update_social_metrics()
+            with self.track_phase("update_social_metrics"):
+                await self.update_social_metrics()
         except Exception as e:
             self.logger.error(f"Error in social dynamics cycle: {e}")
 
     async def update_social_networks(self):
         """Update user social connections and networks"""
         try:
-            active_users = await self.get_active_users()
+            active_users = self.owned_users(await self.get_active_users())
             for user_id in active_users:
                 interactions = await self.get_user_interactions(user_id)
                 self.update_user_connections(user_id, interactions)
@@ -134,7 +141,8 @@ class SocialDynamicsAgent(BaseAgent):
                 "collaboration_opportunities": len(self.collaboration_opportunities)
             }
             
-            self.update_metrics("social_metrics", metrics)
+            for metric_name, value in metrics.items():
+                self.update_metrics(metric_name, value)
             
             await self.send_message(
                 "analytics",
@@ -0,0 +1,356 @@
+"""Synthetic-population load benchmark for the agent pipeline.
+
+Runs the real agent classes against generated users, activities,
+interactions and milestones by replacing their data hooks
+(get_active_users, get_user_activities, ...). Each agent and scale runs
+in its own process so peak RSS is attributable to that agent.
+
+    python -m benchmarks.agent_pipeline --users 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+# Allow running as a script from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.metrics import LatencyHistogram
+
+DEFAULT_SCALES = (10_000, 100_000, 1_000_000)
+
+# Geometric buckets from 1us to ~15s, fine enough for per-user percentiles
+UNIT_LATENCY_BUCKETS = tuple(1e-6 * 1.25 ** i for i in range(75))
+
+ACTIVITY_TYPES = ("content_creation", "interaction", "reaction", "contribution")
+INTERACTION_TYPES = ("direct_message", "comment", "like", "share", "collaboration")
+MILESTONE_TYPES = ("first_post", "collaboration", "expert", "skill_acquired")
+
+# Agent name -> (module, class, per-user method timed for latency percentiles).
+# Goal setting, analytics and evolution have no per-user data hooks.
+AGENTS = {
+    "behavior_monitoring": ("agents.behavior_monitoring_agent", "BehaviorMonitoringAgent", "analyze_user_behavior"),
+    "habit_formation": ("agents.habit_formation_agent", "HabitFormationAgent", "process_user_streaks"),
+    "social_dynamics": ("agents.social_dynamics_agent", "SocialDynamicsAgent", "update_user_connections"),
+    "motivation_mapping": ("agents.motivation_mapping_agent", "MotivationMappingAgent", "analyze_user_motivation"),
+    "emotional_anchoring": ("agents.emotional_anchoring_agent", "EmotionalAnchoringAgent", "celebrate_milestone"),
+    "feedback_loop": ("agents.feedback_loop_agent", "FeedbackLoopAgent", "send_notification")
+}
+
+class SyntheticPopulation:
+    """Deterministic users, activities, interactions and milestones.
+
+    Per-user data comes from a fixed pool of generated profiles so a
+    million-user population costs little memory and hook lookups stay O(1);
+    agent state, not the fixture, dominates measured RSS.
+    """
+
+    def __init__(
+        self,
+        num_users: int,
+        seed: int = 42,
+        pool_size: int = 4096,
+        activities_per_user: int = 8,
+        interactions_per_user: int = 6,
+        event_rate: float = 0.01
+    ):
+        self.num_users = num_users
+        self.seed = seed
+        self.now = datetime.now()
+        rng = random.Random(seed)
+
+        self.user_ids = [f"user-{i:07d}" for i in range(num_users)]
+        self.user_records = [{"id": user_id} for user_id in self.user_ids]
+        self.pool_size = min(pool_size, num_users)
+
+        self.activity_pool = [
+            self._generate_activities(rng, activities_per_user)
+            for _ in range(self.pool_size)
+        ]
+        self.interaction_pool = [
+            self._generate_interactions(rng, interactions_per_user)
+            for _ in range(self.pool_size)
+        ]
+        self.engagement_pool = [
+            {"last_emotional_touchpoint": self.now - timedelta(days=rng.randint(0, 6))}
+            for _ in range(self.pool_size)
+        ]
+
+        num_events = max(1, int(num_users * event_rate))
+        self.milestones = [
+            {"user_id": rng.choice(self.user_ids), "type": rng.choice(MILESTONE_TYPES)}
+            for _ in range(num_events)
+        ]
+        self.recognition_events = [
+            {
+                "recipient_id": rng.choice(self.user_ids),
+                "sender_name": rng.choice(self.user_ids),
+                "contribution": "helpful answer"
+            }
+            for _ in range(num_events)
+        ]
+
+    def _generate_activities(self, rng: random.Random, mean: int) -> List[Dict[str, Any]]:
+        """Generate one user's recent activities, oldest first"""
+        activities = []
+        for _ in range(rng.randint(1, mean * 2)):
+            activities.append({
+                "type": rng.choice(ACTIVITY_TYPES),
+                "timestamp": self.now - timedelta(seconds=rng.uniform(0, 14 * 86400)),
+                "duration": rng.randint(5, 600),
+                "completed_tasks": rng.randint(0, 2),
+                "badges_earned": rng.randint(0, 1),
+                "interactions": rng.randint(0, 3),
+                "collaborations": rng.randint(0, 1),
+                "skill_progress": rng.randint(0, 2),
+                "learning_events": rng.randint(0, 1),
+                "goals_progress": rng.randint(0, 2),
+                "milestones_reached": rng.randint(0, 1)
+            })
+        activities.sort(key=lambda activity: activity["timestamp"])
+        return activities
+
+    def _generate_interactions(self, rng: random.Random, mean: int) -> List[Dict[str, Any]]:
+        """Generate interactions concentrated on a few peers, so collaborations appear"""
+        peers = [rng.choice(self.user_ids) for _ in range(3)]
+        return [
+            {
+                "target_user": rng.choice(peers),
+                "type": rng.choice(INTERACTION_TYPES),
+                "timestamp": self.now - timedelta(seconds=rng.uniform(0, 7 * 86400))
+            }
+            for _ in range(rng.randint(1, mean * 2))
+        ]
+
+    def slot(self, user_id: str) -> int:
+        """Pool slot backing a user's data"""
+        return int(user_id[5:]) % self.pool_size
+
+    def install_hooks(self, agent: Any):
+        """Replace agent data hooks with synthetic data sources"""
+        population = self
+
+        async def get_active_users():
+            if agent.name == "motivation_mapping":
+                return population.user_records
+            return population.user_ids
+
+        async def get_user_activities(user_id: str):
+            return population.activity_pool[population.slot(user_id)]
+
+        async def get_user_interactions(user_id: str):
+            return population.interaction_pool[population.slot(user_id)]
+
+        async def get_user_engagement(user_id: str):
+            return population.engagement_pool[population.slot(user_id)]
+
+        async def get_user_stats(user_id: str):
+            # generate_user_feedback is not implemented by FeedbackLoopAgent yet
+            return {"needs_feedback": False}
+
+        async def get_pending_milestones():
+            return population.milestones
+
+        async def get_pending_recognition_events():
+            return population.recognition_events
+
+        hooks = {
+            "get_active_users": get_active_users,
+            "get_user_activities": get_user_activities,
+            "get_user_interactions": get_user_interactions,
+            "get_user_engagement": get_user_engagement,
+            "get_user_stats": get_user_stats,
+            "get_pending_milestones": get_pending_milestones,
+            "get_pending_recognition_events": get_pending_recognition_events
+        }
+        # Installed on every agent, some call hooks they do not define
+        # (e.g. MotivationMappingAgent.get_user_activities)
+        for name, hook in hooks.items():
+            setattr(agent, name, hook)
+
+class ErrorCounter(logging.Handler):
+    """Collects errors an agent logs, since cycles swallow their exceptions"""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.messages: List[str] = []
+
+    def emit(self, record: logging.LogRecord):
+        self.messages.append(record.getMessage())
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux)"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def time_unit_of_work(agent: Any, method_name: str, histogram: LatencyHistogram):
+    """Wrap agent's per-user method to record its latency"""
+    method = getattr(agent, method_name)
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def timed_method(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+    else:
+        @functools.wraps(method)
+        def timed_method(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+    setattr(agent, method_name, timed_method)
+
+async def benchmark_agent(agent_name: str, num_users: int, cycles: int, seed: int) -> Dict[str, Any]:
+    """Run agent cycles over a synthetic population and collect results"""
+    # Imported here so ENGAGEMENT_DB_PATH is honoured by the benchmark process
+    import importlib
+    from data.models import init_db
+    from utils.message_bus import MessageBus
+
+    init_db()
+    module_name, class_name, unit_method = AGENTS[agent_name]
+    agent = getattr(importlib.import_module(module_name), class_name)()
+
+    setup_started = time.perf_counter()
+    population = SyntheticPopulation(num_users, seed)
+    setup_seconds = time.perf_counter() - setup_started
+
+    population.install_hooks(agent)
+    unit_latency = LatencyHistogram(UNIT_LATENCY_BUCKETS)
+    time_unit_of_work(agent, unit_method, unit_latency)
+
+    # Other agents are not running, so their messages count as undeliverable
+    bus = MessageBus()
+    agent.attach_message_bus(bus)
+    await agent.initialize()
+    baseline_rss = peak_rss_mb()
+
+    errors = ErrorCounter()
+    agent.logger.addHandler(errors)
+    cycle_times = []
+    failed_cycles = 0
+    for _ in range(cycles):
+        logged = len(errors.messages)
+        cycle_times.append(await agent.run_cycle())
+        if len(errors.messages) > logged:
+            failed_cycles += 1
+    await agent.cleanup()
+    agent.logger.removeHandler(errors)
+
+    # Cycles that logged errors skipped part of their work, so their
+    # timings do not measure the full pipeline and no throughput is reported
+    partial = failed_cycles > 0
+    steady = cycle_times[1:] or cycle_times
+    mean_cycle = sum(steady) / len(steady)
+    return {
+        "agent": agent_name,
+        "users": num_users,
+        "cycles": cycles,
+        "failed_cycles": failed_cycles,
+        "partial": partial,
+        "errors": sorted(set(errors.messages)),
+        "setup_seconds": setup_seconds,
+        "first_cycle_seconds": cycle_times[0],
+        "mean_cycle_seconds": None if partial else mean_cycle,
+        "users_per_second": None if partial else (num_users / mean_cycle if mean_cycle else 0.0),
+        "unit_method": unit_method,
+        "unit_latency": unit_latency.get_metrics(),
+        "phases": agent.get_cycle_stats()["phases"],
+        "messages": {
+            key: bus.stats[key] for key in ("sent", "delivered", "undeliverable")
+        },
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+def run_in_process(agent_name: str, num_users: int, cycles: int, seed: int, db_path: str, results):
+    """Benchmark process entry point"""
+    logging.basicConfig(level=logging.WARNING)
+    os.environ["ENGAGEMENT_DB_PATH"] = db_path
+    try:
+        results.put(asyncio.run(benchmark_agent(agent_name, num_users, cycles, seed)))
+    except Exception as e:
+        results.put({"agent": agent_name, "users": num_users, "error": f"{type(e).__name__}: {e}"})
+
+def run_benchmarks(
+    agent_names: List[str],
+    scales: List[int],
+    cycles: int = 3,
+    seed: int = 42,
+    timeout: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """Benchmark each agent at each scale in a fresh process"""
+    context = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory(prefix="agent-bench-") as tmpdir:
+        for num_users in scales:
+            for agent_name in agent_names:
+                queue = context.Queue()
+                db_path = os.path.join(tmpdir, f"{agent_name}-{num_users}.db")
+                process = context.Process(
+                    target=run_in_process,
+                    args=(agent_name, num_users, cycles, seed, db_path, queue),
+                    name=f"bench-{agent_name}-{num_users}"
+                )
+                process.start()
+                try:
+                    result = queue.get(timeout=timeout)
+                except Exception:
+                    process.terminate()
+                    result = {"agent": agent_name, "users": num_users, "error": "timed out"}
+                process.join()
+                results.append(result)
+                print(format_result(result), flush=True)
+    return results
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Format one result as a table row"""
+    if "error" in result:
+        return f"{result['agent']:<22} {result['users']:>9,}  ERROR {result['error']}"
+    if result["partial"]:
+        return (
+            f"{result['agent']:<22} {result['users']:>9,}  PARTIAL "
+            f"{result['failed_cycles']}/{result['cycles']} cycles logged errors: {result['errors'][0]}"
+        )
+    latency = result["unit_latency"]
+    return (
+        f"{result['agent']:<22} {result['users']:>9,} "
+        f"{result['mean_cycle_seconds']:>10.3f} {result['users_per_second']:>12,.0f} "
+        f"{latency['p50'] * 1e6:>9.1f} {latency['p99'] * 1e6:>9.1f} "
+        f"{result['peak_rss_mb']:>9.1f}"
+    )
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Agent pipeline load benchmark")
+    parser.add_argument("--users", type=int, nargs="+", default=list(DEFAULT_SCALES), help="Population sizes")
+    parser.add_argument("--agents", nargs="+", default=list(AGENTS), choices=list(AGENTS), help="Agents to run")
+    parser.add_argument("--cycles", type=int, default=3, help="Cycles per run, the first is reported separately")
+    parser.add_argument("--seed", type=int, default=42, help="Population random seed")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per agent run")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    print(
+        f"{'agent':<22} {'users':>9} {'cycle_s':>10} {'users/s':>12} "
+        f"{'p50_us':>9} {'p99_us':>9} {'rss_mb':>9}"
+    )
+    results = run_benchmarks(args.agents, args.users, args.cycles, args.seed, args.timeout)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
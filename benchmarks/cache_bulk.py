@@ -0,0 +1,106 @@
+"""Per-key versus bulk EngagementCache operations.
+
+Runs in a temporary directory so the real data/cache.db is untouched.
+For each key count, times set/get/delete one key at a time against
+set_many/get_many/delete_many. Gets are measured cold, with the memory
+tier cleared so every lookup reaches SQLite, and warm.
+
+    python -m benchmarks.cache_bulk --keys 100 1000 10000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+# Allow running as a script from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def measure(operation: Callable[[], Any], repeat: int) -> float:
+    """Best wall time in seconds over repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def run_level(cache: Any, count: int, repeat: int) -> Dict[str, Any]:
+    """Time per-key and bulk paths for count keys"""
+    keys = [f"user_{count}_{index}" for index in range(count)]
+    values = {key: {"user": key, "streak": index, "motivators": {"social": 0.5}} for index, key in enumerate(keys)}
+
+    def cold(operation: Callable[[], Any]) -> Callable[[], Any]:
+        def run():
+            cache.entries.clear()
+            operation()
+        return run
+
+    timings = {
+        "set": (
+            measure(lambda: [cache.set(key, value) for key, value in values.items()], repeat),
+            measure(lambda: cache.set_many(values), repeat)
+        ),
+        "get_cold": (
+            measure(cold(lambda: [cache.get(key) for key in keys]), repeat),
+            measure(cold(lambda: cache.get_many(keys)), repeat)
+        ),
+        "get_warm": (
+            measure(lambda: [cache.get(key) for key in keys], repeat),
+            measure(lambda: cache.get_many(keys), repeat)
+        ),
+        "delete": (
+            measure(lambda: (cache.set_many(values), [cache.delete(key) for key in keys]), repeat),
+            measure(lambda: (cache.set_many(values), cache.delete_many(keys)), repeat)
+        )
+    }
+    assert len(cache.get_many(keys)) == 0
+    return {
+        "keys": count,
+        "operations": {
+            name: {
+                "per_key_seconds": per_key,
+                "bulk_seconds": bulk,
+                "speedup": per_key / bulk if bulk else 0.0
+            }
+            for name, (per_key, bulk) in timings.items()
+        }
+    }
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="EngagementCache per-key versus bulk benchmark")
+    parser.add_argument("--keys", type=int, nargs="+", default=[100, 1000, 10000], help="Keys per operation")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement, best is kept")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)  # EngagementCache opens data/cache.db relative to the working directory
+        try:
+            os.makedirs("data")
+            from data.cache import EngagementCache
+
+            cache = EngagementCache(max_entries=max(args.keys), sweep_interval=0)
+            print(f"{'keys':>7} {'operation':<10} {'per_key_ms':>11} {'bulk_ms':>9} {'speedup':>8}")
+            results = []
+            for count in args.keys:
+                result = run_level(cache, count, args.repeat)
+                results.append(result)
+                for name, timing in result["operations"].items():
+                    print(
+                        f"{count:>7} {name:<10} {timing['per_key_seconds'] * 1e3:>11.1f} "
+                        f"{timing['bulk_seconds'] * 1e3:>9.1f} {timing['speedup']:>7.1f}x",
+                        flush=True
+                    )
+        finally:
+            os.chdir(cwd)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
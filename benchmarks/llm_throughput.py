@@ -0,0 +1,210 @@
+"""Throughput and latency benchmark for the LLM layer, run offline.
+
+Starts tools.mock_llm_server in a child process, points the Groq provider
+at it and drives LLMProviderManager at each concurrency level: directly,
+through LLMDispatcher, with generate_batch or with streaming. Reports
+request rate, latency percentiles, retries and how many connections the
+pool opened, so pooling, batching and rate limiting can be compared
+without API keys or network.
+
+    python -m benchmarks.llm_throughput --concurrency 1 8 32 128 --requests 500
+    python -m benchmarks.llm_throughput --mode stream --latency fixed:0.1 --server-rpm 600
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+# Allow running as a script from the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.mock_llm_server import add_arguments, create_server
+from utils.metrics import LatencyHistogram
+
+MODES = ("direct", "dispatcher", "batch", "stream")
+
+BATCH_INSTRUCTIONS = "Write a one-line encouraging reminder for this user's habit streak."
+
+def run_server(args: argparse.Namespace, queue: multiprocessing.Queue):
+    """Serve mock LLM in a child process, reporting the bound port"""
+    async def serve():
+        server = create_server(args)
+        queue.put(await server.start("127.0.0.1", 0))
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+def configure_provider(base_url: str, args: argparse.Namespace):
+    """Point the Groq provider at the mock server"""
+    os.environ["GROQ_API_KEY"] = "mock"
+    os.environ["GROQ_BASE_URL"] = base_url
+    if args.provider_concurrency:
+        os.environ["GROQ_MAX_CONCURRENCY"] = str(args.provider_concurrency)
+    if args.rpm:
+        os.environ["GROQ_RPM"] = str(args.rpm)
+
+async def get_server_stats(manager: Any) -> Dict[str, Any]:
+    """Fetch mock server counters"""
+    from llm.providers import LLMProvider
+
+    response = await manager.get_client(LLMProvider.GROQ).get("/stats")
+    return response.json()
+
+async def run_level(mode: str, concurrency: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """Drive one mode at one concurrency level against the mock server"""
+    from llm.cache import LLMResponseCache
+    from llm.dispatcher import LLMDispatcher
+    from llm.providers import LLMProvider, LLMProviderManager
+
+    manager = LLMProviderManager(max_connections=args.max_connections, cache=LLMResponseCache())
+    dispatcher = LLMDispatcher(manager) if mode == "dispatcher" else None
+    latencies = LatencyHistogram()
+    first_tokens = LatencyHistogram()
+    counter = itertools.count()
+    errors = 0
+    items = 0
+    before = await get_server_stats(manager)
+
+    async def issue(index: int) -> int:
+        """Issue one request, returning how many items it produced"""
+        prompt = f"Request {index}: {BATCH_INSTRUCTIONS}"
+        options = {"max_tokens": args.max_tokens, "use_cache": args.cache, "agent": "benchmark"}
+        if mode == "direct":
+            await manager.generate(prompt, LLMProvider.GROQ, **options)
+        elif mode == "dispatcher":
+            await dispatcher.generate(prompt, provider=LLMProvider.GROQ, **options)
+        elif mode == "stream":
+            started = time.perf_counter()
+            first_token = None
+            async for chunk in manager.generate_stream(prompt, LLMProvider.GROQ, **options):
+                if first_token is None and chunk.text:
+                    first_token = time.perf_counter() - started
+            if first_token is not None:
+                first_tokens.observe(first_token)
+        else:
+            batch = [{"user": f"user_{index}_{item}", "streak": item} for item in range(args.batch_items)]
+            results = await manager.generate_batch(
+                BATCH_INSTRUCTIONS,
+                batch,
+                LLMProvider.GROQ,
+                max_tokens_per_item=args.max_tokens,
+                agent="benchmark"
+            )
+            return sum(result is not None for result in results)
+        return 1
+
+    async def worker():
+        nonlocal errors, items
+        while True:
+            index = next(counter)
+            if index >= args.requests:
+                return
+            started = time.perf_counter()
+            try:
+                produced = await issue(index)
+                items += produced
+            except Exception:
+                errors += 1
+            latencies.observe(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    after = await get_server_stats(manager)
+    limiter = manager.get_rate_limit_metrics()[LLMProvider.GROQ.value]
+    usage = manager.accounting.get_metrics()["by_provider"].get(LLMProvider.GROQ.value, {})
+    if dispatcher is not None:
+        await dispatcher.stop()
+    await manager.close()
+
+    result = {
+        "mode": mode,
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "errors": errors,
+        "items": items,
+        "seconds": elapsed,
+        "requests_per_second": args.requests / elapsed if elapsed else 0.0,
+        "items_per_second": items / elapsed if elapsed else 0.0,
+        "latency": {
+            "p50": latencies.quantile(0.5),
+            "p95": latencies.quantile(0.95),
+            "p99": latencies.quantile(0.99)
+        },
+        "retries": limiter["retries"],
+        "throttled": limiter["throttled"],
+        "rate_limit_wait_p95": limiter["wait"].get("p95"),
+        "server": {
+            name: after[name] - before[name]
+            for name in ("connections", "requests", "completed", "errors", "throttled")
+        },
+        "server_max_in_flight": after["max_in_flight"],
+        "tokens": usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+    }
+    if mode == "stream":
+        result["ttft_p50"] = first_tokens.quantile(0.5)
+    return result
+
+def format_result(result: Dict[str, Any]) -> str:
+    """Format one result as a table row"""
+    latency = result["latency"]
+    return (
+        f"{result['mode']:<10} {result['concurrency']:>6} {result['requests_per_second']:>9.1f} "
+        f"{result['items_per_second']:>9.1f} {latency['p50'] * 1e3:>8.1f} {latency['p95'] * 1e3:>8.1f} "
+        f"{latency['p99'] * 1e3:>8.1f} {result['errors']:>6} {result['retries']:>7} "
+        f"{result['server']['requests']:>8} {result['server']['connections']:>6}"
+    )
+
+async def run_benchmarks(args: argparse.Namespace, base_url: str) -> List[Dict[str, Any]]:
+    """Run every mode at every concurrency level"""
+    configure_provider(base_url, args)
+    results = []
+    for mode in args.mode:
+        for concurrency in args.concurrency:
+            result = await run_level(mode, concurrency, args)
+            results.append(result)
+            print(format_result(result), flush=True)
+    return results
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="LLM layer throughput benchmark against a local mock server")
+    parser.add_argument("--mode", nargs="+", default=["direct", "dispatcher"], choices=MODES, help="Call paths to drive")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128], help="Concurrent callers")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument("--max-tokens", type=int, default=50, help="max_tokens per request or batch item")
+    parser.add_argument("--batch-items", type=int, default=20, help="Items per generate_batch call in batch mode")
+    parser.add_argument("--max-connections", type=int, default=None, help="HTTP pool size per provider")
+    parser.add_argument("--provider-concurrency", type=int, default=None, help="Client-side concurrency limit (GROQ_MAX_CONCURRENCY)")
+    parser.add_argument("--rpm", type=float, default=None, help="Client-side requests per minute (GROQ_RPM)")
+    parser.add_argument("--cache", action="store_true", help="Allow response cache hits")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    server = context.Process(target=run_server, args=(args, queue), name="mock-llm-server", daemon=True)
+    server.start()
+    try:
+        base_url = f"http://127.0.0.1:{queue.get(timeout=30)}/v1"
+        print(
+            f"{'mode':<10} {'conc':>6} {'req/s':>9} {'items/s':>9} {'p50_ms':>8} {'p95_ms':>8} "
+            f"{'p99_ms':>8} {'errors':>6} {'retries':>7} {'upstream':>8} {'conns':>6}"
+        )
+        results = asyncio.run(run_benchmarks(args, base_url))
+    finally:
+        server.terminate()
+        server.join()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
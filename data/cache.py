@@ -1,141 +1,478 @@
 import json
-from typing import Any, Dict, Optional
-from datetime import datetime, timedelta
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from datetime import datetime
 import logging
 from pathlib import Path
 import sqlite3
+from data.connection import get_connection
+from utils.metrics import REGISTRY, SQLITE_OPERATION_SECONDS, timed
+
+# Keys per IN list in get_many/delete_many, below SQLite's default host parameter limit
+BULK_CHUNK_SIZE = 500
+
+ENGAGEMENT_CACHE_REQUESTS = REGISTRY.counter(
+    "engagement_cache_requests_total",
+    "Engagement cache lookups by tier and result",
+    ("tier", "result")
+)
+ENGAGEMENT_CACHE_SWEPT = REGISTRY.counter(
+    "engagement_cache_swept_total",
+    "Expired engagement cache rows deleted by the sweeper"
+)
 
 class EngagementCache:
-    def __init__(self, cache_duration: int = 3600):
+    """Engagement data cache: in-memory LRU in front of SQLite.
+
+    Reads check memory first and fall back to disk, promoting what they
+    find. Writes go to both tiers. Values served from memory are shared
+    between callers and must be treated as read-only.
+
+    On disk, expiry is an indexed epoch integer. Expired rows are never
+    returned and are deleted in small batches by a background sweeper.
+    The row count is kept by triggers, so no query scans the whole table.
+    """
+
+    def __init__(
+        self,
+        cache_duration: int = 3600,
+        max_entries: Optional[int] = None,
+        sweep_interval: Optional[float] = None,
+        sweep_batch_size: Optional[int] = None,
+        cache_path: Optional[str] = None
+    ):
         self.logger = logging.getLogger("engagement_cache")
         self.cache_duration = cache_duration  # Cache duration in seconds
-        self.cache_path = Path("data/cache.db")
+        self.cache_path = Path(cache_path or os.environ.get("ENGAGEMENT_CACHE_PATH", "data/cache.db"))
+        self.max_entries = max_entries or int(os.environ.get("ENGAGEMENT_CACHE_MAX_ENTRIES", 10000))
+        # key -> (expires_at epoch seconds, decoded value), least recently used first
+        self.entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        # Seconds between sweeps, 0 disables the background sweeper
+        self.sweep_interval = sweep_interval if sweep_interval is not None else float(
+            os.environ.get("ENGAGEMENT_CACHE_SWEEP_INTERVAL", 60)
+        )
+        # Rows deleted per sweep transaction, keeping write locks short
+        self.sweep_batch_size = sweep_batch_size or int(os.environ.get("ENGAGEMENT_CACHE_SWEEP_BATCH", 1000))
+        self._stop_sweeper = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+        self.stats = {
+            "memory_hits": 0,
+            "memory_misses": 0,
+            "memory_evictions": 0,
+            "memory_expired": 0,
+            "disk_hits": 0,
+            "disk_misses": 0,
+            "disk_errors": 0,
+            "sweeps": 0,
+            "swept": 0,
+            "migrated": 0
+        }
         self.initialize_cache()
+        if self.sweep_interval > 0:
+            self.start_sweeper()
 
     def initialize_cache(self):
-        """Initialize cache database"""
+        """Initialize cache database, migrating the legacy ISO-8601 schema"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
+
+            cursor.execute('PRAGMA table_info(engagement_cache)')
+            columns = {row[1] for row in cursor.fetchall()}
+            if columns and "expires_at" not in columns:
+                self.migrate_legacy(conn)
+
             # Create cache table
             cursor.execute('''
             CREATE TABLE IF NOT EXISTS engagement_cache (
                 key TEXT PRIMARY KEY,
                 value TEXT,
-                timestamp DATETIME,
-                expiry DATETIME
+                updated_at INTEGER,
+                expires_at INTEGER
             )
             ''')
-            
+            cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_engagement_cache_expires_at
+            ON engagement_cache (expires_at)
+            ''')
+
+            # Row count kept by triggers; writes upsert so replacing a key does not fire them
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS engagement_cache_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER
+            )
+            ''')
+            cursor.execute('''
+            INSERT OR IGNORE INTO engagement_cache_counters (name, value)
+            VALUES ('entries', (SELECT COUNT(*) FROM engagement_cache))
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS engagement_cache_count_insert
+            AFTER INSERT ON engagement_cache BEGIN
+                UPDATE engagement_cache_counters SET value = value + 1 WHERE name = 'entries';
+            END
+            ''')
+            cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS engagement_cache_count_delete
+            AFTER DELETE ON engagement_cache BEGIN
+                UPDATE engagement_cache_counters SET value = value - 1 WHERE name = 'entries';
+            END
+            ''')
+
             conn.commit()
         except Exception as e:
             self.logger.error(f"Failed to initialize cache: {e}")
-        finally:
-            conn.close()
+
+    def migrate_legacy(self, conn: sqlite3.Connection):
+        """Rebuild table written with ISO-8601 local expiry strings, keeping unexpired rows"""
+        now = time.time()
+        rows = []
+        for key, value, timestamp, expiry in conn.execute(
+            'SELECT key, value, timestamp, expiry FROM engagement_cache'
+        ):
+            try:
+                expires_at = int(datetime.fromisoformat(expiry).timestamp())
+                updated_at = int(datetime.fromisoformat(timestamp).timestamp())
+            except (TypeError, ValueError):
+                continue
+            if expires_at > now:
+                rows.append((key, value, updated_at, expires_at))
+
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')  # DDL does not open a transaction implicitly
+            conn.execute('DROP TABLE engagement_cache')
+            conn.execute('DROP TABLE IF EXISTS engagement_cache_counters')
+            conn.execute('''
+            CREATE TABLE engagement_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT,
+                updated_at INTEGER,
+                expires_at INTEGER
+            )
+            ''')
+            conn.executemany(
+                'INSERT INTO engagement_cache (key, value, updated_at, expires_at) VALUES (?, ?, ?, ?)',
+                rows
+            )
+        self.stats["migrated"] = len(rows)
+        self.logger.info(f"Migrated {len(rows)} unexpired entries to the epoch expiry schema")
 
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection"""
-        return sqlite3.connect(self.cache_path)
+        """Get shared connection for this thread"""
+        return get_connection(self.cache_path)
 
     def set(self, key: str, value: Any, expiry: Optional[int] = None):
-        """Set cache value with expiration"""
+        """Set cache value with expiration in both tiers"""
+        ttl = expiry or self.cache_duration
+        try:
+            encoded = json.dumps(value)
+        except Exception as e:
+            self.logger.error(f"Failed to set cache value: {e}")
+            return
+        # Keep the decoded copy so memory hits match what disk would return
+        now = time.time()
+        self.remember(key, now + ttl, json.loads(encoded))
+        self.store(key, encoded, int(now), int(now + ttl))
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get cache value if not expired, from memory or else disk"""
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self.entries.move_to_end(key)
+                self.record("memory", "hits")
+                return value
+            del self.entries[key]
+            self.stats["memory_expired"] += 1
+        self.record("memory", "misses")
+
+        entry = self.load(key, now)
+        if entry is None:
+            self.record("disk", "misses")
+            return None
+        expires_at, value = entry
+        self.record("disk", "hits")
+        self.remember(key, expires_at, value)
+        return value
+
+    def remember(self, key: str, expires_at: float, value: Any):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["memory_evictions"] += 1
+
+    def record(self, tier: str, result: str):
+        """Count lookup result for a tier"""
+        self.stats[f"{tier}_{result}"] += 1
+        ENGAGEMENT_CACHE_REQUESTS.labels(tier, result[:-1]).inc()
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="set")
+    def store(self, key: str, encoded: str, updated_at: int, expires_at: int):
+        """Write encoded value to disk"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
-            now = datetime.now()
-            expiry_time = now + timedelta(seconds=expiry or self.cache_duration)
-            
+
             cursor.execute('''
-            INSERT OR REPLACE INTO engagement_cache (key, value, timestamp, expiry)
+            INSERT INTO engagement_cache (key, value, updated_at, expires_at)
             VALUES (?, ?, ?, ?)
-            ''', (key, json.dumps(value), now.isoformat(), expiry_time.isoformat()))
-            
+            ON CONFLICT (key) DO UPDATE SET
+                value = excluded.value,
+                updated_at = excluded.updated_at,
+                expires_at = excluded.expires_at
+            ''', (key, encoded, updated_at, expires_at))
+
             conn.commit()
         except Exception as e:
+            self.stats["disk_errors"] += 1
             self.logger.error(f"Failed to set cache value: {e}")
-        finally:
-            conn.close()
 
-    def get(self, key: str) -> Optional[Any]:
-        """Get cache value if not expired"""
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="get")
+    def load(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        """Load unexpired value and its expiry time from disk"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
+
             cursor.execute('''
-            SELECT value, expiry FROM engagement_cache 
-            WHERE key = ? AND datetime('now') < datetime(expiry)
-            ''', (key,))
-            
+            SELECT value, expires_at FROM engagement_cache
+            WHERE key = ? AND expires_at > ?
+            ''', (key, int(now)))
+
             result = cursor.fetchone()
             if result:
-                return json.loads(result[0])
+                return result[1], json.loads(result[0])
             return None
-            
+
         except Exception as e:
+            self.stats["disk_errors"] += 1
             self.logger.error(f"Failed to get cache value: {e}")
             return None
-        finally:
-            conn.close()
 
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Get unexpired values for many keys; missing keys are left out"""
+        now = time.time()
+        found = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    self.record("memory", "hits")
+                    found[key] = entry[1]
+                    continue
+                del self.entries[key]
+                self.stats["memory_expired"] += 1
+            self.record("memory", "misses")
+            missing.append(key)
+
+        if missing:
+            loaded = self.load_many(missing, now)
+            for key in missing:
+                entry = loaded.get(key)
+                if entry is None:
+                    self.record("disk", "misses")
+                    continue
+                self.record("disk", "hits")
+                self.remember(key, entry[0], entry[1])
+                found[key] = entry[1]
+        return found
+
+    def set_many(
+        self,
+        items: Dict[str, Any],
+        expiry: Optional[int] = None,
+        expiries: Optional[Dict[str, int]] = None
+    ):
+        """Set many values in one transaction; expiries overrides the TTL per key"""
+        now = time.time()
+        rows = []
+        for key, value in items.items():
+            ttl = (expiries or {}).get(key) or expiry or self.cache_duration
+            try:
+                encoded = json.dumps(value)
+            except Exception as e:
+                self.logger.error(f"Failed to set cache value for {key}: {e}")
+                continue
+            self.remember(key, now + ttl, json.loads(encoded))
+            rows.append((key, encoded, int(now), int(now + ttl)))
+        if rows:
+            self.store_many(rows)
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="set_many")
+    def store_many(self, rows: List[Tuple[str, str, int, int]]):
+        """Write encoded rows to disk in one transaction"""
+        try:
+            conn = self.get_connection()
+            with conn:
+                conn.executemany('''
+                INSERT INTO engagement_cache (key, value, updated_at, expires_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = excluded.value,
+                    updated_at = excluded.updated_at,
+                    expires_at = excluded.expires_at
+                ''', rows)
+        except Exception as e:
+            self.stats["disk_errors"] += 1
+            self.logger.error(f"Failed to set {len(rows)} cache values: {e}")
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="get_many")
+    def load_many(self, keys: List[str], now: float) -> Dict[str, Tuple[float, Any]]:
+        """Load unexpired values and expiry times from disk, BULK_CHUNK_SIZE keys per query"""
+        loaded = {}
+        try:
+            conn = self.get_connection()
+            for start in range(0, len(keys), BULK_CHUNK_SIZE):
+                chunk = keys[start:start + BULK_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                for key, value, expires_at in conn.execute(f'''
+                    SELECT key, value, expires_at FROM engagement_cache
+                    WHERE key IN ({placeholders}) AND expires_at > ?
+                    ''', (*chunk, int(now))):
+                    loaded[key] = (expires_at, json.loads(value))
+        except Exception as e:
+            self.stats["disk_errors"] += 1
+            self.logger.error(f"Failed to get {len(keys)} cache values: {e}")
+        return loaded
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="delete_many")
+    def delete_many(self, keys: Iterable[str]):
+        """Delete many cache entries in one transaction"""
+        keys = list(dict.fromkeys(keys))
+        for key in keys:
+            self.entries.pop(key, None)
+        try:
+            conn = self.get_connection()
+            with conn:
+                for start in range(0, len(keys), BULK_CHUNK_SIZE):
+                    chunk = keys[start:start + BULK_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    conn.execute(f'DELETE FROM engagement_cache WHERE key IN ({placeholders})', chunk)
+        except Exception as e:
+            self.logger.error(f"Failed to delete {len(keys)} cache entries: {e}")
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="delete")
     def delete(self, key: str):
         """Delete cache entry"""
+        self.entries.pop(key, None)
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
+
             cursor.execute('DELETE FROM engagement_cache WHERE key = ?', (key,))
             conn.commit()
-            
+
         except Exception as e:
             self.logger.error(f"Failed to delete cache entry: {e}")
-        finally:
-            conn.close()
 
-    def clear_expired(self):
-        """Clear expired cache entries"""
+    def clear_expired(self) -> int:
+        """Clear expired entries from both tiers; returns disk rows deleted"""
+        now = time.time()
+        for key in [key for key, entry in self.entries.items() if entry[0] <= now]:
+            del self.entries[key]
+            self.stats["memory_expired"] += 1
+        return self.sweep_expired()
+
+    def sweep_expired(self, max_batches: Optional[int] = None) -> int:
+        """Delete expired disk rows in batches of sweep_batch_size; returns rows deleted"""
+        deleted = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.sweep_batch(int(time.time()))
+            deleted += count
+            batches += 1
+            if count < self.sweep_batch_size:
+                break
+        self.stats["sweeps"] += 1
+        return deleted
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="clear_expired")
+    def sweep_batch(self, now: int) -> int:
+        """Delete up to sweep_batch_size expired rows in one short transaction"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
+
             cursor.execute('''
-            DELETE FROM engagement_cache 
-            WHERE datetime('now') >= datetime(expiry)
-            ''')
-            
+            DELETE FROM engagement_cache WHERE rowid IN (
+                SELECT rowid FROM engagement_cache WHERE expires_at <= ? LIMIT ?
+            )
+            ''', (now, self.sweep_batch_size))
+            count = cursor.rowcount
+
             conn.commit()
         except Exception as e:
             self.logger.error(f"Failed to clear expired cache: {e}")
-        finally:
-            conn.close()
+            return 0
+        self.stats["swept"] += count
+        ENGAGEMENT_CACHE_SWEPT.inc(count)
+        return count
 
+    def start_sweeper(self):
+        """Start background thread deleting expired rows every sweep_interval"""
+        if self._sweeper is None or not self._sweeper.is_alive():
+            self._stop_sweeper.clear()
+            self._sweeper = threading.Thread(target=self._run_sweeper, name="engagement-cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        """Stop background sweeper"""
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def _run_sweeper(self):
+        while not self._stop_sweeper.wait(self.sweep_interval):
+            # Bounded per wakeup so a large backlog never monopolises the write lock
+            self.sweep_expired(max_batches=100)
+
+    @timed(SQLITE_OPERATION_SECONDS, store="engagement_cache", operation="get_metrics")
     def get_metrics(self) -> Dict[str, Any]:
-        """Get cache metrics"""
+        """Get entry counts and per-tier hit rates"""
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = self.stats["memory_hits"] + self.stats["memory_misses"]
+        disk_lookups = self.stats["disk_hits"] + self.stats["disk_misses"]
+        metrics = {
+            "hits": hits,
+            "misses": self.stats["disk_misses"],
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "memory": {
+                "hits": self.stats["memory_hits"],
+                "misses": self.stats["memory_misses"],
+                "hit_rate": self.stats["memory_hits"] / lookups if lookups else 0.0,
+                "evictions": self.stats["memory_evictions"],
+                "expired": self.stats["memory_expired"],
+                "entries": len(self.entries),
+                "capacity": self.max_entries
+            },
+            "disk": {
+                "hits": self.stats["disk_hits"],
+                "misses": self.stats["disk_misses"],
+                "hit_rate": self.stats["disk_hits"] / disk_lookups if disk_lookups else 0.0,
+                "errors": self.stats["disk_errors"],
+                "sweeps": self.stats["sweeps"],
+                "swept": self.stats["swept"]
+            }
+        }
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
-            
-            # Get total entries
-            cursor.execute('SELECT COUNT(*) FROM engagement_cache')
-            total = cursor.fetchone()[0]
-            
-            # Get expired entries
-            cursor.execute('''
-            SELECT COUNT(*) FROM engagement_cache 
-            WHERE datetime('now') >= datetime(expiry)
-            ''')
-            expired = cursor.fetchone()[0]
-            
-            return {
-                "total_entries": total,
-                "expired_entries": expired,
-                "active_entries": total - expired
-            }
-            
+
+            # Trigger-maintained, so this includes expired rows the sweeper has not reached yet
+            cursor.execute("SELECT value FROM engagement_cache_counters WHERE name = 'entries'")
+            metrics["total_entries"] = cursor.fetchone()[0]
+
         except Exception as e:
             self.logger.error(f"Failed to get cache metrics: {e}")
-            return {}
-        finally:
-            conn.close()
+        return metrics
@@ -0,0 +1,180 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple, Union
+from utils.metrics import REGISTRY, LatencyHistogram
+
+SQLITE_STATEMENT_SECONDS = REGISTRY.histogram(
+    "sqlite_statement_duration_seconds",
+    "SQLite statement execution latency",
+    ("database",)
+)
+SQLITE_OPEN_CONNECTIONS = REGISTRY.gauge(
+    "sqlite_open_connections",
+    "Long-lived SQLite connections held by the connection manager",
+    ("database",)
+)
+
+# Applied to every connection. WAL lets readers proceed while another
+# connection writes; NORMAL synchronous only fsyncs at checkpoints, which
+# in WAL mode still survives application crashes.
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "cache_size": -int(os.environ.get("SQLITE_CACHE_SIZE_KB", 16384)),  # Negative is KiB
+    "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)),
+    "temp_store": "MEMORY",
+    "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000))
+}
+
+class TrackedCursor(sqlite3.Cursor):
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self.connection.record_statement(time.perf_counter() - started)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self.connection.record_statement(time.perf_counter() - started)
+
+class TrackedConnection(sqlite3.Connection):
+    """Connection timing every statement into its database's stats"""
+
+    stats: "DatabaseStats"
+
+    def cursor(self, factory: type = TrackedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def record_statement(self, seconds: float):
+        self.stats.statements.observe(seconds)
+        self.stats.prometheus.observe(seconds)
+
+class DatabaseStats:
+    def __init__(self, name: str):
+        self.statements = LatencyHistogram()
+        self.prometheus = SQLITE_STATEMENT_SECONDS.labels(name)
+        self.open_gauge = SQLITE_OPEN_CONNECTIONS.labels(name)
+        self.opened = 0
+        self.closed = 0
+        self.rollbacks = 0
+
+class ConnectionManager:
+    """Long-lived tuned connections, one per database per thread.
+
+    Coroutines on the same event loop share their thread's connection,
+    which is safe as long as each operation runs without awaiting between
+    its statements. Callers must not close the connection; a transaction
+    left open by a failed caller is rolled back on the next checkout.
+    """
+
+    def __init__(self, pragmas: Optional[Dict[str, Any]] = None):
+        self.logger = logging.getLogger("sqlite_connections")
+        self.pragmas = pragmas if pragmas is not None else DEFAULT_PRAGMAS
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # (path, pid, thread id) -> connection, for closing and stats
+        self.connections: Dict[Tuple[str, int, int], TrackedConnection] = {}
+        self.databases: Dict[str, DatabaseStats] = {}
+
+    def get_connection(self, path: Union[str, Path]) -> sqlite3.Connection:
+        """Get this thread's connection to path, opening it on first use"""
+        path = os.path.abspath(path)
+        cache = getattr(self._local, "connections", None)
+        if cache is None or self._local.pid != os.getpid():
+            # New thread, or a forked child that must not reuse the parent's handles
+            cache = self._local.connections = {}
+            self._local.pid = os.getpid()
+        conn = cache.get(path)
+        if conn is None:
+            conn = cache[path] = self.open(path)
+        elif conn.in_transaction:
+            # Left open by a caller that failed before committing
+            self.logger.warning(f"Rolling back unfinished transaction on {path}")
+            conn.rollback()
+            conn.stats.rollbacks += 1
+        return conn
+
+    def open(self, path: str) -> TrackedConnection:
+        """Open and tune a connection"""
+        conn = sqlite3.connect(path, factory=TrackedConnection, check_same_thread=False)
+        with self._lock:
+            stats = self.databases.get(path)
+            if stats is None:
+                stats = self.databases[path] = DatabaseStats(os.path.basename(path))
+        conn.stats = stats
+        for name, value in self.pragmas.items():
+            try:
+                conn.execute(f"PRAGMA {name} = {value}")
+            except sqlite3.Error as e:
+                self.logger.warning(f"Could not set PRAGMA {name} on {path}: {e}")
+
+        key = (path, os.getpid(), threading.get_ident())
+        with self._lock:
+            self.prune()
+            if key in self.connections:
+                self._close(key)  # Left by an exited thread whose ident was reused
+            self.connections[key] = conn
+            stats.opened += 1
+            stats.open_gauge.inc()
+        return conn
+
+    def prune(self):
+        """Close connections of threads that have exited; caller holds the lock"""
+        live = {thread.ident for thread in threading.enumerate()}
+        for key in [key for key in self.connections if key[2] not in live or key[1] != os.getpid()]:
+            self._close(key)
+
+    def _close(self, key: Tuple[str, int, int]):
+        conn = self.connections.pop(key)
+        if key[1] == os.getpid():
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.warning(f"Error closing connection to {key[0]}: {e}")
+        conn.stats.closed += 1
+        conn.stats.open_gauge.dec()
+
+    def close_all(self):
+        """Close every connection, e.g. at shutdown; threads reopen on next use"""
+        with self._lock:
+            for key in list(self.connections):
+                self._close(key)
+        self._local = threading.local()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get open connections and statement latency per database"""
+        with self._lock:
+            open_counts: Dict[str, int] = {}
+            for path, _, _ in self.connections:
+                open_counts[path] = open_counts.get(path, 0) + 1
+            return {
+                path: {
+                    "open_connections": open_counts.get(path, 0),
+                    "opened": stats.opened,
+                    "closed": stats.closed,
+                    "rollbacks": stats.rollbacks,
+                    "statements": stats.statements.get_metrics()
+                }
+                for path, stats in self.databases.items()
+            }
+
+# Shared by all stores in the process
+CONNECTIONS = ConnectionManager()
+
+def get_connection(path: Union[str, Path]) -> sqlite3.Connection:
+    """Get long-lived tuned connection to the database at path"""
+    return CONNECTIONS.get_connection(path)
@@ -1,10 +1,20 @@
+from collections import deque
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Deque, List, Optional, Tuple
+import asyncio
+import atexit
 import json
-import sqlite3
+import logging
+import numbers
 import os
+import sqlite3
+import threading
+import time
+from data.connection import get_connection
+from utils.metrics import SQLITE_OPERATION_SECONDS, timed
 
+@timed(SQLITE_OPERATION_SECONDS, store="models", operation="init_db")
 def init_db():
     """Initialize database tables"""
     conn = get_db_connection()
@@ -27,12 +37,14 @@ def init_db():
     )''')
 
     conn.commit()
-    conn.close()
 
 def get_db_connection():
-    """Get database connection"""
-    db_path = os.path.join(os.path.dirname(__file__), 'engagement.db')
-    return sqlite3.connect(db_path)
+    """Get shared connection for this thread"""
+    db_path = os.environ.get(
+        "ENGAGEMENT_DB_PATH",
+        os.path.join(os.path.dirname(__file__), 'engagement.db')
+    )
+    return get_connection(db_path)
 
 @dataclass
 class UserProfile:
@@ -42,8 +54,15 @@ class UserProfile:
     updated_at: datetime = datetime.now()
 
     @classmethod
+    @timed(SQLITE_OPERATION_SECONDS, store="models", operation="load_profiles")
     async def load_all(cls) -> Dict[str, 'UserProfile']:
         """Load all user profiles from database"""
+        # Read in a worker thread so agents starting together do not take turns on SQLite
+        return await asyncio.to_thread(cls.read_all)
+
+    @classmethod
+    def read_all(cls) -> Dict[str, 'UserProfile']:
+        """Read all user profiles, blocking the calling thread"""
         conn = get_db_connection()
         cur = conn.cursor()
         
@@ -56,9 +75,9 @@ class UserProfile:
                 updated_at=datetime.fromisoformat(row[3])
             )
         
-        conn.close()
         return profiles
 
+    @timed(SQLITE_OPERATION_SECONDS, store="models", operation="save_profile")
     async def save(self):
         """Save profile to database"""
         conn = get_db_connection()
@@ -76,13 +95,145 @@ class UserProfile:
         ))
         
         conn.commit()
-        conn.close()
 
     def update_motivators(self, new_motivators: Dict[str, float]):
         """Update motivation factors"""
         self.motivators.update(new_motivators)
         self.updated_at = datetime.now()
 
+class MetricWriter:
+    """Write-behind buffer for engagement metric rows.
+
+    Rows are flushed with one executemany transaction when flush_size rows
+    are pending or flush_interval seconds have passed, by a background
+    thread so agents never wait on SQLite. Synchronous mode writes every
+    row before update returns. A row SQLite rejects is dropped on its own;
+    rows are only kept for retry while the database is unavailable.
+    """
+
+    def __init__(
+        self,
+        flush_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        synchronous: Optional[bool] = None,
+        max_pending: Optional[int] = None
+    ):
+        self.logger = logging.getLogger("metric_writer")
+        self.flush_size = flush_size or int(os.environ.get("METRICS_FLUSH_SIZE", 1000))
+        self.flush_interval = flush_interval or float(os.environ.get("METRICS_FLUSH_INTERVAL", 1.0))
+        if synchronous is None:
+            synchronous = os.environ.get("METRICS_SYNCHRONOUS", "0").lower() in ("1", "true", "yes")
+        self.synchronous = synchronous
+        # Rows kept while the database is unavailable; older rows are dropped beyond this
+        self.max_pending = max_pending or self.flush_size * 100
+        self.buffer: Deque[Tuple[str, float, float]] = deque(maxlen=self.max_pending)
+        self._lock = threading.Lock()  # Guards buffer
+        self._flush_lock = threading.Lock()  # Keeps batches in order
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {"rows": 0, "flushed": 0, "flushes": 0, "failures": 0, "rejected": 0, "dropped": 0}
+
+    def add(self, metric_name: str, value: float):
+        """Queue metric row for writing; raises TypeError for non-numeric values"""
+        if not isinstance(value, numbers.Real):
+            raise TypeError(f"Metric {metric_name} value must be a number, got {type(value).__name__}")
+        row = (metric_name, float(value), time.time())  # Formatted when flushed
+        with self._lock:
+            if len(self.buffer) == self.max_pending:
+                self.stats["dropped"] += 1  # Appending discards the oldest row
+            self.buffer.append(row)
+            self.stats["rows"] += 1
+            pending = len(self.buffer)
+
+        if self.synchronous:
+            self.flush()
+        elif pending >= self.flush_size:
+            # Never flush on the caller's thread, even when the flusher falls behind
+            self._ensure_thread()
+            self._wakeup.set()
+        elif self._thread is None:
+            self._ensure_thread()
+
+    def _ensure_thread(self):
+        """Start background flusher on first use"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="metric-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Flush on size signal or every flush_interval"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    @timed(SQLITE_OPERATION_SECONDS, store="models", operation="flush_metrics")
+    def flush(self) -> int:
+        """Write pending rows in one transaction; returns rows written"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self.buffer = list(self.buffer), deque(maxlen=self.max_pending)
+            if not rows:
+                return 0
+            try:
+                conn = get_db_connection()
+                with conn:
+                    try:
+                        conn.executemany(METRIC_INSERT, [self.format_row(row) for row in rows])
+                        written = len(rows)
+                    except (sqlite3.InterfaceError, sqlite3.ProgrammingError, ValueError, TypeError) as e:
+                        # A row SQLite cannot bind; keep the rest of the batch
+                        self.logger.error(f"Failed to write {len(rows)} metric rows, retrying one by one: {e}")
+                        conn.rollback()  # Undo the rows inserted before the failure
+                        written = self.write_each(conn, rows)
+            except Exception as e:
+                self.stats["failures"] += 1
+                self.logger.error(f"Failed to write {len(rows)} metric rows: {e}")
+                with self._lock:
+                    # Database unavailable: retry with the next flush, keeping the newest rows
+                    pending = len(rows) + len(self.buffer)
+                    self.buffer = deque(rows + list(self.buffer), maxlen=self.max_pending)
+                    self.stats["dropped"] += max(0, pending - self.max_pending)
+                return 0
+            self.stats["flushed"] += written
+            self.stats["flushes"] += 1
+            return written
+
+    def write_each(self, conn: sqlite3.Connection, rows: List[Tuple[str, float, float]]) -> int:
+        """Insert rows individually in the open transaction, dropping any SQLite rejects"""
+        written = 0
+        for row in rows:
+            try:
+                conn.execute(METRIC_INSERT, self.format_row(row))
+                written += 1
+            except (sqlite3.InterfaceError, sqlite3.ProgrammingError, ValueError, TypeError) as e:
+                self.stats["rejected"] += 1
+                self.logger.error(f"Dropping metric row {row[0]}: {e}")
+        return written
+
+    @staticmethod
+    def format_row(row: Tuple[str, float, float]) -> Tuple[str, float, str]:
+        """Convert buffered row to insert parameters"""
+        name, value, ts = row
+        return name, value, datetime.fromtimestamp(ts).isoformat()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get writer metrics"""
+        return {**self.stats, "pending": len(self.buffer), "synchronous": self.synchronous}
+
+METRIC_INSERT = '''
+INSERT INTO engagement_metrics (metric_name, value, timestamp)
+VALUES (?, ?, ?)
+'''
+
+# Shared by all EngagementMetrics in the process
+METRIC_WRITER = MetricWriter()
+atexit.register(METRIC_WRITER.flush)
+
+def flush_metrics() -> int:
+    """Write all buffered metric rows, for shutdown and tests"""
+    return METRIC_WRITER.flush()
+
 @dataclass
 class EngagementMetrics:
     metrics: Dict[str, List[float]] = None
@@ -91,22 +242,11 @@ class EngagementMetrics:
         self.metrics = {}
     
     def update(self, metric_name: str, value: float):
-        """Update metric value"""
+        """Update metric value, persisted by the shared write-behind buffer"""
+        METRIC_WRITER.add(metric_name, value)  # Validates before anything is recorded
         if metric_name not in self.metrics:
             self.metrics[metric_name] = []
-        self.metrics[metric_name].append(value)
-        
-        # Store in database
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute('''
-        INSERT INTO engagement_metrics (metric_name, value, timestamp)
-        VALUES (?, ?, ?)
-        ''', (metric_name, value, datetime.now().isoformat()))
-        
-        conn.commit()
-        conn.close()
+        self.metrics[metric_name].append(float(value))
 
     def get_metric_average(self, metric_name: str) -> float:
         """Get average value for a metric"""
@@ -1,9 +1,12 @@
 from typing import Dict, Any, Optional
+import asyncio
 import logging
 import json
 from pathlib import Path
 import sqlite3
 from datetime import datetime
+from data.connection import get_connection
+from utils.metrics import SQLITE_OPERATION_SECONDS, timed
 
 class StateManager:
     def __init__(self):
@@ -39,13 +42,12 @@ class StateManager:
             conn.commit()
         except Exception as e:
             self.logger.error(f"Failed to initialize state database: {e}")
-        finally:
-            conn.close()
 
     def get_connection(self) -> sqlite3.Connection:
-        """Get database connection"""
-        return sqlite3.connect(self.db_path)
+        """Get shared connection for this thread"""
+        return get_connection(self.db_path)
 
+    @timed(SQLITE_OPERATION_SECONDS, store="state_manager", operation="save_state")
     async def save_state(self, agent_id: str, state: Dict[str, Any]):
         """Save agent state"""
         try:
@@ -79,31 +81,33 @@ class StateManager:
         except Exception as e:
             self.logger.error(f"Failed to save state: {e}")
             raise
-        finally:
-            conn.close()
 
+    @timed(SQLITE_OPERATION_SECONDS, store="state_manager", operation="load_state")
     async def load_state(self, agent_id: str) -> Optional[Dict[str, Any]]:
         """Load agent state"""
         try:
-            conn = self.get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-            SELECT state FROM agent_states 
-            WHERE agent_id = ?
-            ''', (agent_id,))
-            
-            result = cursor.fetchone()
-            if result:
-                return json.loads(result[0])
-            return None
-            
+            # Startup loads run in a worker thread, off the event loop
+            return await asyncio.to_thread(self.read_state, agent_id)
         except Exception as e:
             self.logger.error(f"Failed to load state: {e}")
             return None
-        finally:
-            conn.close()
 
+    def read_state(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        """Read agent state, blocking the calling thread"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT state FROM agent_states 
+        WHERE agent_id = ?
+        ''', (agent_id,))
+        
+        result = cursor.fetchone()
+        if result:
+            return json.loads(result[0])
+        return None
+
+    @timed(SQLITE_OPERATION_SECONDS, store="state_manager", operation="get_state_history")
     async def get_state_history(self, agent_id: str, limit: int = 10) -> list:
         """Get state history for agent"""
         try:
@@ -131,9 +135,8 @@ class StateManager:
         except Exception as e:
             self.logger.error(f"Failed to get state history: {e}")
             return []
-        finally:
-            conn.close()
 
+    @timed(SQLITE_OPERATION_SECONDS, store="state_manager", operation="compare_states")
     async def compare_states(self, agent_id: str, version1: int, version2: int) -> Dict[str, Any]:
         """Compare two state versions"""
         try:
@@ -177,9 +180,8 @@ class StateManager:
         except Exception as e:
             self.logger.error(f"Failed to compare states: {e}")
             return {}
-        finally:
-            conn.close()
 
+    @timed(SQLITE_OPERATION_SECONDS, store="state_manager", operation="clear_history")
     async def clear_history(self, agent_id: str, before_date: Optional[datetime] = None):
         """Clear state history"""
         try:
@@ -201,6 +203,4 @@ class StateManager:
             
         except Exception as e:
             self.logger.error(f"Failed to clear history: {e}")
-        finally:
-            conn.close()
 
@@ -0,0 +1,191 @@
+import json
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Iterable, List, Optional, Tuple
+from utils.metrics import REGISTRY, LatencyHistogram
+
+LLM_AGENT_TOKENS = REGISTRY.counter(
+    "llm_agent_tokens_total",
+    "LLM tokens used per calling agent",
+    ("agent", "provider", "model", "type")
+)
+LLM_AGENT_COST = REGISTRY.counter(
+    "llm_agent_cost_usd_total",
+    "Estimated LLM spend per calling agent",
+    ("agent", "provider", "model")
+)
+
+# USD per million (prompt, completion) tokens at list price; override with
+# LLM_PRICES='{"model": [prompt, completion]}'
+DEFAULT_MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "claude-3": (15.00, 75.00),
+    "gemini-pro": (0.50, 1.50),
+    "mixtral-8x7b": (0.24, 0.24),
+    "deepseek-chat": (0.27, 1.10)
+}
+
+UNATTRIBUTED = "unattributed"
+
+COUNTERS = ("requests", "errors", "prompt_tokens", "completion_tokens", "cost", "latency_sum")
+
+def load_prices() -> Dict[str, Tuple[float, float]]:
+    """Get model prices, applying overrides from LLM_PRICES"""
+    prices = dict(DEFAULT_MODEL_PRICES)
+    overrides = os.environ.get("LLM_PRICES")
+    if overrides:
+        prices.update({model: tuple(price) for model, price in json.loads(overrides).items()})
+    return prices
+
+def merge_histograms(histograms: Iterable[LatencyHistogram]) -> LatencyHistogram:
+    """Combine histograms sharing the default buckets"""
+    merged = LatencyHistogram()
+    for histogram in histograms:
+        if histogram.count == 0:
+            continue
+        merged.min = histogram.min if merged.count == 0 else min(merged.min, histogram.min)
+        merged.max = max(merged.max, histogram.max)
+        merged.count += histogram.count
+        merged.sum += histogram.sum
+        merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+    return merged
+
+class UsageWindow:
+    def __init__(self, window: float = 300.0, slots: int = 30):
+        self.window = window
+        self.slot_width = window / slots
+        # (slot start, counters, latencies), oldest first
+        self.slots: Deque[Tuple[float, Dict[str, float], LatencyHistogram]] = deque()
+        self.totals = dict.fromkeys(COUNTERS, 0.0)
+
+    def current_slot(self, now: float) -> Tuple[Dict[str, float], LatencyHistogram]:
+        """Get slot covering now, starting a new one when needed"""
+        start = now - now % self.slot_width
+        if not self.slots or self.slots[-1][0] != start:
+            self.slots.append((start, dict.fromkeys(COUNTERS, 0.0), LatencyHistogram()))
+        self.expire(now)
+        return self.slots[-1][1], self.slots[-1][2]
+
+    def expire(self, now: float):
+        """Drop slots older than the window"""
+        while self.slots and self.slots[0][0] <= now - self.window:
+            self.slots.popleft()
+
+    def record(self, latency: float, prompt_tokens: int, completion_tokens: int, cost: float, error: bool):
+        """Record one provider call"""
+        counters, latencies = self.current_slot(time.time())
+        for values in (counters, self.totals):
+            values["requests"] += 1
+            values["errors"] += error
+            values["prompt_tokens"] += prompt_tokens
+            values["completion_tokens"] += completion_tokens
+            values["cost"] += cost
+            values["latency_sum"] += latency
+        latencies.observe(latency)
+
+    def get_window(self) -> Tuple[Dict[str, float], LatencyHistogram]:
+        """Get counters and latencies summed over the window"""
+        self.expire(time.time())
+        counters = dict.fromkeys(COUNTERS, 0.0)
+        for _, slot_counters, _ in self.slots:
+            for name, value in slot_counters.items():
+                counters[name] += value
+        return counters, merge_histograms(latencies for _, _, latencies in self.slots)
+
+def summarize(counters: Dict[str, float], latencies: LatencyHistogram) -> Dict[str, Any]:
+    """Format window counters with derived rates and latency quantiles"""
+    requests = counters["requests"]
+    return {
+        "requests": int(requests),
+        "errors": int(counters["errors"]),
+        "error_rate": counters["errors"] / requests if requests else 0.0,
+        "prompt_tokens": int(counters["prompt_tokens"]),
+        "completion_tokens": int(counters["completion_tokens"]),
+        "cost": round(counters["cost"], 6),
+        "latency_total": counters["latency_sum"],
+        "latency_mean": counters["latency_sum"] / requests if requests else 0.0,
+        "latency_p50": latencies.quantile(0.5),
+        "latency_p95": latencies.quantile(0.95)
+    }
+
+class LLMAccounting:
+    def __init__(
+        self,
+        window: Optional[float] = None,
+        slots: int = 30,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        # Seconds of history in the rolling figures
+        self.window = window or float(os.environ.get("LLM_ACCOUNTING_WINDOW", 300))
+        self.slots = slots
+        self.prices = prices if prices is not None else load_prices()
+        self.usage: Dict[Tuple[str, str, str], UsageWindow] = {}  # (agent, provider, model)
+
+    def get_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimate request cost in USD, 0 for unpriced models"""
+        prompt_price, completion_price = self.prices.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record(
+        self,
+        agent: Optional[str],
+        provider: str,
+        model: str,
+        latency: float,
+        prompt_tokens: Optional[int] = None,
+        completion_tokens: Optional[int] = None,
+        error: bool = False
+    ):
+        """Record provider call made on behalf of agent"""
+        agent = agent or UNATTRIBUTED
+        prompt_tokens = prompt_tokens or 0
+        completion_tokens = completion_tokens or 0
+        cost = self.get_cost(model, prompt_tokens, completion_tokens)
+
+        key = (agent, provider, model)
+        usage = self.usage.get(key)
+        if usage is None:
+            usage = self.usage[key] = UsageWindow(self.window, self.slots)
+        usage.record(latency, prompt_tokens, completion_tokens, cost, error)
+
+        LLM_AGENT_TOKENS.labels(agent, provider, model, "prompt").inc(prompt_tokens)
+        LLM_AGENT_TOKENS.labels(agent, provider, model, "completion").inc(completion_tokens)
+        LLM_AGENT_COST.labels(agent, provider, model).inc(cost)
+
+    def group(self, windows: Dict[Tuple[str, str, str], Tuple[Dict[str, float], LatencyHistogram]], field: int) -> Dict[str, Any]:
+        """Summarize windows grouped by one key field"""
+        groups: Dict[str, List[Tuple[Dict[str, float], LatencyHistogram]]] = {}
+        for key, window in windows.items():
+            groups.setdefault(key[field], []).append(window)
+        summaries = {}
+        for name, members in groups.items():
+            counters = dict.fromkeys(COUNTERS, 0.0)
+            for member_counters, _ in members:
+                for counter, value in member_counters.items():
+                    counters[counter] += value
+            summaries[name] = summarize(counters, merge_histograms(latencies for _, latencies in members))
+        return summaries
+
+    def get_metrics(self, top: int = 10) -> Dict[str, Any]:
+        """Get rolling usage by agent and provider, and the costliest agent/provider/model paths"""
+        windows = {key: usage.get_window() for key, usage in self.usage.items()}
+        windows = {key: window for key, window in windows.items() if window[0]["requests"]}
+        paths = [
+            {"agent": agent, "provider": provider, "model": model, **summarize(*window)}
+            for (agent, provider, model), window in windows.items()
+        ]
+        paths.sort(key=lambda path: (path["cost"], path["latency_total"]), reverse=True)
+        return {
+            "window": self.window,
+            "by_agent": self.group(windows, 0),
+            "by_provider": self.group(windows, 1),
+            "hottest": paths[:top],
+            "totals": {
+                f"{agent}/{provider}/{model}": {
+                    name: int(value) if name not in ("cost", "latency_sum") else value
+                    for name, value in usage.totals.items()
+                }
+                for (agent, provider, model), usage in self.usage.items()
+            }
+        }
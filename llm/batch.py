@@ -0,0 +1,40 @@
+import json
+from typing import Dict, Any, Mapping
+from utils.metrics import REGISTRY
+
+LLM_BATCH_ITEMS = REGISTRY.counter(
+    "llm_batch_items_total",
+    "Items processed by batched LLM generation",
+    ("outcome",)
+)
+
+# Output allowance per item for ids, quoting and JSON punctuation
+BATCH_TOKEN_OVERHEAD = 20
+
+def build_item_prompt(instructions: str, item: Any) -> str:
+    """Build prompt for a single item, answered as plain text"""
+    return f"{instructions}\n\nInput:\n{json.dumps(item, default=str)}"
+
+def build_batch_prompt(instructions: str, items: Mapping[str, Any]) -> str:
+    """Build prompt asking for one result per item id in a JSON object"""
+    return (
+        f"{instructions}\n\n"
+        "Write a separate response for each input below. Reply with only a JSON object "
+        'of the form {"results": {"<id>": "<response>"}} containing every id.\n\n'
+        f"Inputs:\n{json.dumps(items, default=str)}"
+    )
+
+def parse_batch_response(response: str) -> Dict[str, str]:
+    """Extract id -> text results, tolerating code fences and surrounding prose"""
+    start = response.find("{")
+    end = response.rfind("}")
+    if start == -1 or end < start:
+        return {}
+    try:
+        body = json.loads(response[start:end + 1])
+    except ValueError:
+        return {}
+    results = body.get("results", body) if isinstance(body, dict) else None
+    if not isinstance(results, dict):
+        return {}
+    return {str(key): value for key, value in results.items() if isinstance(value, str)}
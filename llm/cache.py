@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Awaitable, Callable, Optional, Tuple
+from data.connection import get_connection
+from utils.metrics import REGISTRY, SQLITE_OPERATION_SECONDS, timed
+
+LLM_CACHE_REQUESTS = REGISTRY.counter(
+    "llm_cache_requests_total",
+    "LLM response cache lookups",
+    ("result",)
+)
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 3600,
+        persist_path: Optional[str] = None
+    ):
+        self.logger = logging.getLogger("llm_cache")
+        self.max_entries = max_entries
+        self.ttl = ttl  # Seconds, None keeps entries until evicted
+        # key -> (expires_at, response, generation latency), least recently used first
+        self.entries: "OrderedDict[str, Tuple[float, str, float]]" = OrderedDict()
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self.waiters: Dict[asyncio.Task, int] = {}  # Callers awaiting each shared generation
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.stats = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "deduplicated": 0,
+            "evictions": 0,
+            "expired": 0,
+            "latency_saved": 0.0
+        }
+        if self.persist_path is not None:
+            self.initialize_store()
+
+    @staticmethod
+    def make_key(
+        provider: str,
+        model: Optional[str],
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """Build cache key from everything that affects the response"""
+        payload = json.dumps(
+            [provider, model, prompt, temperature, max_tokens, response_format],
+            sort_keys=True,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get_or_generate(self, key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        """Return cached response, sharing one generation between identical concurrent requests.
+
+        The generation runs in its own task that every caller awaits through
+        shield, so a caller that is cancelled leaves the others waiting. The
+        task is cancelled only once no caller is waiting for it.
+        """
+        response = self.get(key)
+        if response is not None:
+            return response
+
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.stats["deduplicated"] += 1
+            LLM_CACHE_REQUESTS.labels("deduplicated").inc()
+        else:
+            self.stats["misses"] += 1
+            LLM_CACHE_REQUESTS.labels("miss").inc()
+            task = asyncio.get_running_loop().create_task(self.generate_and_store(key, generate))
+            self.in_flight[key] = task
+            task.add_done_callback(
+                lambda done: self.in_flight.pop(key) if self.in_flight.get(key) is done else None
+            )
+
+        self.waiters[task] = self.waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.waiters[task] -= 1
+            if not self.waiters[task]:
+                del self.waiters[task]
+                if not task.done():
+                    task.cancel()  # Every caller gave up
+
+    async def generate_and_store(self, key: str, generate: Callable[[], Awaitable[str]]) -> str:
+        """Run shared generation and cache its response"""
+        started = time.perf_counter()
+        response = await generate()
+        self.set(key, response, time.perf_counter() - started)
+        return response
+
+    def get(self, key: str) -> Optional[str]:
+        """Get response from memory, falling back to the disk tier"""
+        now = time.time()
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, response, latency = entry
+            if expires_at > now:
+                self.entries.move_to_end(key)
+                self.record_hit("memory_hits", latency)
+                return response
+            del self.entries[key]
+            self.stats["expired"] += 1
+
+        if self.persist_path is not None:
+            entry = self.load(key, now)
+            if entry is not None:
+                expires_at, response, latency = entry
+                self.remember(key, expires_at, response, latency)
+                self.record_hit("disk_hits", latency)
+                return response
+        return None
+
+    def set(self, key: str, response: str, latency: float = 0.0):
+        """Cache response with the time it took to generate"""
+        expires_at = time.time() + self.ttl if self.ttl is not None else float("inf")
+        self.remember(key, expires_at, response, latency)
+        if self.persist_path is not None:
+            self.store(key, expires_at, response, latency)
+
+    def remember(self, key: str, expires_at: float, response: str, latency: float):
+        """Insert into the memory tier, evicting least recently used entries"""
+        self.entries[key] = (expires_at, response, latency)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def record_hit(self, tier: str, latency: float):
+        """Count hit and the generation time it saved"""
+        self.stats["hits"] += 1
+        self.stats[tier] += 1
+        self.stats["latency_saved"] += latency
+        LLM_CACHE_REQUESTS.labels(tier[:-1]).inc()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """Get shared connection for this thread"""
+        return get_connection(self.persist_path)
+
+    def initialize_store(self):
+        """Initialize disk tier"""
+        try:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = self.get_connection()
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response TEXT,
+                latency REAL,
+                expires_at REAL
+            )
+            ''')
+            conn.commit()
+        except Exception as e:
+            self.logger.error(f"Failed to initialize LLM cache store, using memory only: {e}")
+            self.persist_path = None
+
+    @timed(SQLITE_OPERATION_SECONDS, store="llm_cache", operation="get")
+    def load(self, key: str, now: float) -> Optional[Tuple[float, str, float]]:
+        """Load unexpired entry from disk"""
+        try:
+            conn = self.get_connection()
+            row = conn.execute(
+                'SELECT expires_at, response, latency FROM llm_cache WHERE key = ? AND expires_at > ?',
+                (key, now)
+            ).fetchone()
+            return tuple(row) if row else None
+        except Exception as e:
+            self.logger.error(f"Failed to read LLM cache entry: {e}")
+            return None
+
+    @timed(SQLITE_OPERATION_SECONDS, store="llm_cache", operation="set")
+    def store(self, key: str, expires_at: float, response: str, latency: float):
+        """Persist entry to disk"""
+        try:
+            conn = self.get_connection()
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO llm_cache (key, response, latency, expires_at) VALUES (?, ?, ?, ?)',
+                    (key, response, latency, expires_at)
+                )
+        except Exception as e:
+            self.logger.error(f"Failed to write LLM cache entry: {e}")
+
+    @timed(SQLITE_OPERATION_SECONDS, store="llm_cache", operation="clear_expired")
+    def clear_expired(self):
+        """Drop expired entries from both tiers"""
+        now = time.time()
+        for key in [key for key, entry in self.entries.items() if entry[0] <= now]:
+            del self.entries[key]
+            self.stats["expired"] += 1
+        if self.persist_path is None:
+            return
+        try:
+            conn = self.get_connection()
+            with conn:
+                conn.execute('DELETE FROM llm_cache WHERE expires_at <= ?', (now,))
+        except Exception as e:
+            self.logger.error(f"Failed to clear expired LLM cache entries: {e}")
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get cache metrics"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+            "capacity": self.max_entries,
+            "in_flight": len(self.in_flight),
+            "persistent": self.persist_path is not None
+        }
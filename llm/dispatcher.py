@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Any, List, Optional, Set, Tuple
+from llm.providers import LLMProvider, LLMProviderManager
+from utils.metrics import REGISTRY, LatencyHistogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+LLM_DISPATCH_BATCH_SIZE = REGISTRY.histogram(
+    "llm_dispatch_batch_size",
+    "LLM requests collected per dispatcher batch",
+    buckets=BATCH_SIZE_BUCKETS
+)
+LLM_DISPATCH_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_dispatch_queue_wait_seconds",
+    "Time LLM requests wait in the dispatcher before being sent"
+)
+
+class LLMDispatcher:
+    def __init__(
+        self,
+        manager: LLMProviderManager,
+        window: Optional[float] = None,
+        max_batch_size: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.logger = logging.getLogger("llm_dispatcher")
+        self.manager = manager
+        # Seconds to keep collecting after the first request of a batch arrives
+        self.window = window if window is not None else float(os.environ.get("LLM_DISPATCH_WINDOW", 0.005))
+        self.max_batch_size = max_batch_size or int(os.environ.get("LLM_DISPATCH_MAX_BATCH", 64))
+        # Requests in flight across all agents and providers
+        self.max_concurrency = max_concurrency or int(os.environ.get("LLM_DISPATCH_MAX_CONCURRENCY", 128))
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.queue: "asyncio.Queue[Tuple[float, asyncio.Future, Dict[str, Any]]]" = asyncio.Queue()
+        self.task: Optional[asyncio.Task] = None
+        self.in_flight: Set[asyncio.Task] = set()
+        self.batch_sizes = LatencyHistogram(BATCH_SIZE_BUCKETS)
+        self.queue_waits = LatencyHistogram()
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "batches": 0
+        }
+
+    async def start(self):
+        """Start collecting and dispatching requests"""
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run(), name="llm_dispatcher")
+
+    async def stop(self):
+        """Stop dispatching, cancelling queued requests and waiting for in-flight ones"""
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+        while not self.queue.empty():
+            self.cancel_requests([self.queue.get_nowait()])
+        await asyncio.gather(*self.in_flight, return_exceptions=True)
+
+    def submit(
+        self,
+        prompt: str,
+        provider: Optional[LLMProvider] = None,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+        agent: Optional[str] = None
+    ) -> asyncio.Future:
+        """Queue generation request; the future resolves to the response text"""
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.run(), name="llm_dispatcher")
+
+        future = loop.create_future()
+        self.queue.put_nowait((
+            time.monotonic(),
+            future,
+            {
+                "prompt": prompt,
+                "provider": provider,
+                "max_tokens": max_tokens,
+                "temperature": temperature,
+                "response_format": response_format,
+                "use_cache": use_cache,
+                "agent": agent
+            }
+        ))
+        self.stats["submitted"] += 1
+        return future
+
+    async def generate(self, prompt: str, **options) -> str:
+        """Generate response through the dispatcher"""
+        return await self.submit(prompt, **options)
+
+    async def run(self):
+        """Collect requests into batches and fan them out under the concurrency limit"""
+        while True:
+            batch = await self.collect_batch()
+            self.stats["batches"] += 1
+            self.batch_sizes.observe(len(batch))
+            LLM_DISPATCH_BATCH_SIZE.observe(len(batch))
+
+            for index, (submitted_at, future, request) in enumerate(batch):
+                if future.cancelled():
+                    self.stats["cancelled"] += 1
+                    continue
+                # Blocks while the limit is reached, leaving later requests queued
+                try:
+                    await self.semaphore.acquire()
+                except asyncio.CancelledError:
+                    # Stopped at the limit, nothing is left to dispatch the rest of the batch
+                    self.cancel_requests(batch[index:])
+                    raise
+                wait = time.monotonic() - submitted_at
+                self.queue_waits.observe(wait)
+                LLM_DISPATCH_QUEUE_WAIT_SECONDS.observe(wait)
+
+                task = asyncio.create_task(self.dispatch(future, request))
+                self.in_flight.add(task)
+                task.add_done_callback(self.in_flight.discard)
+                # A caller giving up cancels its request
+                future.add_done_callback(lambda done, task=task: task.cancel() if done.cancelled() else None)
+
+    async def collect_batch(self) -> List[Tuple[float, asyncio.Future, Dict[str, Any]]]:
+        """Wait for a request, then gather more until the window closes or the batch is full"""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.window
+        try:
+            while len(batch) < self.max_batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            self.cancel_requests(batch)
+            raise
+        return batch
+
+    def cancel_requests(self, requests: List[Tuple[float, asyncio.Future, Dict[str, Any]]]):
+        """Cancel requests that were taken off the queue but never dispatched"""
+        for _, future, _ in requests:
+            if not future.done():
+                future.cancel()
+                self.stats["cancelled"] += 1
+
+    async def dispatch(self, future: asyncio.Future, request: Dict[str, Any]):
+        """Run one request and resolve its future"""
+        try:
+            response = await self.manager.generate(**request)
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            if not future.done():
+                future.set_exception(e)
+        else:
+            self.stats["completed"] += 1
+            if not future.done():
+                future.set_result(response)
+        finally:
+            self.semaphore.release()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get dispatcher metrics"""
+        return {
+            **self.stats,
+            "queued": self.queue.qsize(),
+            "in_flight": len(self.in_flight),
+            "max_concurrency": self.max_concurrency,
+            "window": self.window,
+            "max_batch_size": self.max_batch_size,
+            "batch_size": self.batch_sizes.get_metrics(),
+            "queue_wait": self.queue_waits.get_metrics()
+        }
@@ -1,12 +1,65 @@
+from contextlib import aclosing
+from dataclasses import dataclass
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import TYPE_CHECKING, Dict, Any, AsyncIterator, Callable, List, Optional, Sequence
+import asyncio
 import os
 import logging
 import json
-from openai import OpenAI
-import anthropic
-from google.generativeai import GenerativeModel
-import requests
+import time
+from llm.accounting import LLMAccounting
+from llm.batch import (
+    BATCH_TOKEN_OVERHEAD,
+    LLM_BATCH_ITEMS,
+    build_batch_prompt,
+    build_item_prompt,
+    parse_batch_response
+)
+from llm.cache import LLMResponseCache
+from llm.rate_limit import ProviderLimiter, estimate_tokens
+from llm.router import LLMRouter
+from utils.metrics import REGISTRY
+
+if TYPE_CHECKING:
+    import httpx
+
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds",
+    "LLM generation latency",
+    ("provider",)
+)
+LLM_REQUESTS = REGISTRY.counter("llm_requests_total", "LLM generation requests", ("provider", "status"))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "LLM tokens used", ("provider", "type"))
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from starting a streamed LLM request to its first text",
+    ("provider",)
+)
+
+def record_token_usage(provider: 'LLMProvider', prompt_tokens: Optional[int], completion_tokens: Optional[int]):
+    """Record token usage reported by a provider"""
+    LLM_TOKENS.labels(provider.value, "prompt").inc(prompt_tokens or 0)
+    LLM_TOKENS.labels(provider.value, "completion").inc(completion_tokens or 0)
+
+def create_http_client(
+    timeout: float,
+    connect_timeout: float,
+    max_connections: int,
+    base_url: str = "",
+    headers: Optional[Dict[str, str]] = None
+) -> "httpx.AsyncClient":
+    """Create pooled keep-alive HTTP client for a provider"""
+    import httpx
+
+    return httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections
+        )
+    )
 
 class LLMProvider(Enum):
     ANTHROPIC = "Anthropic"
@@ -15,76 +68,251 @@ class LLMProvider(Enum):
     GROQ = "Groq"
     OPENAI = "OpenAI"
 
+@dataclass
+class Completion:
+    text: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+@dataclass
+class StreamChunk:
+    provider: Optional[LLMProvider]  # None for responses served from cache
+    text: str  # Text added since the previous chunk
+    index: int = 0
+    done: bool = False  # Set on the last chunk only
+    finish_reason: Optional[str] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+# do not change this unless explicitly requested by the user
+PROVIDER_MODELS = {
+    LLMProvider.OPENAI: "gpt-4o",
+    LLMProvider.ANTHROPIC: "claude-3",
+    LLMProvider.GEMINI: "gemini-pro",
+    LLMProvider.GROQ: "mixtral-8x7b",
+    LLMProvider.DEEPSEEK: "deepseek-chat"
+}
+
+# Environment variable holding each provider's API key
+PROVIDER_API_KEYS = {
+    LLMProvider.OPENAI: "OPENAI_API_KEY",
+    LLMProvider.ANTHROPIC: "ANTHROPIC_API_KEY",
+    LLMProvider.GEMINI: "GEMINI_API_KEY",
+    LLMProvider.GROQ: "GROQ_API_KEY",
+    LLMProvider.DEEPSEEK: "DEEPSEEK_API_KEY"
+}
+
+# OpenAI-compatible endpoints, overridable with <PROVIDER>_BASE_URL
+PROVIDER_BASE_URLS = {
+    LLMProvider.GROQ: "https://api.groq.com/openai/v1",
+    LLMProvider.DEEPSEEK: "https://api.deepseek.com/v1"
+}
+
+def create_response_cache() -> LLMResponseCache:
+    """Create response cache configured from the environment"""
+    return LLMResponseCache(
+        max_entries=int(os.environ.get("LLM_CACHE_SIZE", 1024)),
+        ttl=float(os.environ.get("LLM_CACHE_TTL", 3600)),
+        persist_path=os.environ.get("LLM_CACHE_PATH")  # Unset keeps the cache in memory
+    )
+
 class LLMProviderManager:
-    def __init__(self):
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        cache: Optional[LLMResponseCache] = None,
+        router: Optional[LLMRouter] = None,
+        accounting: Optional[LLMAccounting] = None
+    ):
         self.logger = logging.getLogger("llm_provider")
-        self.providers = {}
+        # Seconds per request; cancelling the awaiting task aborts the request
+        self.timeout = timeout or float(os.environ.get("LLM_REQUEST_TIMEOUT", 60))
+        self.connect_timeout = connect_timeout or float(os.environ.get("LLM_CONNECT_TIMEOUT", 5))
+        # Keep-alive pool size per provider, bounds requests in flight
+        self.max_connections = max_connections or int(os.environ.get("LLM_MAX_CONNECTIONS", 100))
+        self.cache = cache or create_response_cache()
+        # Concurrency, rate limits and retries per provider; the SDKs' own
+        # retries are disabled so backoff is coordinated here
+        self.limiters = {provider: ProviderLimiter.from_env(provider.value) for provider in LLMProvider}
+        # Picks a provider for generations that do not name one
+        self.router = router or LLMRouter()
+        # Tokens, cost and latency per calling agent, provider and model
+        self.accounting = accounting or LLMAccounting()
+        self.configured: Dict[LLMProvider, str] = {}  # API key per provider
+        self.providers: Dict[LLMProvider, Any] = {}  # Clients constructed so far
         self.initialize_providers()
 
+    def http_client(self, base_url: str = "", headers: Optional[Dict[str, str]] = None) -> "httpx.AsyncClient":
+        """Create pooled HTTP client using the configured limits"""
+        return create_http_client(self.timeout, self.connect_timeout, self.max_connections, base_url, headers)
+
     def initialize_providers(self):
-        """Initialize available LLM providers"""
-        # Initialize OpenAI
-        if os.environ.get("OPENAI_API_KEY"):
-            self.providers[LLMProvider.OPENAI] = OpenAI(
-                api_key=os.environ.get("OPENAI_API_KEY")
+        """Register providers that have an API key; clients are built on first use"""
+        for provider, variable in PROVIDER_API_KEYS.items():
+            api_key = os.environ.get(variable)
+            if api_key:
+                self.configured[provider] = api_key
+
+    def get_client(self, provider: LLMProvider) -> Any:
+        """Get provider client, importing its SDK and constructing it on first use"""
+        client = self.providers.get(provider)
+        if client is None:
+            if provider not in self.configured:
+                raise ValueError(f"Provider {provider} not initialized")
+            client = self.providers[provider] = self.create_client(provider, self.configured[provider])
+            self.logger.info(f"Initialized {provider.value} client")
+        return client
+
+    def create_client(self, provider: LLMProvider, api_key: str) -> Any:
+        """Construct client for provider"""
+        if provider == LLMProvider.OPENAI:
+            from openai import AsyncOpenAI
+
+            return AsyncOpenAI(
+                api_key=api_key,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=self.http_client()
             )
 
-        # Initialize Anthropic
-        if os.environ.get("ANTHROPIC_API_KEY"):
-            self.providers[LLMProvider.ANTHROPIC] = anthropic.Anthropic(
-                api_key=os.environ.get("ANTHROPIC_API_KEY")
+        if provider == LLMProvider.ANTHROPIC:
+            import anthropic
+
+            return anthropic.AsyncAnthropic(
+                api_key=api_key,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=self.http_client()
             )
 
-        # Initialize Gemini
-        if os.environ.get("GEMINI_API_KEY"):
-            self.providers[LLMProvider.GEMINI] = GenerativeModel(
-                model_name="gemini-pro",
-                api_key=os.environ.get("GEMINI_API_KEY")
+        if provider == LLMProvider.GEMINI:
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            return genai.GenerativeModel(model_name=PROVIDER_MODELS[LLMProvider.GEMINI])
+
+        if provider in PROVIDER_BASE_URLS:
+            return self.http_client(
+                os.environ.get(f"{provider.name}_BASE_URL", PROVIDER_BASE_URLS[provider]),
+                {"Authorization": f"Bearer {api_key}"}
             )
 
-        # Initialize Groq
-        if os.environ.get("GROQ_API_KEY"):
-            self.providers[LLMProvider.GROQ] = {
-                "api_key": os.environ.get("GROQ_API_KEY"),
-                "base_url": "https://api.groq.com/v1"
-            }
+        raise ValueError(f"Provider {provider} not implemented")
 
-        # Initialize DeepSeek
-        if os.environ.get("DEEPSEEK_API_KEY"):
-            self.providers[LLMProvider.DEEPSEEK] = {
-                "api_key": os.environ.get("DEEPSEEK_API_KEY"),
-                "base_url": "https://api.deepseek.com/v1"
-            }
+    async def close(self):
+        """Close provider connection pools"""
+        for provider, client in self.providers.items():
+            try:
+                if hasattr(client, "aclose"):
+                    await client.aclose()
+                elif hasattr(client, "close"):
+                    await client.close()
+            except Exception as e:
+                self.logger.error(f"Error closing {provider} client: {e}")
 
     async def generate(
         self,
         prompt: str,
-        provider: LLMProvider = LLMProvider.OPENAI,
+        provider: Optional[LLMProvider] = None,
         max_tokens: int = 500,
         temperature: float = 0.7,
-        response_format: Optional[Dict[str, str]] = None
+        response_format: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+        agent: Optional[str] = None
+    ) -> str:
+        """Generate response using specified provider, or the fastest healthy one if None.
+
+        Served from cache when possible. agent names the caller in usage accounting.
+        """
+        generate = lambda: self._route(prompt, provider, max_tokens, temperature, response_format, agent)
+        if not use_cache or self.cache is None:
+            return await generate()
+
+        key = self.cache.make_key(
+            provider.value if provider else "routed",
+            PROVIDER_MODELS.get(provider),
+            prompt,
+            temperature,
+            max_tokens,
+            response_format
+        )
+        return await self.cache.get_or_generate(key, generate)
+
+    async def _route(
+        self,
+        prompt: str,
+        provider: Optional[LLMProvider],
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        agent: Optional[str]
+    ) -> str:
+        """Generate with the given provider, or route across initialized providers"""
+        if provider is not None:
+            return await self._generate(prompt, provider, max_tokens, temperature, response_format, agent)
+        return await self.router.route(
+            list(self.configured),
+            lambda routed: self._generate(prompt, routed, max_tokens, temperature, response_format, agent)
+        )
+
+    async def _generate(
+        self,
+        prompt: str,
+        provider: LLMProvider,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        agent: Optional[str]
     ) -> str:
-        """Generate response using specified provider"""
+        """Generate response from the provider"""
+        started = time.perf_counter()
+        status = "error"
+        completion: Optional[Completion] = None
         try:
-            if provider not in self.providers:
+            if provider not in self.configured:
                 raise ValueError(f"Provider {provider} not initialized")
 
             if provider == LLMProvider.OPENAI:
-                return await self._generate_openai(prompt, max_tokens, temperature, response_format)
+                call = lambda: self._generate_openai(prompt, max_tokens, temperature, response_format)
             elif provider == LLMProvider.ANTHROPIC:
-                return await self._generate_anthropic(prompt, max_tokens, temperature)
+                call = lambda: self._generate_anthropic(prompt, max_tokens, temperature)
             elif provider == LLMProvider.GEMINI:
-                return await self._generate_gemini(prompt, max_tokens, temperature)
+                call = lambda: self._generate_gemini(prompt, max_tokens, temperature, response_format)
             elif provider == LLMProvider.GROQ:
-                return await self._generate_groq(prompt, max_tokens, temperature)
+                call = lambda: self._generate_groq(prompt, max_tokens, temperature, response_format)
             elif provider == LLMProvider.DEEPSEEK:
-                return await self._generate_deepseek(prompt, max_tokens, temperature)
+                call = lambda: self._generate_deepseek(prompt, max_tokens, temperature, response_format)
             else:
                 raise ValueError(f"Provider {provider} not implemented")
 
+            completion = await self.limiters[provider].run(call, estimate_tokens(prompt, max_tokens))
+            record_token_usage(provider, completion.prompt_tokens, completion.completion_tokens)
+
+            status = "success"
+            return completion.text
+
+        except asyncio.CancelledError:
+            status = "cancelled"  # Lost a hedge race or the caller gave up
+            raise
         except Exception as e:
             self.logger.error(f"Error generating response with {provider}: {e}")
             raise
+        finally:
+            latency = time.perf_counter() - started
+            LLM_REQUEST_SECONDS.labels(provider.value).observe(latency)
+            LLM_REQUESTS.labels(provider.value, status).inc()
+            self.accounting.record(
+                agent,
+                provider.value,
+                PROVIDER_MODELS[provider],
+                latency,
+                completion.prompt_tokens if completion else None,
+                completion.completion_tokens if completion else None,
+                error=status == "error"
+            )
 
     async def _generate_openai(
         self, 
@@ -92,107 +320,501 @@ class LLMProviderManager:
         max_tokens: int,
         temperature: float,
         response_format: Optional[Dict[str, str]]
-    ) -> str:
+    ) -> Completion:
         """Generate response using OpenAI"""
-        # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-        # do not change this unless explicitly requested by the user
-        completion = self.providers[LLMProvider.OPENAI].chat.completions.create(
-            model="gpt-4o",
+        completion = await self.get_client(LLMProvider.OPENAI).chat.completions.create(
+            model=PROVIDER_MODELS[LLMProvider.OPENAI],
             messages=[{"role": "user", "content": prompt}],
             max_tokens=max_tokens,
             temperature=temperature,
             response_format=response_format
         )
-        return completion.choices[0].message.content
+        usage = completion.usage
+        return Completion(
+            completion.choices[0].message.content,
+            usage.prompt_tokens if usage else None,
+            usage.completion_tokens if usage else None
+        )
 
     async def _generate_anthropic(
         self,
         prompt: str,
         max_tokens: int,
         temperature: float
-    ) -> str:
+    ) -> Completion:
         """Generate response using Anthropic"""
-        completion = self.providers[LLMProvider.ANTHROPIC].messages.create(
-            model="claude-3",
+        completion = await self.get_client(LLMProvider.ANTHROPIC).messages.create(
+            model=PROVIDER_MODELS[LLMProvider.ANTHROPIC],
             max_tokens=max_tokens,
             temperature=temperature,
             messages=[{"role": "user", "content": prompt}]
         )
-        return completion.content[0].text
+        return Completion(completion.content[0].text, completion.usage.input_tokens, completion.usage.output_tokens)
 
     async def _generate_gemini(
         self,
         prompt: str,
         max_tokens: int,
-        temperature: float
-    ) -> str:
+        temperature: float,
+        response_format: Optional[Dict[str, str]]
+    ) -> Completion:
         """Generate response using Gemini"""
-        response = self.providers[LLMProvider.GEMINI].generate_content(
+        generation_config = {
+            "max_output_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if response_format and response_format.get("type") == "json_object":
+            generation_config["response_mime_type"] = "application/json"
+        response = await self.get_client(LLMProvider.GEMINI).generate_content_async(
             prompt,
-            generation_config={
-                "max_output_tokens": max_tokens,
-                "temperature": temperature
-            }
+            generation_config=generation_config,
+            request_options={"timeout": self.timeout}
+        )
+        usage = getattr(response, "usage_metadata", None)
+        return Completion(
+            response.text,
+            usage.prompt_token_count if usage else None,
+            usage.candidates_token_count if usage else None
         )
-        return response.text
 
     async def _generate_groq(
         self,
         prompt: str,
         max_tokens: int,
-        temperature: float
-    ) -> str:
+        temperature: float,
+        response_format: Optional[Dict[str, str]]
+    ) -> Completion:
         """Generate response using Groq"""
-        provider = self.providers[LLMProvider.GROQ]
-        headers = {
-            "Authorization": f"Bearer {provider['api_key']}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
-            "model": "mixtral-8x7b",
+            "model": PROVIDER_MODELS[LLMProvider.GROQ],
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens,
             "temperature": temperature
         }
-        
-        response = requests.post(
-            f"{provider['base_url']}/chat/completions",
-            headers=headers,
-            json=data
-        )
+        if response_format:
+            data["response_format"] = response_format
+
+        response = await self.get_client(LLMProvider.GROQ).post("/chat/completions", json=data)
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        body = response.json()
+        usage = body.get("usage", {})
+        return Completion(
+            body["choices"][0]["message"]["content"],
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens")
+        )
 
     async def _generate_deepseek(
         self,
         prompt: str,
         max_tokens: int,
-        temperature: float
-    ) -> str:
+        temperature: float,
+        response_format: Optional[Dict[str, str]]
+    ) -> Completion:
         """Generate response using DeepSeek"""
-        provider = self.providers[LLMProvider.DEEPSEEK]
-        headers = {
-            "Authorization": f"Bearer {provider['api_key']}",
-            "Content-Type": "application/json"
-        }
-        
         data = {
-            "model": "deepseek-chat",
+            "model": PROVIDER_MODELS[LLMProvider.DEEPSEEK],
             "messages": [{"role": "user", "content": prompt}],
             "max_tokens": max_tokens,
             "temperature": temperature
         }
-        
-        response = requests.post(
-            f"{provider['base_url']}/chat/completions",
-            headers=headers,
-            json=data
-        )
+        if response_format:
+            data["response_format"] = response_format
+
+        response = await self.get_client(LLMProvider.DEEPSEEK).post("/chat/completions", json=data)
         response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+        body = response.json()
+        usage = body.get("usage", {})
+        return Completion(
+            body["choices"][0]["message"]["content"],
+            usage.get("prompt_tokens"),
+            usage.get("completion_tokens")
+        )
+
+    async def generate_batch(
+        self,
+        instructions: str,
+        items: Sequence[Any],
+        provider: Optional[LLMProvider] = None,
+        max_tokens_per_item: int = 150,
+        temperature: float = 0.7,
+        batch_size: int = 20,
+        max_attempts: int = 3,
+        validate: Optional[Callable[[Any, str], bool]] = None,
+        agent: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """Generate one response per item, packing up to batch_size items into each request.
+
+        Items must be JSON serializable. Batches ask for a JSON object keyed by
+        item id; items that are missing, empty or rejected by validate are
+        retried in smaller requests, ending with single-item prompts. Results are
+        in item order, None for items that failed every attempt.
+        """
+        results: List[Optional[str]] = [None] * len(items)
+        pending = list(range(len(items)))
+        for attempt in range(max_attempts):
+            if not pending:
+                break
+            # Halve the batch on each retry so a bad item stops failing its neighbours,
+            # and give the last attempt each item on its own
+            size = 1 if attempt == max_attempts - 1 else max(1, batch_size >> attempt)
+            batches = [pending[start:start + size] for start in range(0, len(pending), size)]
+            outcomes = await asyncio.gather(
+                *(
+                    self._generate_batch_request(
+                        instructions,
+                        {str(index): items[index] for index in batch},
+                        provider,
+                        max_tokens_per_item,
+                        temperature,
+                        use_cache=attempt == 0,  # A retry must not get the rejected answer back
+                        agent=agent
+                    )
+                    for batch in batches
+                ),
+                return_exceptions=True
+            )
+
+            failed = []
+            for batch, outcome in zip(batches, outcomes):
+                if isinstance(outcome, Exception):
+                    self.logger.error(f"Batch generation of {len(batch)} items failed: {outcome}")
+                    failed.extend(batch)
+                    continue
+                for index in batch:
+                    text = outcome.get(str(index))
+                    if text and text.strip() and (validate is None or validate(items[index], text)):
+                        results[index] = text.strip()
+                    else:
+                        failed.append(index)
+
+            LLM_BATCH_ITEMS.labels("generated").inc(sum(len(batch) for batch in batches) - len(failed))
+            if failed and attempt + 1 < max_attempts:
+                LLM_BATCH_ITEMS.labels("retried").inc(len(failed))
+            pending = failed
+
+        if pending:
+            LLM_BATCH_ITEMS.labels("failed").inc(len(pending))
+            self.logger.warning(f"Batch generation gave up on {len(pending)} of {len(items)} items")
+        return results
+
+    async def _generate_batch_request(
+        self,
+        instructions: str,
+        batch: Dict[str, Any],
+        provider: Optional[LLMProvider],
+        max_tokens_per_item: int,
+        temperature: float,
+        use_cache: bool,
+        agent: Optional[str]
+    ) -> Dict[str, str]:
+        """Generate results for one batch, as a plain prompt when it holds a single item"""
+        if len(batch) == 1:
+            (item_id, item), = batch.items()
+            text = await self.generate(
+                build_item_prompt(instructions, item),
+                provider,
+                max_tokens_per_item,
+                temperature,
+                use_cache=use_cache,
+                agent=agent
+            )
+            return {item_id: text}
+
+        response = await self.generate(
+            build_batch_prompt(instructions, batch),
+            provider,
+            (max_tokens_per_item + BATCH_TOKEN_OVERHEAD) * len(batch),
+            temperature,
+            response_format={"type": "json_object"},
+            use_cache=use_cache,
+            agent=agent
+        )
+        return parse_batch_response(response)
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        provider: Optional[LLMProvider] = None,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        response_format: Optional[Dict[str, str]] = None,
+        use_cache: bool = True,
+        agent: Optional[str] = None
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream response chunks as they arrive, from provider or the fastest healthy one if None.
+
+        The last chunk has done set and carries token usage when the provider
+        reports it. Cached responses arrive as a single chunk, and completed
+        streams are cached for generate and later streams. Callers that stop
+        early should close the iterator (contextlib.aclosing) to release the
+        connection right away.
+        """
+        key = None
+        if use_cache and self.cache is not None:
+            key = self.cache.make_key(
+                provider.value if provider else "routed",
+                PROVIDER_MODELS.get(provider),
+                prompt,
+                temperature,
+                max_tokens,
+                response_format
+            )
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield StreamChunk(provider, cached, done=True, finish_reason="cached")
+                return
+
+        # Streams are not hedged, but fail over while nothing has been delivered
+        candidates = [provider] if provider is not None else self.router.rank(list(self.configured))
+        if not candidates:
+            raise ValueError("No providers available for streaming")
+
+        for position, candidate in enumerate(candidates):
+            parts = []
+            delivered = False
+            started = time.perf_counter()
+            try:
+                async with aclosing(self._stream(prompt, candidate, max_tokens, temperature, response_format, agent)) as stream:
+                    async for chunk in stream:
+                        parts.append(chunk.text)
+                        delivered = True
+                        yield chunk
+            except Exception as e:
+                if provider is None:
+                    self.router.get_health(candidate).record_failure()
+                if delivered or position == len(candidates) - 1:
+                    raise
+                self.logger.warning(f"Provider {candidate} failed ({e}), failing over to {candidates[position + 1]}")
+                continue
+
+            if provider is None:
+                self.router.get_health(candidate).record_success(time.perf_counter() - started)
+            if key is not None:
+                self.cache.set(key, "".join(parts), time.perf_counter() - started)
+            return
+
+    async def _stream(
+        self,
+        prompt: str,
+        provider: LLMProvider,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict[str, str]],
+        agent: Optional[str]
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream response from the provider, recording time to first token"""
+        started = time.perf_counter()
+        status = "error"
+        index = 0
+        first_token = True
+        usage: Optional[StreamChunk] = None
+        try:
+            if provider not in self.configured:
+                raise ValueError(f"Provider {provider} not initialized")
+
+            if provider == LLMProvider.OPENAI:
+                open_stream = lambda: self._stream_openai(prompt, max_tokens, temperature, response_format)
+            elif provider == LLMProvider.ANTHROPIC:
+                open_stream = lambda: self._stream_anthropic(prompt, max_tokens, temperature)
+            elif provider == LLMProvider.GEMINI:
+                open_stream = lambda: self._stream_gemini(prompt, max_tokens, temperature, response_format)
+            elif provider in (LLMProvider.GROQ, LLMProvider.DEEPSEEK):
+                open_stream = lambda: self._stream_chat_completions(provider, prompt, max_tokens, temperature, response_format)
+            else:
+                raise ValueError(f"Provider {provider} not implemented")
+
+            stream = self.limiters[provider].stream(open_stream, estimate_tokens(prompt, max_tokens))
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if first_token and chunk.text:
+                        LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(provider.value).observe(time.perf_counter() - started)
+                        first_token = False
+                    chunk.index = index
+                    index += 1
+                    if chunk.done:
+                        usage = chunk
+                        record_token_usage(provider, chunk.prompt_tokens, chunk.completion_tokens)
+                    yield chunk
+
+            status = "success"
+
+        except (GeneratorExit, asyncio.CancelledError):
+            status = "cancelled"  # Caller stopped reading or gave up
+            raise
+        except Exception as e:
+            self.logger.error(f"Error streaming response with {provider}: {e}")
+            raise
+        finally:
+            latency = time.perf_counter() - started
+            LLM_REQUEST_SECONDS.labels(provider.value).observe(latency)
+            LLM_REQUESTS.labels(provider.value, status).inc()
+            self.accounting.record(
+                agent,
+                provider.value,
+                PROVIDER_MODELS[provider],
+                latency,
+                usage.prompt_tokens if usage else None,
+                usage.completion_tokens if usage else None,
+                error=status == "error"
+            )
+
+    async def _stream_openai(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict[str, str]]
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream response using OpenAI"""
+        stream = await self.get_client(LLMProvider.OPENAI).chat.completions.create(
+            model=PROVIDER_MODELS[LLMProvider.OPENAI],
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            response_format=response_format,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        finish_reason = None
+        usage = None
+        try:
+            async for event in stream:
+                if event.usage:
+                    usage = event.usage  # Sent in a final event without choices
+                if not event.choices:
+                    continue
+                finish_reason = event.choices[0].finish_reason or finish_reason
+                if event.choices[0].delta.content:
+                    yield StreamChunk(LLMProvider.OPENAI, event.choices[0].delta.content)
+        finally:
+            await stream.close()
+        yield StreamChunk(
+            LLMProvider.OPENAI,
+            "",
+            done=True,
+            finish_reason=finish_reason,
+            prompt_tokens=usage.prompt_tokens if usage else None,
+            completion_tokens=usage.completion_tokens if usage else None
+        )
+
+    async def _stream_anthropic(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream response using Anthropic"""
+        async with self.get_client(LLMProvider.ANTHROPIC).messages.stream(
+            model=PROVIDER_MODELS[LLMProvider.ANTHROPIC],
+            max_tokens=max_tokens,
+            temperature=temperature,
+            messages=[{"role": "user", "content": prompt}]
+        ) as stream:
+            async for text in stream.text_stream:
+                if text:
+                    yield StreamChunk(LLMProvider.ANTHROPIC, text)
+            message = await stream.get_final_message()
+        yield StreamChunk(
+            LLMProvider.ANTHROPIC,
+            "",
+            done=True,
+            finish_reason=message.stop_reason,
+            prompt_tokens=message.usage.input_tokens,
+            completion_tokens=message.usage.output_tokens
+        )
+
+    async def _stream_gemini(
+        self,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict[str, str]]
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream response using Gemini"""
+        generation_config = {
+            "max_output_tokens": max_tokens,
+            "temperature": temperature
+        }
+        if response_format and response_format.get("type") == "json_object":
+            generation_config["response_mime_type"] = "application/json"
+        response = await self.get_client(LLMProvider.GEMINI).generate_content_async(
+            prompt,
+            generation_config=generation_config,
+            stream=True,
+            request_options={"timeout": self.timeout}
+        )
+        finish_reason = None
+        usage = None
+        async for event in response:
+            usage = getattr(event, "usage_metadata", None) or usage
+            if event.candidates and event.candidates[0].finish_reason:
+                finish_reason = event.candidates[0].finish_reason.name.lower()
+            if event.parts and event.text:
+                yield StreamChunk(LLMProvider.GEMINI, event.text)
+        yield StreamChunk(
+            LLMProvider.GEMINI,
+            "",
+            done=True,
+            finish_reason=finish_reason,
+            prompt_tokens=usage.prompt_token_count if usage else None,
+            completion_tokens=usage.candidates_token_count if usage else None
+        )
+
+    async def _stream_chat_completions(
+        self,
+        provider: LLMProvider,
+        prompt: str,
+        max_tokens: int,
+        temperature: float,
+        response_format: Optional[Dict[str, str]]
+    ) -> AsyncIterator[StreamChunk]:
+        """Stream response from an OpenAI-compatible endpoint (Groq, DeepSeek) over server-sent events"""
+        data = {
+            "model": PROVIDER_MODELS[provider],
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+        if response_format:
+            data["response_format"] = response_format
+
+        finish_reason = None
+        usage = {}
+        async with self.get_client(provider).stream("POST", "/chat/completions", json=data) as response:
+            if response.is_error:
+                await response.aread()  # Keep the connection reusable for the retry
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    continue  # Read to the end so the connection returns to the pool
+                event = json.loads(payload)
+                # Groq reports usage under x_groq on the last event
+                usage = event.get("usage") or event.get("x_groq", {}).get("usage") or usage
+                for choice in event.get("choices", []):
+                    finish_reason = choice.get("finish_reason") or finish_reason
+                    text = choice.get("delta", {}).get("content")
+                    if text:
+                        yield StreamChunk(provider, text)
+        yield StreamChunk(
+            provider,
+            "",
+            done=True,
+            finish_reason=finish_reason,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens")
+        )
+
+    def get_rate_limit_metrics(self) -> Dict[str, Any]:
+        """Get rate limiter metrics for initialized providers"""
+        return {provider.value: self.limiters[provider].get_metrics() for provider in self.configured}
 
     def get_available_providers(self) -> Dict[LLMProvider, bool]:
         """Get dictionary of available providers"""
-        return {provider: provider in self.providers for provider in LLMProvider}
+        return {provider: provider in self.configured for provider in LLMProvider}
 
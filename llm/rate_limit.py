@@ -0,0 +1,250 @@
+import asyncio
+import logging
+import os
+import random
+import sys
+import time
+from typing import Dict, Any, AsyncIterator, Awaitable, Callable, Optional, Tuple, TypeVar
+from utils.metrics import REGISTRY
+
+T = TypeVar("T")
+
+LLM_RATE_LIMIT_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_rate_limit_wait_seconds",
+    "Time LLM requests wait for rate limit and concurrency slots",
+    ("provider",)
+)
+LLM_RETRIES = REGISTRY.counter("llm_retries_total", "Retried LLM requests", ("provider", "reason"))
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0  # Tokens per second
+        self.capacity = capacity or rate_per_minute  # Burst size, one minute of budget by default
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()  # Waiters are served in FIFO order
+
+    def refill(self, now: float):
+        """Add tokens accrued since the last update"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take tokens, waiting until available; returns seconds waited.
+
+        Requests larger than the bucket wait for a full bucket and leave it in
+        debt, so they delay later callers instead of blocking forever.
+        """
+        started = time.monotonic()
+        async with self._lock:
+            while True:
+                self.refill(time.monotonic())
+                needed = min(amount, self.capacity)
+                if self.tokens >= needed:
+                    self.tokens -= amount
+                    return time.monotonic() - started
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """Get HTTP status from httpx and provider SDK errors"""
+    for value in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None)  # google.api_core exceptions
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """Get Retry-After delay in seconds if the provider sent one"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None  # Missing or an HTTP date
+
+class RetryPolicy:
+    def __init__(self, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def get_reason(self, error: Exception) -> Optional[str]:
+        """Classify error as retryable, None if it should propagate"""
+        status = get_status_code(error)
+        if status == 429:
+            return "throttled"
+        if status is not None and status >= 500:
+            return "server_error"
+        # SDKs wrap httpx connection errors in their own exception types;
+        # httpx is only loaded once a provider client has been created
+        httpx = sys.modules.get("httpx")
+        if httpx is not None and (
+            isinstance(error, httpx.TransportError) or isinstance(error.__cause__, httpx.TransportError)
+        ):
+            return "transport_error"
+        return None
+
+    def get_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Exponential backoff with full jitter, honouring Retry-After"""
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+class ProviderLimiter:
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 16,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ):
+        self.logger = logging.getLogger(f"llm_rate_limit.{name}")
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.wait_times = LLM_RATE_LIMIT_WAIT_SECONDS.labels(name)
+        self.paused_until = 0.0  # Set when the provider throttles us
+        self.in_flight = 0
+        self.waiting = 0
+        self.stats = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "server_error": 0,
+            "transport_error": 0,
+            "failed": 0
+        }
+
+    @classmethod
+    def from_env(cls, name: str) -> "ProviderLimiter":
+        """Create limiter from <NAME>_MAX_CONCURRENCY, <NAME>_RPM and <NAME>_TPM"""
+        prefix = name.upper()
+        rpm = os.environ.get(f"{prefix}_RPM")
+        tpm = os.environ.get(f"{prefix}_TPM")
+        return cls(
+            name,
+            max_concurrency=int(os.environ.get(f"{prefix}_MAX_CONCURRENCY", 16)),
+            requests_per_minute=float(rpm) if rpm else None,
+            tokens_per_minute=float(tpm) if tpm else None,
+            retry_policy=RetryPolicy(max_retries=int(os.environ.get("LLM_MAX_RETRIES", 5)))
+        )
+
+    async def acquire(self, tokens: int = 0):
+        """Wait for cooldown, rate limit budget and a concurrency slot"""
+        started = time.monotonic()
+        self.waiting += 1
+        try:
+            # Cool down together after a 429 instead of each caller hammering the provider
+            while time.monotonic() < self.paused_until:
+                await asyncio.sleep(self.paused_until - time.monotonic())
+            if self.request_bucket is not None:
+                await self.request_bucket.acquire()
+            if self.token_bucket is not None and tokens:
+                await self.token_bucket.acquire(tokens)
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.wait_times.observe(time.monotonic() - started)
+        self.in_flight += 1
+
+    def release(self):
+        """Return the concurrency slot"""
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def get_retry_delay(self, error: Exception, attempt: int) -> Optional[Tuple[str, float]]:
+        """Get retry reason and delay for error, None once it should propagate"""
+        reason = self.retry_policy.get_reason(error)
+        if reason is None or attempt >= self.retry_policy.max_retries:
+            self.stats["failed"] += 1
+            return None
+        return reason, self.retry_policy.get_delay(attempt, get_retry_after(error))
+
+    async def backoff(self, reason: str, attempt: int, delay: float):
+        """Count retry and sleep before it"""
+        self.stats["retries"] += 1
+        self.stats[reason] += 1
+        LLM_RETRIES.labels(self.name, reason).inc()
+        if reason == "throttled":
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self.logger.warning(f"{self.name} request {reason}, retry {attempt} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int = 0) -> T:
+        """Run provider call within rate and concurrency limits, retrying throttling and server errors.
+
+        tokens is the request's token estimate (prompt plus max_tokens),
+        which is what providers count against tokens-per-minute limits.
+        """
+        self.stats["requests"] += 1
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            try:
+                return await call()
+            except Exception as e:
+                retry = self.get_retry_delay(e, attempt)
+                if retry is None:
+                    raise
+            finally:
+                self.release()
+
+            attempt += 1
+            await self.backoff(retry[0], attempt, retry[1])
+
+    async def stream(self, open_stream: Callable[[], AsyncIterator[T]], tokens: int = 0) -> AsyncIterator[T]:
+        """Stream items from provider within limits, holding the concurrency slot until the stream ends.
+
+        Retries like run, but only until the first item arrives; errors after
+        that propagate since the caller has already consumed part of the output.
+        """
+        self.stats["requests"] += 1
+        attempt = 0
+        while True:
+            await self.acquire(tokens)
+            stream = open_stream()
+            try:
+                try:
+                    first = await stream.__anext__()
+                except StopAsyncIteration:
+                    return
+                except Exception as e:
+                    retry = self.get_retry_delay(e, attempt)
+                    if retry is None:
+                        raise
+                else:
+                    yield first
+                    async for item in stream:
+                        yield item
+                    return
+            finally:
+                await stream.aclose()
+                self.release()
+
+            attempt += 1
+            await self.backoff(retry[0], attempt, retry[1])
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get limiter metrics"""
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self.request_bucket.rate * 60 if self.request_bucket else None,
+            "tokens_per_minute": self.token_bucket.rate * 60 if self.token_bucket else None,
+            "wait": self.wait_times.get_metrics()
+        }
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Rough request size, about four characters per prompt token"""
+    return len(prompt) // 4 + max_tokens
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Awaitable, Callable, List, Optional, Sequence
+from utils.metrics import REGISTRY, LatencyHistogram
+
+LLM_ROUTER_EVENTS = REGISTRY.counter(
+    "llm_router_events_total",
+    "Hedged requests and failovers issued by the LLM router",
+    ("provider", "event")
+)
+
+def provider_name(provider: Any) -> str:
+    """Label for a provider enum member or name"""
+    return getattr(provider, "value", str(provider))
+
+class ProviderHealth:
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha  # Weight of the newest sample in the moving averages
+        self.latency: Optional[float] = None  # EWMA seconds of successful requests
+        self.error_rate = 0.0
+        self.latencies = LatencyHistogram()
+        self.last_failure_at = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.wins = 0
+
+    def record_success(self, latency: float):
+        """Update averages after a successful request"""
+        self.requests += 1
+        self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+        self.error_rate = (1 - self.alpha) * self.error_rate
+        self.latencies.observe(latency)
+
+    def record_abandoned(self, elapsed: float):
+        """Count a request cancelled after elapsed seconds as at least that slow"""
+        if self.latency is None or elapsed > self.latency:
+            self.latency = elapsed if self.latency is None else self.alpha * elapsed + (1 - self.alpha) * self.latency
+
+    def record_failure(self):
+        """Update error rate after a failed request"""
+        self.requests += 1
+        self.failures += 1
+        self.error_rate = self.alpha + (1 - self.alpha) * self.error_rate
+        self.last_failure_at = time.monotonic()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get provider health metrics"""
+        return {
+            "ewma_latency": self.latency,
+            "error_rate": self.error_rate,
+            "p95_latency": self.latencies.quantile(0.95),
+            "requests": self.requests,
+            "failures": self.failures,
+            "wins": self.wins
+        }
+
+class LLMRouter:
+    def __init__(
+        self,
+        alpha: float = 0.2,
+        error_threshold: float = 0.5,
+        recovery_time: float = 30.0,
+        hedge: bool = True,
+        min_samples: int = 20,
+        default_hedge_delay: float = 5.0
+    ):
+        self.logger = logging.getLogger("llm_router")
+        self.alpha = alpha
+        self.error_threshold = error_threshold  # Providers above this error rate are avoided
+        self.recovery_time = recovery_time  # Seconds before an unhealthy provider is probed again
+        self.hedge = hedge
+        self.min_samples = min_samples  # Successes needed before trusting the p95
+        self.default_hedge_delay = default_hedge_delay
+        self.health: Dict[Any, ProviderHealth] = {}
+        self.stats = {"routed": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0}
+
+    def get_health(self, provider: Any) -> ProviderHealth:
+        """Get health tracker for provider"""
+        health = self.health.get(provider)
+        if health is None:
+            health = self.health[provider] = ProviderHealth(self.alpha)
+        return health
+
+    def is_healthy(self, provider: Any) -> bool:
+        """Check if provider is below the error threshold or due for a probe"""
+        health = self.get_health(provider)
+        return (
+            health.error_rate < self.error_threshold
+            or time.monotonic() - health.last_failure_at >= self.recovery_time
+        )
+
+    def rank(self, providers: Sequence[Any]) -> List[Any]:
+        """Order providers healthy first, then by EWMA latency; unmeasured ones are tried early"""
+        def score(provider: Any):
+            health = self.get_health(provider)
+            return (not self.is_healthy(provider), health.latency or 0.0, health.error_rate)
+        return sorted(providers, key=score)
+
+    def get_hedge_delay(self, provider: Any) -> float:
+        """Wait this long for provider before sending a hedged duplicate"""
+        latencies = self.get_health(provider).latencies
+        if latencies.count < self.min_samples:
+            return self.default_hedge_delay
+        return latencies.quantile(0.95)
+
+    async def route(self, providers: Sequence[Any], call: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run call on the best provider, hedging slow requests and failing over on errors"""
+        candidates = self.rank(providers)
+        if not candidates:
+            raise ValueError("No providers available for routing")
+
+        self.stats["routed"] += 1
+        last_error: Optional[Exception] = None
+        while candidates:
+            primary = candidates.pop(0)
+            try:
+                return await self.race(primary, candidates, call)
+            except Exception as e:
+                last_error = e
+                if candidates:
+                    self.stats["failovers"] += 1
+                    LLM_ROUTER_EVENTS.labels(provider_name(candidates[0]), "failover").inc()
+                    self.logger.warning(f"Provider {primary} failed ({e}), failing over to {candidates[0]}")
+        raise last_error
+
+    async def race(self, primary: Any, backups: List[Any], call: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run primary, adding a hedge from backups if it exceeds its p95 latency.
+
+        A backup used as hedge is removed from backups; the losing request is
+        cancelled. Raises only if every started request failed.
+        """
+        tasks = {asyncio.ensure_future(self.attempt(primary, call)): primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=self.get_hedge_delay(primary) if self.hedge else None)
+            if not done and backups:
+                hedge = backups.pop(0)
+                self.stats["hedged"] += 1
+                LLM_ROUTER_EVENTS.labels(provider_name(hedge), "hedge").inc()
+                tasks[asyncio.ensure_future(self.attempt(hedge, call))] = hedge
+
+            error: Optional[Exception] = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        winner = tasks[task]
+                        self.get_health(winner).wins += 1
+                        if winner is not primary:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def attempt(self, provider: Any, call: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Run call on one provider, recording latency or failure"""
+        started = time.perf_counter()
+        try:
+            result = await call(provider)
+        except asyncio.CancelledError:
+            # Lost a hedge race: not an error, but the provider is slower than its hedge delay
+            self.get_health(provider).record_abandoned(time.perf_counter() - started)
+            raise
+        except Exception:
+            self.get_health(provider).record_failure()
+            raise
+        self.get_health(provider).record_success(time.perf_counter() - started)
+        return result
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get routing stats and per-provider health"""
+        return {
+            **self.stats,
+            "providers": {
+                provider_name(provider): {
+                    **health.get_metrics(),
+                    "healthy": self.is_healthy(provider),
+                    "hedge_delay": self.get_hedge_delay(provider)
+                }
+                for provider, health in self.health.items()
+            }
+        }
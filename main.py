@@ -1,10 +1,12 @@
 import logging
 import os
-from flask import Flask, jsonify
+import time
+from flask import Flask, Response, g, jsonify, request
 from utils.framework import Framework
 from utils.agent_manager import AgentManager
 from data.models import init_db
 from llm.llm_interface import LLMInterface
+from utils.metrics import REGISTRY
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
@@ -16,7 +18,28 @@ app.secret_key = os.environ.get("SESSION_SECRET")
 # Initialize components
 framework = Framework()
 agent_manager = AgentManager()
-llm_interface = LLMInterface()
+llm_interface = LLMInterface(framework.llm_manager)
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ("method", "endpoint", "status")
+)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    started = g.pop("request_started", None)
+    if started is not None:
+        HTTP_REQUEST_SECONDS.labels(
+            request.method,
+            request.url_rule.rule if request.url_rule else "unmatched",
+            str(response.status_code)
+        ).observe(time.perf_counter() - started)
+    return response
 
 @app.route('/')
 def index():
@@ -28,7 +51,8 @@ def index():
         "endpoints": {
             "/": "API documentation",
             "/health": "Health check endpoint",
-            "/stats": "System statistics and metrics"
+            "/stats": "System statistics and metrics",
+            "/metrics": "Prometheus metrics"
         }
     })
 
@@ -49,6 +73,11 @@ def get_stats():
         logger.error(f"Error getting stats: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics')
+def get_prometheus_metrics():
+    """Prometheus metrics endpoint"""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
 async def initialize_system():
     """Initialize all system components"""
     try:
@@ -61,14 +90,17 @@ async def initialize_system():
         logger.error(f"Failed to initialize system: {e}")
         raise
 
-# Initialize the system at startup
+# Initialize the system at startup. Spawned agent worker processes re-import
+# this module and must not initialize the system again.
 import asyncio
-try:
-    asyncio.run(initialize_system())
-    logger.info("System initialization completed")
-except Exception as e:
-    logger.error(f"System initialization failed: {e}")
-    raise
+import multiprocessing
+if multiprocessing.parent_process() is None:
+    try:
+        asyncio.run(initialize_system())
+        logger.info("System initialization completed")
+    except Exception as e:
+        logger.error(f"System initialization failed: {e}")
+        raise
 
 if __name__ == "__main__":
     # Run the Flask development server
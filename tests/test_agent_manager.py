@@ -0,0 +1,111 @@
+import asyncio
+import sqlite3
+import time
+import unittest
+from unittest import mock
+from agents.base_agent import BaseAgent
+from data.models import UserProfile
+from utils.agent_manager import AgentManager
+
+class CrashingAgent(BaseAgent):
+    def __init__(self, crashes: int):
+        super().__init__("crashing")
+        self.crashes = crashes
+        self.runs = 0
+        self.initialized = 0
+
+    async def initialize(self):
+        self.initialized += 1
+
+    async def run(self):
+        self.runs += 1
+        if self.runs <= self.crashes:
+            raise RuntimeError(f"crash {self.runs}")
+
+    async def process_cycle(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+class ProfileLoadingAgent(BaseAgent):
+    def __init__(self, name: str):
+        super().__init__(name)
+
+    async def initialize(self):
+        self.profiles = await UserProfile.load_all()
+
+    async def process_cycle(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+class SupervisorTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.delays = []
+
+    async def record_sleep(self, delay, *args):
+        """Record restart backoff without waiting it out"""
+        self.delays.append(delay)
+
+    async def supervise(self, agent: BaseAgent, **options) -> AgentManager:
+        manager = AgentManager(restart_backoff=1.0, max_restart_backoff=4.0, **options)
+        await manager.register_agent("crashing", agent)
+        with mock.patch("utils.agent_manager.asyncio.sleep", self.record_sleep):
+            await manager.start_agent("crashing")
+            await asyncio.wait_for(manager.agent_tasks["crashing"], 1)
+        return manager
+
+    async def test_crashed_agent_restarts_with_capped_exponential_backoff(self):
+        agent = CrashingAgent(crashes=4)
+        manager = await self.supervise(agent)
+        self.assertEqual(self.delays, [1.0, 2.0, 4.0, 4.0])
+        self.assertEqual(agent.runs, 5)
+        self.assertEqual(agent.initialized, 5)
+        health = manager.agent_health["crashing"]
+        self.assertEqual(health["restarts"], 4)
+        self.assertEqual(health["last_error"], "crash 4")
+        self.assertEqual(health["state"], "stopped")
+
+    async def test_agent_is_given_up_after_max_restarts(self):
+        agent = CrashingAgent(crashes=10)
+        manager = await self.supervise(agent, max_restarts=2)
+        self.assertEqual(agent.runs, 3)
+        self.assertEqual(manager.agent_health["crashing"]["state"], "failed")
+        self.assertNotIn("crashing", manager.active_agents)
+
+    async def test_stopping_during_backoff_does_not_restart(self):
+        agent = CrashingAgent(crashes=10)
+        manager = AgentManager(restart_backoff=60.0)
+        await manager.register_agent("crashing", agent)
+        await manager.start_agent("crashing")
+        await asyncio.sleep(0.01)
+        self.assertEqual(manager.agent_health["crashing"]["state"], "restarting")
+
+        await asyncio.wait_for(manager.stop_agent("crashing"), 1)
+        self.assertEqual(agent.runs, 1)
+        self.assertEqual(agent.initialized, 1)
+        self.assertEqual(manager.agent_health["crashing"]["state"], "stopped")
+
+class StartupTest(unittest.IsolatedAsyncioTestCase):
+    async def test_agent_initialization_overlaps_database_loads(self):
+        def slow_connection():
+            time.sleep(0.2)  # A slow profile table read
+            conn = sqlite3.connect(":memory:")
+            conn.execute("CREATE TABLE user_profiles (user_id TEXT, motivators TEXT, created_at TEXT, updated_at TEXT)")
+            return conn
+
+        manager = AgentManager()
+        for agent_id in ("profiles-a", "profiles-b", "profiles-c"):
+            await manager.register_agent(agent_id, ProfileLoadingAgent(agent_id))
+        with mock.patch("data.models.get_db_connection", slow_connection):
+            started = time.monotonic()
+            await manager.start_agents()
+            elapsed = time.monotonic() - started
+        await manager.stop_agents()
+        self.assertEqual(len(manager.active_agents), 0)
+        self.assertLess(elapsed, 0.4)  # Serial loads would take 0.6s
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest import mock
+from agents.emotional_anchoring_agent import EmotionalAnchoringAgent
+from agents.feedback_loop_agent import FeedbackLoopAgent
+from agents.goal_setting_agent import GoalSettingAgent
+from utils.message_bus import MessageBus
+
+class AgentMessagingTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = MessageBus()
+        self.goals = GoalSettingAgent()
+        self.feedback = FeedbackLoopAgent()
+        self.anchoring = EmotionalAnchoringAgent()
+        for agent in (self.goals, self.feedback, self.anchoring):
+            agent.attach_message_bus(self.bus)
+            await agent.initialize()
+
+    async def test_completed_goal_is_delivered_as_notification(self):
+        await self.bus.send("test", "goal_setting", {"type": "goal_request", "user_id": "u1", "goal_type": "learning"})
+        await self.goals.process_messages()
+        await self.goals.process_cycle()
+        self.assertEqual(len(self.goals.get_user_goals("u1")), 1)
+
+        for action, value in (("complete_tutorial", 1), ("help_others", 3)):
+            await self.bus.send("test", "goal_setting", {
+                "type": "goal_progress", "user_id": "u1", "goal_type": "learning", "action": action, "value": value
+            })
+        await self.goals.process_messages()
+        self.assertTrue(self.goals.get_user_goals("u1")[0]["completed"])
+
+        await self.feedback.process_messages()
+        self.assertEqual([(n["user_id"], n["type"]) for n in self.feedback.feedback_queue], [("u1", "achievement")])
+        with mock.patch.object(self.feedback, "deliver_notification") as deliver:
+            await self.feedback.process_cycle()
+        deliver.assert_awaited_once()
+        self.assertEqual(self.feedback.feedback_queue, [])
+
+    async def test_disengagement_risk_reaches_feedback_as_touchpoint(self):
+        await self.anchoring.create_user_story("u2", "journey")
+        await self.bus.send("behavior_monitoring", "emotional_anchoring", {
+            "type": "disengagement_risk", "user_id": "u2", "days_inactive": 9
+        })
+        await self.anchoring.process_messages()
+        await self.feedback.process_messages()
+
+        notification = self.feedback.feedback_queue[0]
+        self.assertEqual(notification["type"], "touchpoint")
+        self.assertEqual(notification["message"], "Starting your adventure")
+
+    async def test_milestone_celebration_is_queued(self):
+        await self.anchoring.celebrate_milestone({"user_id": "u3", "type": "first_post"})
+        await self.feedback.process_messages()
+        self.assertEqual(self.feedback.feedback_queue[0]["message"], "You've reached first_post! Keep up the great work!")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import asyncio
+import importlib
+import unittest
+from agents.base_agent import BaseAgent
+from agents.motivation_mapping_agent import MotivationMappingAgent
+from utils.message_bus import MessageBus
+
+SHIPPED_AGENTS = {
+    "analytics_agent": "AnalyticsAgent",
+    "behavior_monitoring_agent": "BehaviorMonitoringAgent",
+    "emotional_anchoring_agent": "EmotionalAnchoringAgent",
+    "evolution_agent": "EvolutionAgent",
+    "feedback_loop_agent": "FeedbackLoopAgent",
+    "goal_setting_agent": "GoalSettingAgent",
+    "habit_formation_agent": "HabitFormationAgent",
+    "motivation_mapping_agent": "MotivationMappingAgent",
+    "social_dynamics_agent": "SocialDynamicsAgent"
+}
+
+class CountingAgent(BaseAgent):
+    max_cycle_interval = 60.0
+
+    def __init__(self):
+        super().__init__("counting")
+        self.cycled = asyncio.Event()
+
+    async def initialize(self):
+        pass
+
+    async def process_cycle(self):
+        self.cycled.set()
+
+    async def cleanup(self):
+        pass
+
+class RunLoopTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.bus = MessageBus()
+        self.agent = CountingAgent()
+        self.agent.attach_message_bus(self.bus)
+        self.task = asyncio.create_task(self.agent.run())
+        await self.next_cycle()
+
+    async def asyncTearDown(self):
+        await self.agent.stop()
+        await asyncio.wait_for(self.task, 1)
+
+    async def next_cycle(self):
+        self.agent.cycled.clear()
+        await asyncio.wait_for(self.agent.cycled.wait(), 1)
+
+    async def test_idle_agent_waits_for_max_cycle_interval(self):
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.agent.cycle_count, 1)
+
+    async def test_message_wakes_idle_agent(self):
+        waiting = asyncio.create_task(self.next_cycle())
+        await asyncio.sleep(0)
+        await self.bus.send("test", "counting", {"type": "update"})
+        await waiting
+        self.assertEqual(self.agent.cycle_count, 2)
+
+    async def test_scheduled_wakeup_runs_cycle(self):
+        waiting = asyncio.create_task(self.next_cycle())
+        self.agent.schedule_wakeup(0.01)
+        await waiting
+        self.assertEqual(self.agent.cycle_count, 2)
+
+    async def test_backlog_larger_than_a_batch_is_drained_without_waiting(self):
+        for index in range(250):
+            await self.bus.send("test", "counting", {"type": "update", "index": index})
+        await asyncio.sleep(0.1)
+        self.assertEqual(len(self.bus.get_mailbox("counting")), 0)
+        self.assertEqual(self.agent.cycle_count, 4)  # Batches of 100, 100 and 50
+
+class ShippedAgentsTest(unittest.TestCase):
+    def test_shipped_agents_do_not_poll_every_second(self):
+        for module_name, class_name in SHIPPED_AGENTS.items():
+            with self.subTest(agent=class_name):
+                try:
+                    module = importlib.import_module(f"agents.{module_name}")
+                except ImportError as e:
+                    self.skipTest(f"{module_name} dependencies missing: {e}")
+                self.assertGreaterEqual(getattr(module, class_name).max_cycle_interval, 30)
+
+class PhaseTimingTest(unittest.IsolatedAsyncioTestCase):
+    async def test_motivation_mapping_records_one_phase_per_cycle(self):
+        agent = MotivationMappingAgent()
+
+        async def get_active_users():
+            return [{"id": f"user-{index}"} for index in range(3)]
+
+        async def analyze_user_motivation(user):
+            return {}
+
+        async def update_user_profile(user, profile):
+            pass
+
+        agent.get_active_users = get_active_users
+        agent.analyze_user_motivation = analyze_user_motivation
+        agent.update_user_profile = update_user_profile
+        await agent.process_cycle()
+
+        self.assertEqual(list(agent.phase_timings), ["map_user_motivations"])
+        self.assertEqual(agent.phase_timings["map_user_motivations"].count, 1)
+
+if __name__ == "__main__":
+    unittest.main()
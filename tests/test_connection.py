@@ -0,0 +1,69 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from data.connection import ConnectionManager
+
+class ConnectionManagerTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "test.db")
+        self.manager = ConnectionManager()
+        self.addCleanup(self.manager.close_all)
+
+    def connection_in_thread(self) -> sqlite3.Connection:
+        connections = []
+        thread = threading.Thread(target=lambda: connections.append(self.manager.get_connection(self.path)))
+        thread.start()
+        thread.join()
+        return connections[0]
+
+    def test_thread_reuses_one_tuned_connection(self):
+        conn = self.manager.get_connection(self.path)
+        self.assertIs(self.manager.get_connection(self.path), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone()[0], 1)  # NORMAL
+        self.assertEqual(conn.execute("PRAGMA temp_store").fetchone()[0], 2)  # MEMORY
+
+    def test_threads_get_their_own_connections(self):
+        conn = self.manager.get_connection(self.path)
+        self.assertIsNot(self.connection_in_thread(), conn)
+        self.assertEqual(self.manager.get_metrics()[self.path]["opened"], 2)
+
+    def test_connections_of_exited_threads_are_closed(self):
+        self.connection_in_thread()
+        self.manager.get_connection(os.path.join(self.tmp.name, "other.db"))  # Opening prunes
+        metrics = self.manager.get_metrics()[self.path]
+        self.assertEqual(metrics["closed"], 1)
+        self.assertEqual(metrics["open_connections"], 0)
+
+    def test_unfinished_transaction_is_rolled_back_on_checkout(self):
+        conn = self.manager.get_connection(self.path)
+        conn.execute("CREATE TABLE items (value INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO items VALUES (1)")  # Caller fails before committing
+
+        conn = self.manager.get_connection(self.path)
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 0)
+        self.assertEqual(self.manager.get_metrics()[self.path]["rollbacks"], 1)
+
+    def test_statements_are_timed(self):
+        conn = self.manager.get_connection(self.path)
+        conn.execute("CREATE TABLE items (value INTEGER)")
+        before = self.manager.get_metrics()[self.path]["statements"]["count"]
+        conn.execute("SELECT 1")
+        conn.cursor().executemany("INSERT INTO items VALUES (?)", [(1,), (2,)])
+        self.assertEqual(self.manager.get_metrics()[self.path]["statements"]["count"], before + 2)
+
+    def test_close_all_reopens_on_next_use(self):
+        conn = self.manager.get_connection(self.path)
+        self.manager.close_all()
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        self.assertEqual(self.manager.get_connection(self.path).execute("SELECT 1").fetchone()[0], 1)
+
+if __name__ == "__main__":
+    unittest.main()
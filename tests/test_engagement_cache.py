@@ -0,0 +1,189 @@
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import datetime, timedelta
+from data.cache import BULK_CHUNK_SIZE, EngagementCache
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "cache.db")
+
+    def create_cache(self, **options) -> EngagementCache:
+        cache = EngagementCache(cache_path=self.path, sweep_interval=0, **options)
+        self.addCleanup(cache.stop_sweeper)
+        return cache
+
+    def expire(self, cache: EngagementCache, *keys: str):
+        """Backdate expiry of keys on disk and drop them from memory"""
+        with cache.get_connection() as conn:
+            conn.executemany(
+                'UPDATE engagement_cache SET expires_at = ? WHERE key = ?',
+                [(int(time.time()) - 1, key) for key in keys]
+            )
+        for key in keys:
+            cache.entries.pop(key, None)
+
+class EngagementCacheTest(CacheTestCase):
+    def test_row_counter_follows_inserts_upserts_and_deletes(self):
+        cache = self.create_cache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 3)  # Upsert must not count twice
+        self.assertEqual(cache.get_metrics()["total_entries"], 2)
+        cache.delete("b")
+        self.assertEqual(cache.get_metrics()["total_entries"], 1)
+        self.assertNotIn("expired_entries", cache.get_metrics())
+
+    def test_expired_rows_are_hidden_and_swept_in_batches(self):
+        cache = self.create_cache(sweep_batch_size=2)
+        for index in range(5):
+            cache.set(f"old-{index}", index)
+        cache.set("fresh", "value")
+        self.expire(cache, *[f"old-{index}" for index in range(5)])
+
+        self.assertIsNone(cache.get("old-0"))
+        self.assertEqual(cache.sweep_batch(int(time.time())), 2)
+        self.assertEqual(cache.sweep_expired(), 3)
+        self.assertEqual(cache.get_metrics()["total_entries"], 1)
+        self.assertEqual(cache.stats["swept"], 5)
+        self.assertEqual(cache.get("fresh"), "value")
+
+    def test_sweep_stops_after_max_batches(self):
+        cache = self.create_cache(sweep_batch_size=2)
+        for index in range(5):
+            cache.set(f"old-{index}", index)
+        self.expire(cache, *[f"old-{index}" for index in range(5)])
+        self.assertEqual(cache.sweep_expired(max_batches=1), 2)
+
+    def test_legacy_schema_is_migrated_keeping_unexpired_rows(self):
+        now = datetime.now()
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE engagement_cache (key TEXT PRIMARY KEY, value TEXT, timestamp TEXT, expiry TEXT)')
+        conn.executemany('INSERT INTO engagement_cache VALUES (?, ?, ?, ?)', [
+            ("live", '"kept"', now.isoformat(), (now + timedelta(hours=1)).isoformat()),
+            ("stale", '"dropped"', now.isoformat(), (now - timedelta(hours=1)).isoformat()),
+            ("broken", '"dropped"', now.isoformat(), "not a date")
+        ])
+        conn.commit()
+        conn.close()
+
+        cache = self.create_cache()
+        self.assertEqual(cache.stats["migrated"], 1)
+        self.assertEqual(cache.get("live"), "kept")
+        self.assertIsNone(cache.get("stale"))
+        self.assertEqual(cache.get_metrics()["total_entries"], 1)
+
+class MemoryTierTest(CacheTestCase):
+    def test_least_recently_used_entries_are_evicted(self):
+        cache = self.create_cache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(list(cache.entries), ["a", "c"])
+        self.assertEqual(cache.stats["memory_evictions"], 1)
+
+    def test_evicted_entry_is_served_from_disk_and_promoted(self):
+        cache = self.create_cache(max_entries=1)
+        cache.set("a", {"score": 1})
+        cache.set("b", {"score": 2})
+        self.assertEqual(cache.get("a"), {"score": 1})
+        self.assertEqual(cache.stats["disk_hits"], 1)
+        self.assertIn("a", cache.entries)
+        self.assertEqual(cache.get("a"), {"score": 1})
+        self.assertEqual(cache.stats["memory_hits"], 1)
+
+    def test_memory_hits_return_what_disk_would(self):
+        cache = self.create_cache()
+        cache.set("tuple", (1, 2))
+        self.assertEqual(cache.get("tuple"), [1, 2])  # JSON round trip, as from disk
+
+    def test_expired_memory_entry_is_dropped(self):
+        cache = self.create_cache()
+        cache.set("a", 1)
+        self.expire(cache, "a")
+        cache.entries["a"] = (time.time() - 1, 1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats["memory_expired"], 1)
+        self.assertNotIn("a", cache.entries)
+
+    def test_delete_and_clear_expired_cover_both_tiers(self):
+        cache = self.create_cache()
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.delete("a")
+        self.assertIsNone(cache.get("a"))
+        self.expire(cache, "b")
+        cache.entries["b"] = (time.time() - 1, 2)
+        self.assertEqual(cache.clear_expired(), 1)
+        self.assertEqual(cache.entries, {})
+
+    def test_metrics_report_each_tier(self):
+        cache = self.create_cache(max_entries=1)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("b")
+        cache.get("a")
+        cache.get("missing")
+        metrics = cache.get_metrics()
+        self.assertEqual(metrics["memory"]["hits"], 1)
+        self.assertEqual(metrics["disk"]["hits"], 1)
+        self.assertEqual(metrics["misses"], 1)
+        self.assertAlmostEqual(metrics["hit_rate"], 2 / 3)
+        self.assertEqual(metrics["memory"]["capacity"], 1)
+
+class BulkOperationsTest(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        # Spans several IN-list chunks, with a partial last chunk
+        self.items = {f"user-{index}": {"score": index} for index in range(BULK_CHUNK_SIZE * 2 + 7)}
+
+    def test_set_many_then_get_many_from_disk(self):
+        self.create_cache().set_many(self.items)
+        cache = self.create_cache()  # Empty memory tier
+        self.assertEqual(cache.get_many(self.items), self.items)
+        self.assertEqual(cache.stats["disk_hits"], len(self.items))
+        self.assertEqual(cache.get_metrics()["total_entries"], len(self.items))
+
+    def test_get_many_mixes_tiers_and_skips_missing_keys(self):
+        cache = self.create_cache(max_entries=BULK_CHUNK_SIZE)
+        cache.set_many(self.items)
+        found = cache.get_many([*self.items, "unknown", "user-0"])
+        self.assertEqual(found, self.items)
+        self.assertEqual(cache.stats["memory_hits"], BULK_CHUNK_SIZE)
+        self.assertEqual(cache.stats["disk_misses"], 1)
+
+    def test_get_many_hides_expired_rows(self):
+        cache = self.create_cache()
+        cache.set_many(self.items)
+        self.expire(cache, "user-1", f"user-{BULK_CHUNK_SIZE + 1}")
+        found = cache.get_many(self.items)
+        self.assertEqual(len(found), len(self.items) - 2)
+        self.assertNotIn("user-1", found)
+
+    def test_set_many_applies_per_key_expiries(self):
+        cache = self.create_cache()
+        cache.set_many({"short": 1, "long": 2}, expiry=3600, expiries={"short": 5})
+        rows = dict(cache.get_connection().execute('SELECT key, expires_at - updated_at FROM engagement_cache'))
+        self.assertEqual(rows, {"short": 5, "long": 3600})
+
+    def test_set_many_skips_values_that_cannot_be_encoded(self):
+        cache = self.create_cache()
+        cache.set_many({"ok": 1, "bad": object()})
+        self.assertEqual(cache.get_many(["ok", "bad"]), {"ok": 1})
+
+    def test_delete_many_removes_from_both_tiers(self):
+        cache = self.create_cache()
+        cache.set_many(self.items)
+        *removed, kept = self.items
+        cache.delete_many(removed)
+        self.assertEqual(cache.get_many(self.items), {kept: self.items[kept]})
+        self.assertEqual(cache.get_metrics()["total_entries"], 1)
+        self.assertEqual(len(cache.entries), 1)
+
+if __name__ == "__main__":
+    unittest.main()
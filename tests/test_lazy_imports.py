@@ -0,0 +1,44 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROVIDER_SDKS = ("openai", "anthropic", "groq", "google.generativeai")
+
+# Prints the provider SDKs loaded by the import, or the missing dependency
+PROBE = """
+import json, sys
+try:
+    import {module}
+except ModuleNotFoundError as e:
+    print(json.dumps({{"missing": e.name}}))
+else:
+    print(json.dumps({{"loaded": [name for name in {sdks!r} if name in sys.modules]}}))
+"""
+
+class LazyImportTest(unittest.TestCase):
+    def loaded_sdks(self, module: str):
+        """Import module in a fresh interpreter and report the SDKs it pulled in"""
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE.format(module=module, sdks=PROVIDER_SDKS)],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        if "missing" in result:
+            self.skipTest(f"{module} dependencies missing: {result['missing']}")
+        return result["loaded"]
+
+    def test_importing_framework_loads_no_provider_sdk(self):
+        self.assertEqual(self.loaded_sdks("utils.framework"), [])
+
+    def test_importing_llm_interface_loads_no_provider_sdk(self):
+        self.assertEqual(self.loaded_sdks("llm.llm_interface"), [])
+
+if __name__ == "__main__":
+    unittest.main()
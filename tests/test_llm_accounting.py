@@ -0,0 +1,81 @@
+import os
+import unittest
+from unittest import mock
+from llm.accounting import UNATTRIBUTED, LLMAccounting, load_prices
+from llm.providers import Completion, LLMProvider, LLMProviderManager, PROVIDER_MODELS
+
+PRICES = {"cheap": (1.0, 2.0), "pricey": (10.0, 20.0)}
+
+class LLMAccountingTest(unittest.TestCase):
+    def setUp(self):
+        self.accounting = LLMAccounting(window=60, slots=6, prices=PRICES)
+
+    def test_cost_uses_per_million_token_prices(self):
+        self.assertAlmostEqual(self.accounting.get_cost("cheap", 1_000_000, 500_000), 2.0)
+        self.assertEqual(self.accounting.get_cost("unknown", 1000, 1000), 0.0)
+
+    def test_usage_is_grouped_by_agent_and_provider(self):
+        self.accounting.record("habits", "openai", "cheap", 0.5, 100, 50)
+        self.accounting.record("habits", "anthropic", "pricey", 1.5, 100, 50)
+        self.accounting.record("goals", "openai", "cheap", 1.0, 10, 5, error=True)
+        metrics = self.accounting.get_metrics()
+
+        habits = metrics["by_agent"]["habits"]
+        self.assertEqual(habits["requests"], 2)
+        self.assertEqual(habits["prompt_tokens"], 200)
+        self.assertAlmostEqual(habits["latency_mean"], 1.0)
+        self.assertEqual(metrics["by_provider"]["openai"]["errors"], 1)
+        self.assertEqual(metrics["by_provider"]["openai"]["error_rate"], 0.5)
+
+    def test_hottest_paths_are_ordered_by_cost(self):
+        self.accounting.record("habits", "openai", "cheap", 0.5, 100, 50)
+        self.accounting.record("goals", "anthropic", "pricey", 0.5, 100, 50)
+        hottest = self.accounting.get_metrics(top=1)["hottest"]
+        self.assertEqual([(path["agent"], path["model"]) for path in hottest], [("goals", "pricey")])
+
+    def test_calls_without_agent_are_unattributed(self):
+        self.accounting.record(None, "openai", "cheap", 0.1)
+        self.assertIn(UNATTRIBUTED, self.accounting.get_metrics()["by_agent"])
+
+    def test_rolling_window_expires_but_totals_remain(self):
+        with mock.patch("llm.accounting.time.time", return_value=1000.0):
+            self.accounting.record("habits", "openai", "cheap", 0.5, 100, 50)
+        with mock.patch("llm.accounting.time.time", return_value=1100.0):
+            metrics = self.accounting.get_metrics()
+        self.assertEqual(metrics["by_agent"], {})
+        self.assertEqual(metrics["totals"]["habits/openai/cheap"]["prompt_tokens"], 100)
+
+    def test_prices_can_be_overridden_from_environment(self):
+        with mock.patch.dict(os.environ, {"LLM_PRICES": '{"cheap": [3, 4]}'}):
+            self.assertEqual(load_prices()["cheap"], (3, 4))
+
+class ProviderAccountingTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.manager = LLMProviderManager(accounting=LLMAccounting(prices={}))
+        self.manager.configured[LLMProvider.OPENAI] = "test-key"
+        self.failures = []
+
+        async def generate_openai(prompt, max_tokens, temperature, response_format):
+            if self.failures:
+                raise self.failures.pop()
+            return Completion(prompt.upper(), 10, 5)
+
+        self.manager._generate_openai = generate_openai
+
+    async def test_generations_are_accounted_to_the_calling_agent(self):
+        for _ in range(2):
+            await self.manager.generate("hello", LLMProvider.OPENAI, use_cache=False, agent="habits")
+        self.failures.append(ValueError("bad prompt"))
+        with self.assertRaises(ValueError):
+            await self.manager.generate("hello", LLMProvider.OPENAI, use_cache=False, agent="habits")
+
+        usage = self.manager.accounting.get_metrics()["by_agent"]["habits"]
+        self.assertEqual(usage["requests"], 3)
+        self.assertEqual(usage["errors"], 1)
+        self.assertEqual(usage["prompt_tokens"], 20)
+        self.assertEqual(usage["completion_tokens"], 10)
+        path = self.manager.accounting.get_metrics()["hottest"][0]
+        self.assertEqual((path["provider"], path["model"]), (LLMProvider.OPENAI.value, PROVIDER_MODELS[LLMProvider.OPENAI]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from llm.batch import build_batch_prompt, parse_batch_response
+from llm.providers import LLMProviderManager
+
+class ParseBatchResponseTest(unittest.TestCase):
+    def test_results_object_is_extracted_from_prose_and_fences(self):
+        response = 'Sure!\n```json\n{"results": {"0": "a", "1": "b"}}\n```'
+        self.assertEqual(parse_batch_response(response), {"0": "a", "1": "b"})
+
+    def test_bare_mapping_is_accepted_and_non_text_values_dropped(self):
+        self.assertEqual(parse_batch_response('{"0": "a", "1": 2, "2": null}'), {"0": "a"})
+
+    def test_malformed_responses_yield_no_results(self):
+        for response in ("", "no json here", '{"results": [1, 2]}', '{"results": {"0": "a"'):
+            self.assertEqual(parse_batch_response(response), {})
+
+class GenerateBatchTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.manager = LLMProviderManager()
+        self.requests = []
+        self.skip = set()  # Item values the fake model leaves out of batch answers
+        self.manager.generate = self.generate
+
+    async def generate(self, prompt, provider=None, max_tokens=500, temperature=0.7, **options):
+        """Fake model echoing each input upper-cased"""
+        if "Inputs:\n" not in prompt:
+            self.requests.append(1)
+            return json.loads(prompt.split("Input:\n", 1)[1]).upper()
+        items = json.loads(prompt.split("Inputs:\n", 1)[1])
+        self.requests.append(len(items))
+        self.assertEqual(options.get("response_format"), {"type": "json_object"})
+        return json.dumps({"results": {key: value.upper() for key, value in items.items() if value not in self.skip}})
+
+    async def test_items_are_packed_into_batches(self):
+        items = [f"item-{index}" for index in range(45)]
+        results = await self.manager.generate_batch("Shout", items, batch_size=20)
+        self.assertEqual(results, [item.upper() for item in items])
+        self.assertEqual(self.requests, [20, 20, 5])
+
+    async def test_missing_items_are_retried_in_smaller_requests(self):
+        self.skip = {"item-3"}
+        items = [f"item-{index}" for index in range(8)]
+        results = await self.manager.generate_batch("Shout", items, batch_size=8)
+        self.assertEqual(results, [item.upper() for item in items])
+        self.assertEqual(self.requests, [8, 1])  # A lone item goes out as a plain prompt
+
+    async def test_rejected_items_end_as_none(self):
+        items = ["good", "bad", "fine"]
+        results = await self.manager.generate_batch(
+            "Shout", items, batch_size=4, validate=lambda item, text: item != "bad"
+        )
+        self.assertEqual(results, ["GOOD", None, "FINE"])
+        self.assertEqual(self.requests, [3, 1, 1])
+
+    async def test_failed_request_only_retries_its_items(self):
+        failing = {"calls": 0}
+        generate = self.generate
+
+        async def flaky(prompt, *args, **options):
+            failing["calls"] += 1
+            if failing["calls"] == 1:
+                raise RuntimeError("provider down")
+            return await generate(prompt, *args, **options)
+
+        self.manager.generate = flaky
+        items = [f"item-{index}" for index in range(4)]
+        results = await self.manager.generate_batch("Shout", items, batch_size=2)
+        self.assertEqual(results, [item.upper() for item in items])
+
+    def test_batch_prompt_lists_every_item_id(self):
+        prompt = build_batch_prompt("Shout", {"0": "a", "1": "b"})
+        self.assertEqual(json.loads(prompt.split("Inputs:\n", 1)[1]), {"0": "a", "1": "b"})
+
+if __name__ == "__main__":
+    unittest.main()
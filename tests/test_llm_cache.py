@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from llm.cache import LLMResponseCache
+
+class SharedGenerationTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.cache = LLMResponseCache()
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def generate(self) -> str:
+        self.calls += 1
+        await self.release.wait()
+        return "response"
+
+    async def test_identical_requests_share_one_generation(self):
+        tasks = [asyncio.create_task(self.cache.get_or_generate("key", self.generate)) for _ in range(5)]
+        await asyncio.sleep(0)
+        self.release.set()
+        self.assertEqual(await asyncio.gather(*tasks), ["response"] * 5)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats["deduplicated"], 4)
+        self.assertEqual(self.cache.get("key"), "response")
+        self.assertEqual(self.cache.in_flight, {})
+        self.assertEqual(self.cache.waiters, {})
+
+    async def test_cancelled_leader_does_not_cancel_followers(self):
+        leader = asyncio.create_task(self.cache.get_or_generate("key", self.generate))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(self.cache.get_or_generate("key", self.generate))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        self.assertTrue(leader.cancelled())
+        self.release.set()
+
+        self.assertEqual(await follower, "response")
+        self.assertEqual(self.calls, 1)
+
+    async def test_generation_is_cancelled_when_every_caller_gives_up(self):
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def generate():
+            started.set()
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        callers = [asyncio.create_task(self.cache.get_or_generate("key", generate)) for _ in range(2)]
+        await started.wait()
+        for caller in callers:
+            caller.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        await asyncio.sleep(0)
+        self.assertEqual(self.cache.in_flight, {})
+        self.assertEqual(self.cache.waiters, {})
+
+    async def test_failure_reaches_every_caller_and_is_not_cached(self):
+        async def generate():
+            await self.release.wait()
+            raise RuntimeError("provider down")
+
+        tasks = [asyncio.create_task(self.cache.get_or_generate("key", generate)) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertIsNone(self.cache.get("key"))
+        self.assertEqual(self.cache.in_flight, {})
+
+class CacheTiersTest(unittest.TestCase):
+    def test_lru_eviction_and_ttl(self):
+        cache = LLMResponseCache(max_entries=2, ttl=0.05)
+        cache.set("a", "1")
+        cache.set("b", "2")
+        cache.get("a")
+        cache.set("c", "3")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), "1")
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as workdir:
+            path = os.path.join(workdir, "llm_cache.db")
+            LLMResponseCache(persist_path=path).set("key", "response", 0.5)
+            cache = LLMResponseCache(persist_path=path)
+            self.assertEqual(cache.get("key"), "response")
+            self.assertEqual(cache.stats["disk_hits"], 1)
+            self.assertEqual(cache.stats["latency_saved"], 0.5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import sys
+import types
+import unittest
+from unittest import mock
+from llm.providers import LLMProvider, LLMProviderManager
+
+class StubClient:
+    """Records constructor arguments and whether the client was closed"""
+    created = []
+
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        self.closed = False
+        StubClient.created.append(self)
+
+class StubSDKClient(StubClient):
+    async def close(self):
+        self.closed = True
+
+class StubHTTPClient(StubClient):
+    async def aclose(self):
+        self.closed = True
+
+def stub_modules():
+    """Stand-ins for httpx and the provider SDKs"""
+    httpx = types.ModuleType("httpx")
+    httpx.AsyncClient = StubHTTPClient
+    httpx.Timeout = lambda timeout, connect: {"timeout": timeout, "connect": connect}
+    httpx.Limits = lambda **limits: limits
+
+    openai = types.ModuleType("openai")
+    openai.AsyncOpenAI = type("AsyncOpenAI", (StubSDKClient,), {})
+    anthropic = types.ModuleType("anthropic")
+    anthropic.AsyncAnthropic = type("AsyncAnthropic", (StubSDKClient,), {})
+
+    google = types.ModuleType("google")
+    genai = types.ModuleType("google.generativeai")
+    genai.configure = mock.Mock()
+    genai.GenerativeModel = type("GenerativeModel", (StubClient,), {})
+    google.generativeai = genai
+    return {
+        "httpx": httpx,
+        "openai": openai,
+        "anthropic": anthropic,
+        "google": google,
+        "google.generativeai": genai
+    }
+
+class ProviderClientTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        StubClient.created.clear()
+        patcher = mock.patch.dict(sys.modules, stub_modules())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = LLMProviderManager(timeout=12.0, connect_timeout=3.0, max_connections=7)
+        self.manager.configured = {provider: f"{provider.name}-key" for provider in LLMProvider}
+
+    def assert_pooled(self, http_client):
+        self.assertEqual(http_client.kwargs["timeout"], {"timeout": 12.0, "connect": 3.0})
+        self.assertEqual(http_client.kwargs["limits"], {"max_connections": 7, "max_keepalive_connections": 7})
+
+    def test_clients_are_created_once_per_provider(self):
+        for provider in LLMProvider:
+            self.assertIs(self.manager.get_client(provider), self.manager.get_client(provider))
+        # One client each, plus the HTTP pools the OpenAI and Anthropic SDKs are given
+        self.assertEqual(len(StubClient.created), len(LLMProvider) + 2)
+
+    def test_sdk_clients_use_configured_pool_and_no_sdk_retries(self):
+        for provider in (LLMProvider.OPENAI, LLMProvider.ANTHROPIC):
+            client = self.manager.get_client(provider)
+            self.assertEqual(client.kwargs["api_key"], f"{provider.name}-key")
+            self.assertEqual((client.kwargs["timeout"], client.kwargs["max_retries"]), (12.0, 0))
+            self.assert_pooled(client.kwargs["http_client"])
+
+    def test_http_providers_get_pooled_clients_with_auth(self):
+        client = self.manager.get_client(LLMProvider.GROQ)
+        self.assert_pooled(client)
+        self.assertEqual(client.kwargs["base_url"], "https://api.groq.com/openai/v1")
+        self.assertEqual(client.kwargs["headers"], {"Authorization": "Bearer GROQ-key"})
+
+    async def test_close_releases_every_created_client(self):
+        clients = [self.manager.get_client(provider) for provider in LLMProvider if provider != LLMProvider.GEMINI]
+        await self.manager.close()
+        self.assertTrue(all(client.closed for client in clients))
+
+if __name__ == "__main__":
+    unittest.main()
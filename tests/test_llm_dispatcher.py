@@ -0,0 +1,89 @@
+import asyncio
+import unittest
+from llm.dispatcher import LLMDispatcher
+
+class FakeManager:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.requests = []
+        self.running = 0
+        self.peak = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt, **options):
+        self.requests.append((prompt, options))
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.running -= 1
+        if prompt == "fail":
+            raise RuntimeError("provider down")
+        return prompt.upper()
+
+class LLMDispatcherTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.manager = FakeManager()
+        self.dispatcher = LLMDispatcher(self.manager, window=0.01, max_batch_size=4, max_concurrency=2)
+        await self.dispatcher.start()
+
+    async def asyncTearDown(self):
+        await self.dispatcher.stop()
+
+    async def test_requests_within_window_share_a_batch(self):
+        responses = await asyncio.gather(*(self.dispatcher.generate(f"p{index}", agent="a") for index in range(3)))
+        self.assertEqual(responses, ["P0", "P1", "P2"])
+        self.assertEqual(self.dispatcher.stats["batches"], 1)
+        self.assertEqual(self.manager.requests[0][1]["agent"], "a")
+
+    async def test_batches_are_capped_at_max_batch_size(self):
+        await asyncio.gather(*(self.dispatcher.generate(f"p{index}") for index in range(10)))
+        self.assertEqual(self.dispatcher.stats["batches"], 3)
+        self.assertEqual(self.dispatcher.get_metrics()["batch_size"]["max"], 4)
+
+    async def test_concurrency_is_limited_across_batches(self):
+        self.manager.delay = 0.01
+        await asyncio.gather(*(self.dispatcher.generate(f"p{index}") for index in range(6)))
+        self.assertEqual(self.manager.peak, 2)
+        self.assertEqual(self.dispatcher.stats["completed"], 6)
+
+    async def test_failure_reaches_only_its_caller(self):
+        results = await asyncio.gather(
+            self.dispatcher.generate("ok"),
+            self.dispatcher.generate("fail"),
+            return_exceptions=True
+        )
+        self.assertEqual(results[0], "OK")
+        self.assertIsInstance(results[1], RuntimeError)
+        self.assertEqual(self.dispatcher.stats["failed"], 1)
+
+    async def test_caller_cancelling_cancels_its_request(self):
+        self.manager.delay = 1.0
+        caller = asyncio.create_task(self.dispatcher.generate("slow"))
+        await asyncio.sleep(0.05)
+        caller.cancel()
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.manager.cancelled, 1)
+        self.assertEqual(self.dispatcher.get_metrics()["in_flight"], 0)
+
+    async def test_stop_cancels_queued_requests(self):
+        await self.dispatcher.stop()
+        future = self.dispatcher.submit("queued")
+        await self.dispatcher.stop()
+        self.assertTrue(future.cancelled())
+
+    async def test_stop_at_concurrency_limit_cancels_undispatched_batch(self):
+        self.manager.delay = 0.1
+        futures = [self.dispatcher.submit(f"p{index}") for index in range(4)]
+        await asyncio.sleep(0.05)  # Two running, the rest of the batch waits on the semaphore
+        await self.dispatcher.stop()
+        self.assertEqual([future.result() for future in futures[:2]], ["P0", "P1"])
+        self.assertTrue(all(future.cancelled() for future in futures[2:]))
+        self.assertEqual(self.dispatcher.stats["cancelled"], 2)
+
+if __name__ == "__main__":
+    unittest.main()
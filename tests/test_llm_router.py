@@ -0,0 +1,79 @@
+import asyncio
+import unittest
+from llm.router import LLMRouter, ProviderHealth
+
+class ProviderHealthTest(unittest.TestCase):
+    def test_latency_and_error_rate_are_moving_averages(self):
+        health = ProviderHealth(alpha=0.5)
+        health.record_success(1.0)
+        health.record_success(3.0)
+        self.assertEqual(health.latency, 2.0)
+        health.record_failure()
+        self.assertEqual(health.error_rate, 0.5)
+        health.record_abandoned(10.0)
+        self.assertEqual(health.latency, 6.0)
+
+class LLMRouterTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.router = LLMRouter(alpha=0.5, default_hedge_delay=0.02)
+        self.calls = []
+
+    def provider_call(self, delays, failing=()):
+        """Call that sleeps per-provider and fails for the failing ones"""
+        async def call(provider):
+            self.calls.append(provider)
+            await asyncio.sleep(delays.get(provider, 0))
+            if provider in failing:
+                raise RuntimeError(f"{provider} down")
+            return provider
+        return call
+
+    def test_rank_prefers_healthy_then_fast_providers(self):
+        self.router.get_health("slow").record_success(2.0)
+        self.router.get_health("fast").record_success(0.5)
+        broken = self.router.get_health("broken")
+        broken.record_success(0.1)
+        broken.record_failure()
+        self.assertEqual(self.router.rank(["broken", "slow", "fast", "new"]), ["new", "fast", "slow", "broken"])
+
+    def test_unhealthy_provider_is_probed_after_recovery_time(self):
+        router = LLMRouter(recovery_time=0)
+        router.get_health("broken").record_failure()
+        self.assertTrue(router.is_healthy("broken"))
+
+    async def test_failover_to_next_provider(self):
+        result = await self.router.route(["a", "b"], self.provider_call({}, failing={"a"}))
+        self.assertEqual(result, "b")
+        self.assertEqual(self.router.stats["failovers"], 1)
+        self.assertEqual(self.router.get_health("a").failures, 1)
+
+    async def test_error_is_raised_when_every_provider_fails(self):
+        with self.assertRaises(RuntimeError):
+            await self.router.route(["a", "b"], self.provider_call({}, failing={"a", "b"}))
+
+    async def test_slow_primary_is_hedged_and_loser_cancelled(self):
+        result = await self.router.route(["a", "b"], self.provider_call({"a": 1.0}))
+        self.assertEqual(result, "b")
+        self.assertEqual(self.router.stats["hedged"], 1)
+        self.assertEqual(self.router.stats["hedge_wins"], 1)
+        await asyncio.sleep(0)  # Let the cancelled primary record itself
+        self.assertGreaterEqual(self.router.get_health("a").latency, 0.02)  # Abandoned, counted as slow
+
+    async def test_fast_primary_is_not_hedged(self):
+        self.assertEqual(await self.router.route(["a", "b"], self.provider_call({})), "a")
+        self.assertEqual(self.calls, ["a"])
+        self.assertEqual(self.router.stats["hedged"], 0)
+
+    async def test_hedge_delay_uses_p95_once_enough_samples(self):
+        router = LLMRouter(min_samples=3, default_hedge_delay=5.0)
+        self.assertEqual(router.get_hedge_delay("a"), 5.0)
+        for _ in range(3):
+            router.get_health("a").record_success(0.1)
+        self.assertLess(router.get_hedge_delay("a"), 1.0)
+
+    async def test_route_without_providers_fails(self):
+        with self.assertRaises(ValueError):
+            await self.router.route([], self.provider_call({}))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+from llm.accounting import LLMAccounting
+from llm.cache import LLMResponseCache
+from llm.providers import LLMProvider, LLMProviderManager, StreamChunk
+
+class FakeGemini:
+    def __init__(self):
+        self.generation_configs = []
+
+    async def generate_content_async(self, prompt, generation_config, stream, request_options):
+        self.generation_configs.append(generation_config)
+
+        async def events():
+            return
+            yield
+
+        return events()
+
+class GenerateStreamTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.manager = LLMProviderManager(cache=LLMResponseCache(), accounting=LLMAccounting(prices={}))
+        self.manager.configured = {LLMProvider.OPENAI: "test-key", LLMProvider.GEMINI: "test-key"}
+        self.opened = []
+        self.fake_stream(LLMProvider.OPENAI, ["Hel", "lo"])
+        self.fake_stream(LLMProvider.GEMINI, ["Hi"])
+
+    def fake_stream(self, provider, parts, error=None, stall=False):
+        """Replace provider stream with one yielding parts, then failing or stalling if asked"""
+        async def stream(prompt, max_tokens, temperature, response_format):
+            self.opened.append(provider)
+            for part in parts:
+                yield StreamChunk(provider, part)
+            if error is not None:
+                raise error
+            if stall:
+                await asyncio.sleep(10)
+            yield StreamChunk(provider, "", done=True, finish_reason="stop", prompt_tokens=3, completion_tokens=len(parts))
+
+        setattr(self.manager, f"_stream_{provider.name.lower()}", stream)
+
+    async def collect(self, **options):
+        return [chunk async for chunk in self.manager.generate_stream("hello", **options)]
+
+    async def test_chunks_are_indexed_and_last_carries_usage(self):
+        chunks = await self.collect(provider=LLMProvider.OPENAI)
+        self.assertEqual([chunk.index for chunk in chunks], [0, 1, 2])
+        self.assertEqual("".join(chunk.text for chunk in chunks), "Hello")
+        self.assertEqual([chunk.done for chunk in chunks], [False, False, True])
+        self.assertEqual((chunks[-1].finish_reason, chunks[-1].completion_tokens), ("stop", 2))
+
+    async def test_fails_over_before_the_first_chunk(self):
+        first, second = self.manager.router.rank(list(self.manager.configured))
+        self.fake_stream(first, [], error=RuntimeError("down"))
+        chunks = await self.collect()
+        self.assertEqual(self.opened, [first, second])
+        self.assertEqual({chunk.provider for chunk in chunks}, {second})
+        self.assertEqual(self.manager.router.get_health(first).failures, 1)
+
+    async def test_error_after_first_chunk_is_raised(self):
+        first, _ = self.manager.router.rank(list(self.manager.configured))
+        self.fake_stream(first, ["partial"], error=RuntimeError("down"))
+        with self.assertRaises(RuntimeError):
+            await self.collect()
+        self.assertEqual(self.opened, [first])
+
+    async def test_completed_stream_is_cached_as_joined_text(self):
+        await self.collect(provider=LLMProvider.OPENAI)
+        self.assertEqual(await self.manager.generate("hello", LLMProvider.OPENAI), "Hello")
+        cached = await self.collect(provider=LLMProvider.OPENAI)
+        self.assertEqual([(chunk.text, chunk.done, chunk.finish_reason) for chunk in cached], [("Hello", True, "cached")])
+        self.assertEqual(self.opened, [LLMProvider.OPENAI])
+
+    async def test_cancelled_stream_is_not_counted_as_error(self):
+        self.fake_stream(LLMProvider.OPENAI, ["Hel"], stall=True)
+        consumer = asyncio.create_task(self.collect(provider=LLMProvider.OPENAI, agent="habits"))
+        await asyncio.sleep(0.01)
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        usage = self.manager.accounting.get_metrics()["by_agent"]["habits"]
+        self.assertEqual((usage["requests"], usage["errors"]), (1, 0))
+
+    async def test_gemini_stream_honours_json_response_format(self):
+        gemini = self.manager.providers[LLMProvider.GEMINI] = FakeGemini()
+        del self.manager._stream_gemini  # Use the real Gemini stream against the fake client
+        await self.collect(provider=LLMProvider.GEMINI, response_format={"type": "json_object"})
+        self.assertEqual(gemini.generation_configs[0]["response_mime_type"], "application/json")
+
+if __name__ == "__main__":
+    unittest.main()
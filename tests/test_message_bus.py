@@ -0,0 +1,184 @@
+import asyncio
+import unittest
+from utils.message_bus import DEFAULT_COALESCE_WINDOW, Mailbox, MessageBus
+
+def message(index: int, priority: str):
+    return {"type": "update", "index": index, "priority": priority}
+
+class MailboxLaneTest(unittest.IsolatedAsyncioTestCase):
+    async def fill(self, mailbox: Mailbox, counts):
+        for priority, count in counts.items():
+            for index in range(count):
+                await mailbox.put(message(index, priority), priority)
+
+    async def test_strict_scheduling_drains_higher_lanes_first(self):
+        mailbox = Mailbox("agent")
+        await self.fill(mailbox, {"low": 2, "normal": 2, "high": 2})
+        batch = mailbox.get_batch(4)
+        self.assertEqual([m["priority"] for m in batch], ["high", "high", "normal", "normal"])
+        self.assertEqual(len(mailbox), 2)
+
+    async def test_unknown_priority_uses_default_lane(self):
+        mailbox = Mailbox("agent")
+        await mailbox.put({"type": "update"}, "urgent")
+        self.assertEqual(len(mailbox.lanes["normal"]), 1)
+
+    async def test_weighted_scheduling_follows_lane_weights(self):
+        mailbox = Mailbox("agent", scheduling="weighted", weights={"high": 4, "normal": 2, "low": 1})
+        await self.fill(mailbox, {"high": 100, "normal": 100, "low": 100})
+        batch = mailbox.get_batch(70)
+        counts = {p: sum(m["priority"] == p for m in batch) for p in ("high", "normal", "low")}
+        self.assertEqual(counts, {"high": 40, "normal": 20, "low": 10})
+
+    async def test_weighted_scheduling_does_not_starve_low_lane(self):
+        mailbox = Mailbox("agent", scheduling="weighted")
+        await self.fill(mailbox, {"high": 500, "low": 5})
+        batch = mailbox.get_batch(50)
+        self.assertTrue(any(m["priority"] == "low" for m in batch))
+
+    async def test_fractional_weights_make_progress(self):
+        mailbox = Mailbox("agent", scheduling="weighted", weights={"high": 0.5, "normal": 0.25, "low": 0.25})
+        await self.fill(mailbox, {"low": 3})
+        self.assertEqual(len(mailbox.get_batch(10)), 3)
+
+    async def test_round_without_progress_ends_batch(self):
+        mailbox = Mailbox("agent", scheduling="weighted")
+        await self.fill(mailbox, {"low": 3})
+        mailbox.quanta["low"] = 0  # A lane that can never earn credit
+        self.assertEqual(mailbox.get_batch(10), [])
+        self.assertEqual(len(mailbox), 3)
+
+    def test_non_positive_weights_are_rejected(self):
+        for weight in (0, -1, float("nan")):
+            with self.assertRaises(ValueError):
+                Mailbox("agent", scheduling="weighted", weights={"low": weight})
+
+    async def test_full_lane_blocks_only_its_own_priority(self):
+        mailbox = Mailbox("agent", lane_capacity={"low": 1})
+        await mailbox.put(message(0, "low"), "low")
+        blocked = asyncio.create_task(mailbox.put(message(1, "low"), "low"))
+        await asyncio.sleep(0)
+        self.assertFalse(blocked.done())
+        await asyncio.wait_for(mailbox.put(message(0, "high"), "high"), 1)
+
+        mailbox.get_batch(10)
+        await asyncio.wait_for(blocked, 1)
+        self.assertEqual(mailbox.blocked_puts["low"], 1)
+        self.assertEqual(len(mailbox), 1)
+
+class CoalescingTest(unittest.IsolatedAsyncioTestCase):
+    def insight(self, user_id, value):
+        return {"type": "behavior_insight", "user_id": user_id, "value": value}
+
+    async def test_newer_state_replaces_queued_message_in_place(self):
+        mailbox = Mailbox("agent", coalesce_window=60)
+        await mailbox.put(self.insight(1, "old"))
+        await mailbox.put(message(0, "normal"))
+        self.assertTrue(await mailbox.put(self.insight(1, "new")))
+        batch = mailbox.get_batch(10)
+        self.assertEqual([m.get("value") for m in batch], ["new", None])
+        self.assertEqual(mailbox.get_metrics()["coalesced"], 1)
+
+    async def test_other_users_types_and_lanes_are_kept(self):
+        mailbox = Mailbox("agent", coalesce_window=60)
+        await mailbox.put(self.insight(1, "a"))
+        await mailbox.put(self.insight(2, "b"))
+        await mailbox.put({"type": "goal_update", "user_id": 1})
+        await mailbox.put({"type": "goal_update", "user_id": 1})
+        await mailbox.put(self.insight(1, "c"), "high")
+        self.assertEqual(len(mailbox), 5)
+
+    async def test_bare_mailbox_does_not_coalesce(self):
+        mailbox = Mailbox("agent")
+        await mailbox.put(self.insight(1, "old"))
+        self.assertFalse(await mailbox.put(self.insight(1, "new")))
+        self.assertEqual(len(mailbox), 2)
+
+    async def test_bus_mailboxes_coalesce_latest_state_types_by_default(self):
+        mailbox = MessageBus().register("agent")
+        self.assertEqual(mailbox.coalesce_window, DEFAULT_COALESCE_WINDOW)
+        self.assertEqual(mailbox.coalesce_types, {"behavior_insight", "engagement_pattern"})
+        await mailbox.put(self.insight(1, "old"))
+        self.assertTrue(await mailbox.put(self.insight(1, "new")))
+
+    async def test_bus_coalescing_can_be_turned_off(self):
+        mailbox = MessageBus(coalesce_window=None).register("agent")
+        await mailbox.put(self.insight(1, "old"))
+        self.assertFalse(await mailbox.put(self.insight(1, "new")))
+
+    async def test_dequeued_message_is_not_replaced(self):
+        mailbox = Mailbox("agent", coalesce_window=60)
+        await mailbox.put(self.insight(1, "old"))
+        mailbox.get_batch(10)
+        self.assertFalse(await mailbox.put(self.insight(1, "new")))
+        self.assertEqual(mailbox.coalesce_index[("normal", "behavior_insight", 1)][1]["value"], "new")
+
+    async def test_messages_older_than_window_are_not_replaced(self):
+        mailbox = Mailbox("agent", coalesce_window=0.01)
+        await mailbox.put(self.insight(1, "old"))
+        await asyncio.sleep(0.02)
+        self.assertFalse(await mailbox.put(self.insight(1, "new")))
+        self.assertEqual(len(mailbox), 2)
+
+    async def test_bus_counts_coalesced_sends(self):
+        bus = MessageBus(coalesce_window=60)
+        bus.register("agent")
+        for value in range(3):
+            await bus.send("source", "agent", self.insight(1, value))
+        self.assertEqual(bus.stats["coalesced"], 2)
+        self.assertEqual((await bus.receive("agent"))[0]["value"], 2)
+
+class MessageBusTest(unittest.IsolatedAsyncioTestCase):
+    async def test_send_delivers_envelope_with_sender(self):
+        bus = MessageBus()
+        bus.register("target")
+        self.assertTrue(await bus.send("source", "target", {"type": "update", "user_id": 1}))
+        self.assertEqual(await bus.receive("target"), [{"sender": "source", "type": "update", "user_id": 1}])
+        self.assertEqual(bus.stats["delivered"], 1)
+
+    async def test_unknown_target_is_undeliverable(self):
+        bus = MessageBus()
+        self.assertFalse(await bus.send("source", "missing", {"type": "update"}))
+        self.assertEqual(bus.stats["undeliverable"], 1)
+        self.assertEqual(await bus.receive("missing"), [])
+
+    async def test_routes_forward_messages_off_process(self):
+        bus = MessageBus()
+        forwarded = []
+
+        async def route(target, envelope):
+            forwarded.append((target, envelope["type"]))
+            return True
+
+        bus.add_route("remote", route)
+        self.assertTrue(await bus.send("source", "remote", {"type": "update"}))
+        self.assertEqual(forwarded, [("remote", "update")])
+        self.assertEqual(bus.stats["forwarded"], 1)
+
+    async def test_full_mailbox_times_out_sender(self):
+        bus = MessageBus(mailbox_size=2, send_timeout=0.01)
+        bus.register("target")
+        for index in range(2):
+            self.assertTrue(await bus.send("source", "target", message(index, "normal")))
+        self.assertFalse(await bus.send("source", "target", message(2, "normal")))
+        self.assertEqual(bus.stats["send_timeouts"], 1)
+        self.assertEqual(bus.get_metrics()["total_depth"], 2)
+
+    async def test_receive_waits_for_first_message(self):
+        bus = MessageBus()
+        bus.register("target")
+        receiving = asyncio.create_task(bus.receive("target", timeout=1))
+        await asyncio.sleep(0)
+        await bus.send("source", "target", {"type": "update"})
+        self.assertEqual(len(await receiving), 1)
+        self.assertEqual(await bus.receive("target", timeout=0.01), [])
+
+    async def test_enqueue_notifies_listeners(self):
+        mailbox = Mailbox("agent")
+        notified = []
+        mailbox.add_listener(lambda: notified.append(True))
+        await mailbox.put(message(0, "normal"))
+        self.assertEqual(notified, [True])
+
+if __name__ == "__main__":
+    unittest.main()
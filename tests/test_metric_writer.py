@@ -0,0 +1,82 @@
+import os
+import tempfile
+import time
+import unittest
+from data import models
+from data.models import EngagementMetrics, MetricWriter, get_db_connection, init_db
+
+class MetricWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "engagement.db")
+        os.environ["ENGAGEMENT_DB_PATH"] = self.db_path
+        self.addCleanup(os.environ.pop, "ENGAGEMENT_DB_PATH", None)
+        init_db()
+        self.writer = MetricWriter(flush_size=10, flush_interval=60)
+        self.writer._ensure_thread = lambda: None  # Flush explicitly
+
+    def stored_rows(self):
+        return get_db_connection().execute(
+            'SELECT metric_name, value FROM engagement_metrics ORDER BY id'
+        ).fetchall()
+
+    def test_add_rejects_non_numeric_values(self):
+        with self.assertRaises(TypeError):
+            self.writer.add("social_metrics", {"total_connections": 3})
+        self.writer.add("count", 3)
+        self.assertEqual(list(self.writer.buffer)[0][1], 3.0)
+        self.assertEqual(self.writer.get_metrics()["pending"], 1)
+
+    def test_poisoned_row_is_dropped_and_later_rows_are_written(self):
+        self.writer.add("before", 1.0)
+        self.writer.buffer.append(("poisoned", {"x": 1}, time.time()))  # Bypasses add validation
+        self.writer.add("after", 2.0)
+
+        self.assertEqual(self.writer.flush(), 2)
+        self.assertEqual(self.stored_rows(), [("before", 1.0), ("after", 2.0)])
+        self.assertEqual(self.writer.stats["rejected"], 1)
+        self.assertEqual(self.writer.get_metrics()["pending"], 0)
+
+        self.writer.add("next", 3.0)
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(self.stored_rows()[-1], ("next", 3.0))
+
+    def test_add_never_flushes_on_callers_thread(self):
+        for index in range(self.writer.flush_size * 10):
+            self.writer.add("load", index)
+        self.assertEqual(self.writer.stats["flushes"], 0)
+        self.assertEqual(self.writer.get_metrics()["pending"], 100)
+
+    def test_rows_are_kept_while_database_is_unavailable(self):
+        self.writer.add("kept", 1.0)
+        os.environ["ENGAGEMENT_DB_PATH"] = os.path.join(self.tmp.name, "missing", "engagement.db")
+        self.assertEqual(self.writer.flush(), 0)
+        self.assertEqual(self.writer.stats["failures"], 1)
+        self.assertEqual(self.writer.get_metrics()["pending"], 1)
+
+        os.environ["ENGAGEMENT_DB_PATH"] = self.db_path
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(self.stored_rows(), [("kept", 1.0)])
+
+    def test_pending_rows_are_bounded(self):
+        writer = MetricWriter(flush_size=10, max_pending=5)
+        writer._ensure_thread = lambda: None
+        for index in range(8):
+            writer.add("load", index)
+        self.assertEqual([row[1] for row in writer.buffer], [3.0, 4.0, 5.0, 6.0, 7.0])
+        self.assertEqual(writer.stats["dropped"], 3)
+
+    def test_engagement_metrics_rejects_before_recording(self):
+        shared, models.METRIC_WRITER = models.METRIC_WRITER, self.writer
+        self.addCleanup(setattr, models, "METRIC_WRITER", shared)
+        metrics = EngagementMetrics()
+        with self.assertRaises(TypeError):
+            metrics.update("social_metrics", {"total_connections": 3})
+        self.assertNotIn("social_metrics", metrics.metrics)
+        metrics.update("total_connections", 3)
+        self.assertEqual(metrics.metrics["total_connections"], [3.0])
+        self.assertEqual(self.writer.get_metrics()["pending"], 1)
+
+if __name__ == "__main__":
+    unittest.main()
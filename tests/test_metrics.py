@@ -0,0 +1,56 @@
+import importlib
+import unittest
+from utils.metrics import MetricsRegistry
+
+class RenderTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_families_have_help_and_type_lines(self):
+        self.registry.counter("jobs_total", "Jobs run", ("queue",)).labels("fast").inc(3)
+        self.registry.gauge("workers", "Live workers").set(2)
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines, [
+            "# HELP jobs_total Jobs run",
+            "# TYPE jobs_total counter",
+            'jobs_total{queue="fast"} 3',
+            "# HELP workers Live workers",
+            "# TYPE workers gauge",
+            "workers 2"
+        ])
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = self.registry.histogram("latency_seconds", "Latency", ("op",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.labels("read").observe(value)
+        lines = self.registry.render().splitlines()
+        self.assertEqual(lines[1], "# TYPE latency_seconds histogram")
+        self.assertEqual(lines[2:], [
+            'latency_seconds_bucket{op="read",le="0.1"} 1',
+            'latency_seconds_bucket{op="read",le="1"} 3',
+            'latency_seconds_bucket{op="read",le="+Inf"} 4',
+            'latency_seconds_sum{op="read"} 6.05',
+            'latency_seconds_count{op="read"} 4'
+        ])
+
+    def test_label_values_are_escaped(self):
+        self.registry.counter("errors_total", "Errors", ("message",)).labels('bad "quote" \\ \nline').inc()
+        self.assertIn('errors_total{message="bad \\"quote\\" \\\\ \\nline"} 1', self.registry.render())
+
+    def test_registering_a_known_name_returns_the_existing_family(self):
+        counter = self.registry.counter("jobs_total", "Jobs run")
+        self.assertIs(self.registry.counter("jobs_total", "Jobs run"), counter)
+
+class MetricsRouteTest(unittest.TestCase):
+    def test_metrics_route_serves_prometheus_text(self):
+        try:
+            main = importlib.import_module("main")
+        except ImportError as e:
+            self.skipTest(f"main dependencies missing: {e}")
+        response = main.app.test_client().get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn("# TYPE http_request_duration_seconds histogram", response.get_data(as_text=True))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import asyncio
+import importlib.util
+import json
+import os
+import time
+import unittest
+from unittest import mock
+from llm.accounting import LLMAccounting
+from llm.cache import LLMResponseCache
+from llm.providers import LLMProvider, LLMProviderManager
+from tools.mock_llm_server import LatencyModel, MockLLMServer
+
+class MockServerTestCase(unittest.IsolatedAsyncioTestCase):
+    server_options = {}
+
+    async def asyncSetUp(self):
+        self.server = MockLLMServer(**self.server_options)
+        self.port = await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    async def post(self, body: dict):
+        """Send one chat completion request, returning status, headers and raw body"""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        payload = json.dumps(body).encode()
+        writer.write(
+            b"POST /v1/chat/completions HTTP/1.1\r\nHost: test\r\nConnection: close\r\n"
+            + f"Content-Length: {len(payload)}\r\n\r\n".encode() + payload
+        )
+        response = await reader.read()
+        writer.close()
+        head, _, content = response.partition(b"\r\n\r\n")
+        lines = head.decode().split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        return int(lines[0].split(" ")[1]), headers, content
+
+    def completion(self, **options):
+        return {"model": "mock", "messages": [{"role": "user", "content": "hello"}], **options}
+
+class MockLLMServerTest(MockServerTestCase):
+    server_options = {"completion_tokens": 5, "tokens_per_second": 0}
+
+    async def test_completion_reports_usage(self):
+        status, _, content = await self.post(self.completion())
+        body = json.loads(content)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(body["choices"][0]["message"]["content"].split(" ")), 5)
+        self.assertGreater(body["usage"]["completion_tokens"], 0)
+        self.assertEqual(self.server.stats["completed"], 1)
+
+    async def test_stream_ends_with_usage_and_done(self):
+        status, headers, content = await self.post(self.completion(stream=True))
+        self.assertEqual((status, headers["Transfer-Encoding"]), (200, "chunked"))
+        self.assertIn(b'"usage"', content)
+        self.assertIn(b"data: [DONE]", content)
+        self.assertEqual(self.server.stats["streamed"], 1)
+
+    async def test_batch_prompt_gets_every_id(self):
+        prompt = 'Shout\nInputs:\n{"0": "a", "1": "b"}'
+        _, _, content = await self.post({
+            "messages": [{"role": "user", "content": prompt}],
+            "response_format": {"type": "json_object"}
+        })
+        results = json.loads(json.loads(content)["choices"][0]["message"]["content"])["results"]
+        self.assertEqual(set(results), {"0", "1"})
+
+    async def test_invalid_body_is_rejected(self):
+        status, _, _ = await self.post({"model": "mock"})
+        self.assertEqual(status, 400)
+
+class InjectedLatencyTest(MockServerTestCase):
+    server_options = {"latency": "fixed:0.1"}
+
+    async def test_configured_latency_delays_response(self):
+        started = time.perf_counter()
+        await self.post(self.completion())
+        self.assertGreaterEqual(time.perf_counter() - started, 0.1)
+
+    def test_latency_specs(self):
+        self.assertEqual(LatencyModel("fixed:0.2").sample(), 0.2)
+        self.assertTrue(0.1 <= LatencyModel("uniform:0.1,0.5").sample() <= 0.5)
+        with self.assertRaises(ValueError):
+            LatencyModel("normal:1")
+
+class InjectedErrorTest(MockServerTestCase):
+    server_options = {"error_rate": 1.0}
+
+    async def test_error_rate_answers_500(self):
+        status, _, _ = await self.post(self.completion())
+        self.assertEqual(status, 500)
+        self.assertEqual(self.server.stats["errors"], 1)
+
+class InjectedThrottlingTest(MockServerTestCase):
+    server_options = {"requests_per_minute": 1, "retry_after": 2.5}
+
+    async def test_requests_over_the_limit_get_429_with_retry_after(self):
+        self.assertEqual((await self.post(self.completion()))[0], 200)
+        status, headers, _ = await self.post(self.completion())
+        self.assertEqual((status, headers["Retry-After"]), (429, "2.5"))
+        self.assertEqual(self.server.stats["throttled"], 1)
+
+@unittest.skipUnless(importlib.util.find_spec("httpx"), "httpx not installed")
+class ProviderPathTest(MockServerTestCase):
+    server_options = {"completion_tokens": 5, "tokens_per_second": 0}
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        base_url = f"http://127.0.0.1:{self.port}/v1"
+        patcher = mock.patch.dict(os.environ, {"GROQ_BASE_URL": base_url, "DEEPSEEK_BASE_URL": base_url})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = LLMProviderManager(cache=LLMResponseCache(), accounting=LLMAccounting(prices={}))
+        self.manager.configured = {LLMProvider.GROQ: "mock", LLMProvider.DEEPSEEK: "mock"}
+
+    async def asyncTearDown(self):
+        await self.manager.close()
+        await super().asyncTearDown()
+
+    async def test_each_provider_path_reaches_the_server(self):
+        for provider in (LLMProvider.GROQ, LLMProvider.DEEPSEEK):
+            with self.subTest(provider=provider):
+                text = await self.manager.generate("hello", provider, use_cache=False)
+                self.assertEqual(len(text.split(" ")), 5)
+                chunks = [chunk async for chunk in self.manager.generate_stream("hello", provider, use_cache=False)]
+                self.assertEqual(len("".join(chunk.text for chunk in chunks).split(" ")), 5)
+                self.assertEqual(chunks[-1].finish_reason, "stop")
+                self.assertIsNotNone(chunks[-1].completion_tokens)
+        self.assertEqual((self.server.stats["completed"], self.server.stats["streamed"]), (4, 2))
+
+if __name__ == "__main__":
+    unittest.main()
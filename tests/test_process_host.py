@@ -0,0 +1,149 @@
+import asyncio
+import pickle
+import queue
+import unittest
+from unittest import mock
+from agents.base_agent import BaseAgent
+from utils.message_bus import MessageBus
+from utils.process_host import WorkerProcessHost, serve_worker
+
+class ProbeAgent(BaseAgent):
+    seen_llm = []
+
+    def __init__(self):
+        super().__init__("probe")
+
+    async def initialize(self):
+        ProbeAgent.seen_llm.append(self.llm)
+
+    async def process_cycle(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+class StuckAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("stuck")
+
+    async def initialize(self):
+        pass
+
+    async def process_messages(self):
+        pass  # Never drains its mailbox
+
+    async def process_cycle(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+class EchoAgent(BaseAgent):
+    def __init__(self):
+        super().__init__("echo")
+
+    async def initialize(self):
+        pass
+
+    async def handle_message(self, message):
+        await self.send_message(message["reply_to"], {"type": "echo", "value": message["value"]})
+
+    async def process_cycle(self):
+        pass
+
+    async def cleanup(self):
+        pass
+
+class ServeWorkerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        ProbeAgent.seen_llm.clear()
+        self.inbound = queue.Queue()
+        self.outbound = queue.Queue()
+        self.worker = asyncio.create_task(
+            serve_worker("test", {"probe": ProbeAgent, "stuck": StuckAgent}, self.inbound, self.outbound)
+        )
+        self.assertEqual((await self.receive())["kind"], "ready")
+
+    async def asyncTearDown(self):
+        self.inbound.put(None)
+        await asyncio.wait_for(self.worker, 5)
+
+    async def receive(self):
+        data = await asyncio.get_running_loop().run_in_executor(None, self.outbound.get, True, 5)
+        return pickle.loads(data)
+
+    async def request(self, op: str):
+        self.inbound.put(pickle.dumps({"kind": "request", "id": 1, "op": op}))
+        reply = await self.receive()
+        self.assertNotIn("error", reply)
+        return reply["result"]
+
+    async def test_hosted_agents_get_the_worker_dispatcher(self):
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(ProbeAgent.seen_llm), 1)
+        self.assertIsNotNone(ProbeAgent.seen_llm[0])
+
+    async def test_metrics_include_worker_llm_usage(self):
+        metrics = await self.request("metrics")
+        self.assertIn("llm_usage", metrics)
+        self.assertIn("probe", metrics["agent_statuses"])
+
+    async def test_full_mailbox_does_not_block_requests(self):
+        for index in range(1005):  # Past the default mailbox size
+            self.inbound.put(pickle.dumps({"kind": "message", "target": "stuck", "envelope": {"type": "update"}}))
+        metrics = await self.request("metrics")
+        self.assertEqual(metrics["message_bus"]["mailboxes"]["stuck"]["depth"], 1000)
+
+class ProcessBoundaryTest(unittest.IsolatedAsyncioTestCase):
+    async def test_message_round_trips_through_worker_process(self):
+        bus = MessageBus()
+        collector = bus.register("collector")
+        host = WorkerProcessHost("echo-worker", bus)
+        host.add_agent("echo", EchoAgent)
+        bus.add_route("echo", host.forward)
+        await host.start()
+        try:
+            await bus.send("collector", "echo", {"type": "ping", "reply_to": "collector", "value": 42})
+            self.assertTrue(await collector.wait(10))
+            reply = collector.get_batch()[0]
+        finally:
+            await host.stop()
+        self.assertEqual((reply["sender"], reply["type"], reply["value"]), ("echo", "echo", 42))
+        self.assertEqual(bus.stats["forwarded"], 1)
+
+class WorkerRestartTest(unittest.IsolatedAsyncioTestCase):
+    async def test_failed_restarts_back_off_exponentially_up_to_the_cap(self):
+        host = WorkerProcessHost("test", MessageBus(), restart_backoff=1.0, max_restart_backoff=3.0)
+        host._loop = asyncio.get_running_loop()
+        started = asyncio.Event()
+        attempts = []
+        delays = []
+        sleep = asyncio.sleep
+
+        async def start():
+            attempts.append(host.restarts)
+            if len(attempts) < 4:
+                raise RuntimeError("spawn failed")
+            started.set()
+
+        async def record_sleep(delay, *args):
+            delays.append(delay)
+            await sleep(0)
+
+        host.start = start
+        with mock.patch("utils.process_host.asyncio.sleep", record_sleep):
+            await host._restart()
+            await asyncio.wait_for(started.wait(), 1)
+        self.assertEqual(delays, [1.0, 2.0, 3.0, 3.0])
+        self.assertEqual(host.restarts, 4)
+
+    async def test_restart_is_skipped_once_stopping(self):
+        host = WorkerProcessHost("test", MessageBus(), restart_backoff=0.0)
+        host._loop = asyncio.get_running_loop()
+        host.start = mock.AsyncMock()
+        host.stopping = True
+        await host._restart()
+        host.start.assert_not_called()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import asyncio
+import time
+import unittest
+from llm.rate_limit import ProviderLimiter, RetryPolicy, TokenBucket, estimate_tokens
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+def fast_limiter(**options) -> ProviderLimiter:
+    return ProviderLimiter("test", retry_policy=RetryPolicy(max_retries=2, base_delay=0.001, max_delay=0.01), **options)
+
+class TokenBucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_burst_is_served_then_callers_wait_for_refill(self):
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 tokens per second
+        self.assertLess(await bucket.acquire(), 0.01)
+        await bucket.acquire()
+        waited = await bucket.acquire()
+        self.assertGreater(waited, 0.05)
+
+    async def test_oversized_request_leaves_bucket_in_debt(self):
+        bucket = TokenBucket(rate_per_minute=6000, capacity=10)
+        await bucket.acquire(25)
+        self.assertLess(bucket.tokens, 0)
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_errors_are_classified_by_status(self):
+        policy = RetryPolicy()
+        self.assertEqual(policy.get_reason(ProviderError(429)), "throttled")
+        self.assertEqual(policy.get_reason(ProviderError(503)), "server_error")
+        self.assertIsNone(policy.get_reason(ProviderError(400)))
+        self.assertIsNone(policy.get_reason(ValueError("bad prompt")))
+
+    def test_delay_is_capped_and_honours_retry_after(self):
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        for attempt in range(10):
+            self.assertLessEqual(policy.get_delay(attempt), 5.0)
+        self.assertGreaterEqual(policy.get_delay(0, retry_after=3.0), 3.0)
+        self.assertEqual(policy.get_delay(0, retry_after=60.0), 5.0)
+
+    def test_estimate_tokens_counts_prompt_and_completion(self):
+        self.assertEqual(estimate_tokens("x" * 400, 50), 150)
+
+class ProviderLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_throttled_call_is_retried_after_a_shared_pause(self):
+        limiter = fast_limiter()
+        errors = [ProviderError(429)]
+
+        async def call():
+            if errors:
+                raise errors.pop()
+            return "ok"
+
+        self.assertEqual(await limiter.run(call), "ok")
+        self.assertEqual(limiter.stats["retries"], 1)
+        self.assertEqual(limiter.stats["throttled"], 1)
+        self.assertGreater(limiter.paused_until, 0)
+        self.assertEqual(limiter.in_flight, 0)
+
+    async def test_non_retryable_and_exhausted_errors_propagate(self):
+        limiter = fast_limiter()
+
+        async def bad_request():
+            raise ProviderError(400)
+
+        async def unavailable():
+            raise ProviderError(503)
+
+        with self.assertRaises(ProviderError):
+            await limiter.run(bad_request)
+        self.assertEqual(limiter.stats["retries"], 0)
+        with self.assertRaises(ProviderError):
+            await limiter.run(unavailable)
+        self.assertEqual(limiter.stats["server_error"], 2)
+        self.assertEqual(limiter.stats["failed"], 2)
+
+    async def test_concurrency_is_limited(self):
+        limiter = fast_limiter(max_concurrency=2)
+        running = []
+        peak = []
+
+        async def call():
+            running.append(True)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+        await asyncio.gather(*(limiter.run(call) for _ in range(6)))
+        self.assertEqual(max(peak), 2)
+
+    async def test_request_rate_is_limited(self):
+        limiter = fast_limiter(requests_per_minute=1200)  # Burst of 1200, then 20 per second
+        limiter.request_bucket.tokens = 1
+
+        async def call():
+            return time.monotonic()
+
+        first, second = await asyncio.gather(limiter.run(call), limiter.run(call))
+        self.assertGreater(second - first, 0.04)
+
+    async def test_stream_retries_only_before_first_item(self):
+        limiter = fast_limiter()
+        attempts = []
+
+        async def flaky_stream():
+            attempts.append(True)
+            if len(attempts) == 1:
+                raise ProviderError(503)
+            yield "a"
+            yield "b"
+
+        self.assertEqual([item async for item in limiter.stream(flaky_stream)], ["a", "b"])
+        self.assertEqual(len(attempts), 2)
+
+        async def broken_stream():
+            yield "a"
+            raise ProviderError(503)
+
+        received = []
+        with self.assertRaises(ProviderError):
+            async for item in limiter.stream(broken_stream):
+                received.append(item)
+        self.assertEqual(received, ["a"])
+        self.assertEqual(limiter.in_flight, 0)
+
+if __name__ == "__main__":
+    unittest.main()
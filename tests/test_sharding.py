@@ -0,0 +1,87 @@
+import unittest
+from utils.agent_manager import AgentManager
+from utils.message_bus import MessageBus
+from utils.sharding import ConsistentHashRing, ShardAssignment, ShardRouter
+
+SHARDS = ["shard-0", "shard-1", "shard-2"]
+USERS = [f"user-{index}" for index in range(3000)]
+
+class FakeHost:
+    def __init__(self):
+        self.forwarded = []
+
+    async def forward(self, target, envelope) -> bool:
+        self.forwarded.append((target, envelope))
+        return True
+
+class HashRingTest(unittest.TestCase):
+    def test_every_user_has_exactly_one_owning_shard(self):
+        assignments = [ShardAssignment(shard, SHARDS) for shard in SHARDS]
+        for user_id in USERS[:500]:
+            self.assertEqual(sum(assignment.owns(user_id) for assignment in assignments), 1)
+
+    def test_users_are_spread_across_shards(self):
+        counts = ShardRouter({shard: FakeHost() for shard in SHARDS}).get_distribution(USERS)
+        for count in counts.values():
+            self.assertGreater(count, len(USERS) / len(SHARDS) * 0.7)
+
+    def test_removing_a_shard_only_moves_its_users(self):
+        ring = ConsistentHashRing(SHARDS)
+        before = {user_id: ring.get_node(user_id) for user_id in USERS}
+        ring.remove_node("shard-2")
+        for user_id, owner in before.items():
+            if owner != "shard-2":
+                self.assertEqual(ring.get_node(user_id), owner)
+
+class ShardRouterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_user_messages_go_to_the_owning_shard_only(self):
+        hosts = {shard: FakeHost() for shard in SHARDS}
+        router = ShardRouter(hosts)
+        for user_id in USERS[:50]:
+            await router.forward("habit_formation", {"type": "update", "user_id": user_id})
+
+        for shard, host in hosts.items():
+            assignment = ShardAssignment(shard, SHARDS)
+            self.assertTrue(all(assignment.owns(envelope["user_id"]) for _, envelope in host.forwarded))
+        self.assertEqual(sum(len(host.forwarded) for host in hosts.values()), 50)
+        self.assertEqual(router.stats["routed"], 50)
+
+    async def test_messages_without_user_are_broadcast(self):
+        hosts = {shard: FakeHost() for shard in SHARDS}
+        router = ShardRouter(hosts)
+        self.assertTrue(await router.forward("habit_formation", {"type": "config"}))
+        self.assertTrue(all(len(host.forwarded) == 1 for host in hosts.values()))
+        self.assertEqual(router.stats["broadcast"], 1)
+
+    async def test_sharded_agent_messages_are_routed_through_the_bus(self):
+        manager = AgentManager(num_shards=len(SHARDS))
+        await manager.register_agent("habit_formation", object(), sharded=True)
+        router = manager.shard_router
+        router.hosts = {shard: FakeHost() for shard in SHARDS}
+
+        await manager.message_bus.send("test", "habit_formation", {"type": "update", "user_id": "user-7"})
+        owner = router.ring.get_node("user-7")
+        self.assertEqual([len(host.forwarded) for host in router.hosts.values()],
+                         [int(shard == owner) for shard in SHARDS])
+        self.assertEqual(manager.agent_workers["habit_formation"], SHARDS)
+        self.assertEqual(manager.workers[owner].shard_config, (owner, SHARDS))
+
+    async def test_worker_bus_returns_unowned_users_to_parent(self):
+        bus = MessageBus()
+        bus.register("habit_formation")
+        shard = ShardAssignment("shard-0", SHARDS)
+        bus.owns_message = lambda target, envelope: (
+            envelope.get("user_id") is None or shard.owns(envelope["user_id"])
+        )
+        parent = FakeHost()
+        bus.set_fallback_route(parent.forward)
+
+        owned = next(user_id for user_id in USERS if shard.owns(user_id))
+        other = next(user_id for user_id in USERS if not shard.owns(user_id))
+        await bus.send("test", "habit_formation", {"type": "update", "user_id": owned})
+        await bus.send("test", "habit_formation", {"type": "update", "user_id": other})
+        self.assertEqual(len(bus.get_mailbox("habit_formation")), 1)
+        self.assertEqual([envelope["user_id"] for _, envelope in parent.forwarded], [other])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,325 @@
+"""Local OpenAI-compatible chat completions server for offline load tests.
+
+Answers POST .../chat/completions the way Groq and DeepSeek do, including
+server-sent event streams, with configurable latency, errors and 429s.
+Point a provider at it with, for example:
+
+    python -m tools.mock_llm_server --port 8089 --latency lognormal:0.3,0.5 --error-rate 0.01
+    GROQ_API_KEY=mock GROQ_BASE_URL=http://127.0.0.1:8089/v1 python main.py
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import time
+import uuid
+from collections import deque
+from typing import Dict, Any, Deque, List, Optional, Tuple
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 429: "Too Many Requests", 500: "Internal Server Error"}
+
+WORDS = ("streak", "momentum", "community", "progress", "habit", "goal", "today", "together", "keep", "going")
+
+class LatencyModel:
+    """Random response delay in seconds from a spec such as fixed:0.2,
+    uniform:0.1,0.5, exponential:0.3 or lognormal:<median>,<sigma>"""
+
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        values = [float(value) for value in params.split(",") if value]
+        if kind == "fixed" and len(values) == 1:
+            self.sample = lambda: values[0]
+        elif kind == "uniform" and len(values) == 2:
+            self.sample = lambda: random.uniform(values[0], values[1])
+        elif kind == "exponential" and len(values) == 1:
+            self.sample = lambda: random.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+        elif kind == "lognormal" and len(values) == 2:
+            self.sample = lambda: random.lognormvariate(math.log(values[0]), values[1])
+        else:
+            raise ValueError(f"Invalid latency spec: {spec}")
+
+class MockLLMServer:
+    def __init__(
+        self,
+        latency: str = "fixed:0",
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        requests_per_minute: Optional[float] = None,
+        retry_after: float = 1.0,
+        completion_tokens: int = 50,
+        tokens_per_second: float = 200.0
+    ):
+        self.logger = logging.getLogger("mock_llm_server")
+        self.latency = LatencyModel(latency)  # Time to first token
+        self.error_rate = error_rate  # Fraction answered with 500
+        self.throttle_rate = throttle_rate  # Fraction answered with 429 regardless of load
+        self.retry_after = retry_after
+        self.completion_tokens = completion_tokens
+        self.tokens_per_second = tokens_per_second  # Streaming pace after the first token
+        # Sliding one-minute window of admitted requests, enforcing requests_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.admitted: Deque[float] = deque()
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.stats = {
+            "connections": 0,
+            "requests": 0,
+            "completed": 0,
+            "streamed": 0,
+            "errors": 0,
+            "throttled": 0,
+            "in_flight": 0,
+            "max_in_flight": 0
+        }
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving; returns the bound port"""
+        self.server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stop accepting connections"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve keep-alive HTTP/1.1 requests on one connection"""
+        self.stats["connections"] += 1
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                await self.handle_request(writer, method, path, body)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.logger.error(f"Error serving connection: {e}")
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """Read request line, headers and body, None at end of connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, path, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        body = await reader.readexactly(int(headers.get("content-length", 0)))
+        return method, path, headers, body
+
+    async def handle_request(self, writer: asyncio.StreamWriter, method: str, path: str, body: bytes):
+        """Route request"""
+        if method == "GET" and path.rstrip("/").endswith("/stats"):
+            await self.send_json(writer, 200, self.stats)
+        elif method == "POST" and path.rstrip("/").endswith("/chat/completions"):
+            self.stats["requests"] += 1
+            self.stats["in_flight"] += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+            try:
+                await self.handle_completion(writer, body)
+            finally:
+                self.stats["in_flight"] -= 1
+        else:
+            await self.send_json(writer, 404, {"error": {"message": f"No route for {method} {path}"}})
+
+    def is_throttled(self) -> bool:
+        """Apply random throttling and the requests-per-minute window"""
+        if random.random() < self.throttle_rate:
+            return True
+        if self.requests_per_minute is None:
+            return False
+        now = time.monotonic()
+        while self.admitted and self.admitted[0] <= now - 60:
+            self.admitted.popleft()
+        if len(self.admitted) >= self.requests_per_minute:
+            return True
+        self.admitted.append(now)
+        return False
+
+    async def handle_completion(self, writer: asyncio.StreamWriter, body: bytes):
+        """Answer chat completion request"""
+        try:
+            request = json.loads(body)
+            messages = request["messages"]
+        except (ValueError, KeyError, TypeError):
+            await self.send_json(writer, 400, {"error": {"message": "Invalid request body"}})
+            return
+
+        if self.is_throttled():
+            self.stats["throttled"] += 1
+            await self.send_json(
+                writer,
+                429,
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                {"Retry-After": f"{self.retry_after:g}"}
+            )
+            return
+
+        await asyncio.sleep(self.latency.sample())
+        if random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            await self.send_json(writer, 500, {"error": {"message": "Injected server error"}})
+            return
+
+        prompt = " ".join(str(message.get("content", "")) for message in messages)
+        max_tokens = int(request.get("max_tokens") or self.completion_tokens)
+        content = self.build_content(prompt, request.get("response_format"), max_tokens)
+        usage = {
+            "prompt_tokens": max(1, len(prompt) // 4),
+            "completion_tokens": max(1, len(content) // 4),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if request.get("stream"):
+            await self.stream_completion(writer, request.get("model"), content, usage)
+            self.stats["streamed"] += 1
+        else:
+            await self.send_json(writer, 200, {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": usage
+            })
+        self.stats["completed"] += 1
+
+    def build_content(self, prompt: str, response_format: Optional[Dict[str, Any]], max_tokens: int) -> str:
+        """Make response text, answering every id of a batched JSON prompt"""
+        length = min(self.completion_tokens, max_tokens)
+        if (response_format or {}).get("type") == "json_object":
+            match = re.search(r"Inputs:\s*(\{.*\})", prompt, re.DOTALL)
+            try:
+                ids = list(json.loads(match.group(1))) if match else []
+            except ValueError:
+                ids = []
+            length = max(1, length // max(1, len(ids)))
+            return json.dumps({"results": {item_id: self.make_text(length) for item_id in ids}})
+        return self.make_text(length)
+
+    @staticmethod
+    def make_text(tokens: int) -> str:
+        """Generate filler text of roughly tokens tokens"""
+        return " ".join(random.choice(WORDS) for _ in range(max(1, tokens)))
+
+    async def stream_completion(self, writer: asyncio.StreamWriter, model: str, content: str, usage: Dict[str, int]):
+        """Send completion as chunked server-sent events, paced by tokens_per_second"""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        words = content.split(" ")
+        for index, word in enumerate(words):
+            text = word if index == 0 else f" {word}"
+            await self.send_event(writer, self.make_chunk(completion_id, model, {"content": text}, None))
+            if self.tokens_per_second > 0 and index < len(words) - 1:
+                await asyncio.sleep(1 / self.tokens_per_second)
+        final = self.make_chunk(completion_id, model, {}, "stop")
+        final["usage"] = usage
+        await self.send_event(writer, final)
+        await self.send_event(writer, "[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    @staticmethod
+    def make_chunk(completion_id: str, model: str, delta: Dict[str, str], finish_reason: Optional[str]) -> Dict[str, Any]:
+        return {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+        }
+
+    @staticmethod
+    async def send_event(writer: asyncio.StreamWriter, data: Any):
+        """Write one server-sent event as an HTTP chunk"""
+        payload = data if isinstance(data, str) else json.dumps(data)
+        event = f"data: {payload}\n\n".encode()
+        writer.write(f"{len(event):x}\r\n".encode() + event + b"\r\n")
+        await writer.drain()
+
+    @staticmethod
+    async def send_json(
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None
+    ):
+        """Write JSON response"""
+        payload = json.dumps(body).encode()
+        lines = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(payload)}"
+        ]
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + payload)
+        await writer.drain()
+
+def add_arguments(parser: argparse.ArgumentParser):
+    """Add server behaviour options, shared with the throughput benchmark"""
+    parser.add_argument("--latency", default="lognormal:0.2,0.4", help="Time to first token, e.g. fixed:0.2, uniform:0.1,0.5, exponential:0.3, lognormal:<median>,<sigma>")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--server-rpm", type=float, default=None, help="Requests per minute before answering 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--completion-tokens", type=int, default=50, help="Tokens per completion")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="Streaming pace after the first token")
+
+def create_server(args: argparse.Namespace) -> MockLLMServer:
+    """Create server from parsed arguments"""
+    return MockLLMServer(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        requests_per_minute=args.server_rpm,
+        retry_after=args.retry_after,
+        completion_tokens=args.completion_tokens,
+        tokens_per_second=args.tokens_per_second
+    )
+
+async def serve(server: MockLLMServer, host: str, port: int):
+    """Run server until cancelled"""
+    port = await server.start(host, port)
+    print(f"Mock LLM server listening on http://{host}:{port}/v1", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(create_server(args), args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,43 @@
+import asyncio
 import logging
+import time
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+from utils.message_bus import MessageBus
+from utils.process_host import WorkerProcessHost
+from utils.sharding import ShardRouter
 
 class AgentManager:
-    def __init__(self):
+    def __init__(
+        self,
+        message_bus: Optional[MessageBus] = None,
+        restart_backoff: float = 1.0,
+        max_restart_backoff: float = 60.0,
+        max_restarts: Optional[int] = None,
+        stop_timeout: float = 10.0,
+        worker_start_method: str = "spawn",
+        num_shards: int = 0,
+        llm_dispatcher: Optional[Any] = None
+    ):
         self.logger = logging.getLogger("agent_manager")
+        self.message_bus = message_bus or MessageBus()
         self.agents = {}
         self.active_agents = set()
         self.agent_metrics = {}
+        self.agent_tasks: Dict[str, asyncio.Task] = {}
+        self.agent_health: Dict[str, Dict[str, Any]] = {}
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.max_restarts = max_restarts  # None restarts indefinitely
+        self.stop_timeout = stop_timeout
+        self.worker_start_method = worker_start_method
+        self.workers: Dict[str, WorkerProcessHost] = {}
+        self.agent_workers: Dict[str, List[str]] = {}
+        self.num_shards = num_shards
+        self.shard_router: Optional[ShardRouter] = None
+        self.remote_cycle_stats: Dict[str, Any] = {}
+        self.remote_llm_usage: Dict[str, Any] = {}  # Last accounting snapshot per worker
+        self.llm_dispatcher = llm_dispatcher  # Shared with in-process agents
         
     async def initialize(self):
         """Initialize agent manager"""
@@ -20,44 +50,212 @@ class AgentManager:
         pass
         
     async def start_agents(self):
-        """Start all registered agents"""
+        """Start all registered agents concurrently"""
         self.logger.info("Starting agents")
-        for agent_id in self.agents:
-            await self.start_agent(agent_id)
+        agent_ids = [
+            agent_id for agent_id in self.agents
+            if agent_id not in self.active_agents and agent_id not in self.agent_workers
+        ]
+        worker_names = list(self.workers)
+        results = await asyncio.gather(
+            *(self.start_agent(agent_id) for agent_id in agent_ids),
+            *(self.start_worker(name) for name in worker_names),
+            return_exceptions=True
+        )
+        for name, result in zip(agent_ids + worker_names, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to start {name}: {result}")
             
     async def stop_agents(self):
         """Stop all active agents"""
         self.logger.info("Stopping agents")
-        for agent_id in list(self.active_agents):
-            await self.stop_agent(agent_id)
+        local_ids = [agent_id for agent_id in self.active_agents if agent_id not in self.agent_workers]
+        await asyncio.gather(
+            *(self.stop_agent(agent_id) for agent_id in local_ids),
+            *(self.stop_worker(name) for name in self.workers),
+            return_exceptions=True
+        )
+
+    async def start_worker(self, name: str):
+        """Start worker process and all agents placed in it"""
+        host = self.workers[name]
+        await host.start()
+        self.active_agents.update(host.agent_specs)
+        if host.pending_state:
+            await host.request("restore_state", host.pending_state)
+            host.pending_state = {}
+
+    async def stop_worker(self, name: str):
+        """Stop worker process and all agents placed in it"""
+        host = self.workers[name]
+        await host.stop()
+        self.active_agents.difference_update(host.agent_specs)
             
     async def start_agent(self, agent_id: str):
         """Start specific agent"""
         if agent_id not in self.agents:
             raise ValueError(f"Agent {agent_id} not found")
+        if agent_id in self.active_agents:
+            return
+
+        workers = self.agent_workers.get(agent_id)
+        if workers is not None:
+            for worker in workers:
+                host = self.workers[worker]
+                if host.is_alive():
+                    await host.request("start_agent", agent_id)
+                else:
+                    await self.start_worker(worker)
+            self.active_agents.add(agent_id)
+            return
             
         agent = self.agents[agent_id]
-        await agent.initialize()
+        health = self.agent_health.setdefault(agent_id, {"restarts": 0, "last_error": None})
+        health["state"] = "initializing"
+        try:
+            await agent.initialize()
+        except Exception as e:
+            health.update({"state": "failed", "last_error": str(e)})
+            raise
+
         self.active_agents.add(agent_id)
+        self.agent_tasks[agent_id] = asyncio.create_task(
+            self.supervise_agent(agent_id),
+            name=f"agent:{agent_id}"
+        )
         self.logger.info(f"Started agent: {agent_id}")
+
+    async def supervise_agent(self, agent_id: str):
+        """Run agent loop, restarting it with backoff when it crashes"""
+        agent = self.agents[agent_id]
+        health = self.agent_health[agent_id]
+        backoff = self.restart_backoff
+
+        while agent_id in self.active_agents:
+            run_started = time.monotonic()
+            health.update({"state": "running", "started_at": datetime.now().isoformat()})
+            try:
+                await agent.run()
+                health["state"] = "stopped"
+                return
+            except asyncio.CancelledError:
+                health["state"] = "cancelled"
+                raise
+            except Exception as e:
+                health["restarts"] += 1
+                health["last_error"] = str(e)
+                health["last_failure"] = datetime.now().isoformat()
+
+            if self.max_restarts is not None and health["restarts"] > self.max_restarts:
+                self.logger.error(f"Agent {agent_id} exceeded {self.max_restarts} restarts, giving up")
+                health["state"] = "failed"
+                self.active_agents.discard(agent_id)
+                return
+
+            # Reset backoff once the agent has run stably for a while
+            if time.monotonic() - run_started > self.max_restart_backoff:
+                backoff = self.restart_backoff
+
+            health["state"] = "restarting"
+            self.logger.error(f"Agent {agent_id} crashed: {health['last_error']}, restarting in {backoff:.1f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_restart_backoff)
+
+            if agent_id not in self.active_agents:
+                break
+            try:
+                await agent.initialize()
+            except Exception as e:
+                health["last_error"] = str(e)
+                self.logger.error(f"Failed to reinitialize agent {agent_id}: {e}")
+
+        health["state"] = "stopped"
             
     async def stop_agent(self, agent_id: str):
         """Stop specific agent"""
         if agent_id not in self.active_agents:
             return
             
+        workers = self.agent_workers.get(agent_id)
+        if workers is not None:
+            self.active_agents.remove(agent_id)
+            await asyncio.gather(*(self.workers[worker].request("stop_agent", agent_id) for worker in workers))
+            self.logger.info(f"Stopped agent: {agent_id}")
+            return
+            
         agent = self.agents[agent_id]
-        await agent.cleanup()
         self.active_agents.remove(agent_id)
+        agent.running = False
+        if hasattr(agent, "trigger"):
+            agent.trigger()
+
+        task = self.agent_tasks.pop(agent_id, None)
+        if task is not None and not task.done():
+            if self.agent_health.get(agent_id, {}).get("state") == "restarting":
+                # Only waiting out a restart backoff, nothing to drain
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            else:
+                try:
+                    await asyncio.wait_for(task, self.stop_timeout)
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    self.logger.warning(f"Agent {agent_id} did not stop within {self.stop_timeout}s, cancelled")
+
+        await agent.cleanup()
+        self.agent_health.setdefault(agent_id, {"restarts": 0, "last_error": None})["state"] = "stopped"
         self.logger.info(f"Stopped agent: {agent_id}")
         
-    async def register_agent(self, agent_id: str, agent: Any):
-        """Register new agent"""
+    async def register_agent(
+        self,
+        agent_id: str,
+        agent: Any,
+        worker: Optional[str] = None,
+        sharded: bool = False
+    ):
+        """Register new agent, optionally in a named worker process or sharded by user"""
         if agent_id in self.agents:
             raise ValueError(f"Agent {agent_id} already registered")
             
         self.agents[agent_id] = agent
+        if sharded:
+            # Every shard worker runs its own copy, owning a slice of the users
+            router = self.get_shard_router()
+            for host in router.hosts.values():
+                host.add_agent(agent_id, type(agent))
+            self.agent_workers[agent_id] = list(router.hosts)
+            self.message_bus.add_route(agent_id, router.forward)
+        elif worker is not None:
+            # The worker instantiates its own copy from the agent class
+            host = self.get_worker(worker)
+            host.add_agent(agent_id, type(agent))
+            self.agent_workers[agent_id] = [worker]
+            self.message_bus.add_route(agent_id, host.forward)
+        else:
+            if hasattr(agent, "attach_message_bus"):
+                agent.attach_message_bus(self.message_bus)
+            if self.llm_dispatcher is not None:
+                agent.llm = self.llm_dispatcher
         self.logger.info(f"Registered agent: {agent_id}")
+
+    def get_worker(self, name: str) -> WorkerProcessHost:
+        """Get worker process host, creating it on first use"""
+        host = self.workers.get(name)
+        if host is None:
+            host = WorkerProcessHost(name, self.message_bus, start_method=self.worker_start_method)
+            self.workers[name] = host
+        return host
+
+    def get_shard_router(self) -> ShardRouter:
+        """Get router for user-sharded agents, creating shard workers on first use"""
+        if self.shard_router is None:
+            if self.num_shards < 1:
+                raise ValueError("Sharded agents require num_shards >= 1")
+            names = [f"shard-{index}" for index in range(self.num_shards)]
+            hosts = {name: self.get_worker(name) for name in names}
+            for name, host in hosts.items():
+                host.shard_config = (name, names)
+            self.shard_router = ShardRouter(hosts)
+        return self.shard_router
         
     async def get_agent(self, agent_id: str) -> Optional[Any]:
         """Get registered agent"""
@@ -80,7 +278,10 @@ class AgentManager:
             return
             
         agent = self.agents[agent_id]
-        if event_type == "start":
+        workers = self.agent_workers.get(agent_id)
+        if event_type == "update" and workers is not None:
+            await asyncio.gather(*(self.workers[worker].request("event", event) for worker in workers))
+        elif event_type == "start":
             await self.start_agent(agent_id)
         elif event_type == "stop":
             await self.stop_agent(agent_id)
@@ -92,16 +293,112 @@ class AgentManager:
         metrics = {
             "total_agents": self.get_agent_count(),
             "active_agents": self.get_active_agent_count(),
-            "agent_statuses": {}
+            "agent_statuses": {},
+            "message_bus": self.message_bus.get_metrics(),
+            "workers": {}
         }
         
         for agent_id, agent in self.agents.items():
+            if agent_id in self.agent_workers:
+                metrics["agent_statuses"][agent_id] = {
+                    "active": agent_id in self.active_agents,
+                    "workers": self.agent_workers[agent_id]
+                }
+                continue
+            task = self.agent_tasks.get(agent_id)
             metrics["agent_statuses"][agent_id] = {
                 "active": agent_id in self.active_agents,
-                "last_update": self.agent_metrics.get(agent_id, {}).get("last_update")
+                "last_update": self.agent_metrics.get(agent_id, {}).get("last_update"),
+                "task_alive": task is not None and not task.done(),
+                "timings": agent.get_cycle_stats() if hasattr(agent, "get_cycle_stats") else {},
+                **self.agent_health.get(agent_id, {})
             }
+        if self.llm_dispatcher is not None:
+            metrics["llm_usage"] = self.llm_dispatcher.manager.accounting.get_metrics()
+
+        remote = await self.request_workers("metrics")
+        for name, host in self.workers.items():
+            worker_metrics = host.get_metrics()
+            result = remote.get(name)
+            if isinstance(result, Exception):
+                worker_metrics["error"] = str(result)
+            elif result:
+                worker_metrics["message_bus"] = result["message_bus"]
+                if "llm_usage" in result:
+                    worker_metrics["llm_usage"] = self.remote_llm_usage[name] = result["llm_usage"]
+                for agent_id, status in result["agent_statuses"].items():
+                    if len(self.agent_workers.get(agent_id, ())) > 1:
+                        shards = metrics["agent_statuses"][agent_id].setdefault("shards", {})
+                        shards[name] = status
+                        self.remote_cycle_stats.setdefault(agent_id, {})[name] = status.get("timings", {})
+                    else:
+                        metrics["agent_statuses"][agent_id] = {**status, "worker": name}
+                        self.remote_cycle_stats[agent_id] = status.get("timings", {})
+            metrics["workers"][name] = worker_metrics
             
         return metrics
+
+    def get_worker_llm_usage(self) -> Dict[str, Any]:
+        """Get LLM accounting of each worker process from its last metrics snapshot"""
+        return dict(self.remote_llm_usage)
+
+    def get_cycle_stats(self) -> Dict[str, Any]:
+        """Get cycle timings for all agents, using the last snapshot for remote ones"""
+        stats = {}
+        for agent_id, agent in self.agents.items():
+            if agent_id in self.agent_workers:
+                stats[agent_id] = self.remote_cycle_stats.get(agent_id, {})
+            elif hasattr(agent, "get_cycle_stats"):
+                stats[agent_id] = agent.get_cycle_stats()
+        return stats
+
+    async def request_workers(self, op: str, payloads: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run an operation in every live worker concurrently"""
+        names = [
+            name for name, host in self.workers.items()
+            if host.is_alive() and (payloads is None or name in payloads)
+        ]
+        results = await asyncio.gather(
+            *(self.workers[name].request(op, payloads[name] if payloads else None) for name in names),
+            return_exceptions=True
+        )
+        return dict(zip(names, results))
+
+    def split_by_worker(self, values: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Group per-agent values by the worker hosting each agent"""
+        grouped = {}
+        for agent_id, value in values.items():
+            workers = self.agent_workers.get(agent_id, [])
+            for worker in workers:
+                # Sharded agents keep one state per shard
+                if len(workers) > 1 and isinstance(value, dict) and "shards" in value:
+                    if worker not in value["shards"]:
+                        continue
+                    grouped.setdefault(worker, {})[agent_id] = value["shards"][worker]
+                else:
+                    grouped.setdefault(worker, {})[agent_id] = value
+        return grouped
+
+    async def handle_worker_request(self, op: str, payload: Any = None) -> Any:
+        """Handle operation requested by the parent process"""
+        if op == "metrics":
+            return await self.get_metrics()
+        elif op == "states":
+            return await self.get_states()
+        elif op == "restore_state":
+            await self.restore_state(payload)
+        elif op == "configure":
+            await self.update_configuration(payload)
+        elif op == "event":
+            await self.process_event(payload)
+        elif op == "start_agent":
+            await self.start_agent(payload)
+        elif op == "stop_agent":
+            await self.stop_agent(payload)
+        elif op == "shutdown":
+            await self.stop_agents()
+        else:
+            raise ValueError(f"Unknown worker operation: {op}")
         
     async def update_metrics(self, agent_id: str, metrics: Dict[str, Any]):
         """Update agent metrics"""
@@ -114,17 +411,36 @@ class AgentManager:
         """Get states of all agents"""
         states = {}
         for agent_id, agent in self.agents.items():
-            states[agent_id] = await agent.get_state()
+            if agent_id not in self.agent_workers:
+                states[agent_id] = await agent.get_state()
+
+        for name, result in (await self.request_workers("states")).items():
+            if isinstance(result, Exception):
+                self.logger.error(f"Failed to get states from worker {name}: {result}")
+                continue
+            for agent_id, state in result.items():
+                if len(self.agent_workers.get(agent_id, ())) > 1:
+                    states.setdefault(agent_id, {"shards": {}})["shards"][name] = state
+                else:
+                    states[agent_id] = state
         return states
         
     async def restore_state(self, states: Dict[str, Any]):
         """Restore agent states"""
         for agent_id, state in states.items():
-            if agent_id in self.agents:
+            if agent_id in self.agents and agent_id not in self.agent_workers:
                 await self.agents[agent_id].restore_state(state)
+
+        # Workers that are not running yet restore their agents once started
+        worker_states = self.split_by_worker(states)
+        for name, worker_state in worker_states.items():
+            if not self.workers[name].is_alive():
+                self.workers[name].pending_state.update(worker_state)
+        await self.request_workers("restore_state", worker_states)
                 
     async def update_configuration(self, config: Dict[str, Any]):
         """Update agent configurations"""
         for agent_id, agent_config in config.items():
-            if agent_id in self.agents:
+            if agent_id in self.agents and agent_id not in self.agent_workers:
                 await self.agents[agent_id].update_configuration(agent_config)
+        await self.request_workers("configure", self.split_by_worker(config))
@@ -5,18 +5,23 @@ from utils.agent_manager import AgentManager
 from utils.display import DisplayManager
 from utils.progress import ProgressTracker
 from data.cache import EngagementCache
+from data.connection import CONNECTIONS
+from data.models import METRIC_WRITER, flush_metrics
 from graph.state_manager import StateManager
+from llm.dispatcher import LLMDispatcher
 from llm.providers import LLMProviderManager
 
 class Framework:
     def __init__(self):
         self.logger = logging.getLogger("framework")
-        self.agent_manager = AgentManager()
+        self.llm_manager = LLMProviderManager()
+        # Agents share one dispatcher so LLM concurrency is limited globally
+        self.llm_dispatcher = LLMDispatcher(self.llm_manager)
+        self.agent_manager = AgentManager(llm_dispatcher=self.llm_dispatcher)
         self.display_manager = DisplayManager()
         self.progress_tracker = ProgressTracker()
         self.cache = EngagementCache()
         self.state_manager = StateManager()
-        self.llm_manager = LLMProviderManager()
         self.metrics = {}
         
     async def initialize(self):
@@ -59,6 +64,9 @@ class Framework:
         try:
             self.logger.info("Starting Skylark Framework")
             
+            # Start LLM dispatcher before agents submit requests
+            await self.llm_dispatcher.start()
+
             # Start agents
             await self.agent_manager.start_agents()
             
@@ -78,9 +86,17 @@ class Framework:
             
             # Stop agents
             await self.agent_manager.stop_agents()
+
+            # Persist buffered metric rows
+            flush_metrics()
+            self.cache.stop_sweeper()
             
             # Save states
             await self.save_states()
+
+            # Finish in-flight LLM requests and close connection pools
+            await self.llm_dispatcher.stop()
+            await self.llm_manager.close()
             
             self.logger.info("Framework stopped successfully")
             
@@ -113,6 +129,9 @@ class Framework:
             progress_metrics = await self.progress_tracker.get_metrics()
             self.metrics["progress"] = progress_metrics
             
+            # Monitor messaging
+            self.metrics["messaging"] = self.agent_manager.message_bus.get_metrics()
+            
             # Monitor cache
             cache_metrics = self.cache.get_metrics()
             self.metrics["cache"] = cache_metrics
@@ -145,19 +164,31 @@ class Framework:
 
     def get_stats(self) -> Dict[str, Any]:
         """Get framework statistics"""
+        cache_metrics = self.cache.get_metrics()
         return {
             "timestamp": datetime.now().isoformat(),
             "metrics": self.metrics,
             "agents": {
                 "total": self.agent_manager.get_agent_count(),
-                "active": self.agent_manager.get_active_agent_count()
+                "active": self.agent_manager.get_active_agent_count(),
+                "cycle_stats": self.agent_manager.get_cycle_stats()
             },
+            "metric_writer": METRIC_WRITER.get_metrics(),
+            "sqlite": CONNECTIONS.get_metrics(),
             "cache": {
-                "size": len(self.cache.get_metrics()),
-                "hit_rate": self.cache.get_metrics().get("hit_rate", 0)
+                "size": cache_metrics.get("total_entries", 0),
+                "hit_rate": cache_metrics["hit_rate"],
+                "memory": cache_metrics["memory"],
+                "disk": cache_metrics["disk"]
             },
             "llm": {
-                "providers": self.llm_manager.get_available_providers()
+                "providers": self.llm_manager.get_available_providers(),
+                "cache": self.llm_manager.cache.get_metrics(),
+                "rate_limits": self.llm_manager.get_rate_limit_metrics(),
+                "routing": self.llm_manager.router.get_metrics(),
+                "dispatcher": self.llm_dispatcher.get_metrics(),
+                "usage": self.llm_manager.accounting.get_metrics(),
+                "worker_usage": self.agent_manager.get_worker_llm_usage()
             }
         }
 
@@ -0,0 +1,370 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Dict, Any, Awaitable, Callable, Iterable, List, Optional, Tuple
+from utils.metrics import REGISTRY
+
+MAILBOX_DEPTH = REGISTRY.gauge(
+    "agent_mailbox_depth",
+    "Messages waiting in agent mailbox",
+    ("agent", "priority")
+)
+MAILBOX_WAIT_SECONDS = REGISTRY.histogram(
+    "agent_mailbox_wait_seconds",
+    "Time messages spend queued in agent mailbox",
+    ("agent", "priority")
+)
+BUS_MESSAGES = REGISTRY.counter("message_bus_messages_total", "Messages sent through the bus", ("outcome",))
+
+# Priority classes, most urgent first. Messages choose one via their
+# "priority" field; anything else lands in the default lane.
+PRIORITIES = ("high", "normal", "low")
+DEFAULT_PRIORITY = "normal"
+DEFAULT_LANE_WEIGHTS = {"high": 8, "normal": 4, "low": 1}
+
+# Latest-state messages where only the newest per user matters. Bus
+# mailboxes coalesce them within this many seconds; bare Mailboxes do not.
+DEFAULT_COALESCE_TYPES = frozenset({"behavior_insight", "engagement_pattern"})
+DEFAULT_COALESCE_WINDOW = 5.0
+
+# Async callable (target, envelope) -> delivered, used to forward messages off-process
+Route = Callable[[str, Dict[str, Any]], Awaitable[bool]]
+
+class Mailbox:
+    def __init__(
+        self,
+        owner: str,
+        maxsize: int = 1000,
+        scheduling: str = "strict",
+        weights: Optional[Dict[str, float]] = None,
+        lane_capacity: Optional[Dict[str, int]] = None,
+        coalesce_window: Optional[float] = None,
+        coalesce_types: Iterable[str] = DEFAULT_COALESCE_TYPES
+    ):
+        if scheduling not in ("strict", "weighted"):
+            raise ValueError(f"Unknown mailbox scheduling: {scheduling}")
+
+        self.owner = owner
+        self.maxsize = maxsize  # Capacity of each lane unless overridden, 0 is unbounded
+        # strict always drains higher lanes first; weighted dequeues in
+        # proportion to lane weights so low priority traffic cannot starve
+        self.scheduling = scheduling
+        self.weights = {**DEFAULT_LANE_WEIGHTS, **(weights or {})}
+        invalid = {p: w for p, w in self.weights.items() if not w > 0}
+        if invalid:
+            raise ValueError(f"Mailbox lane weights must be positive: {invalid}")
+        # Credit added per round, scaled so every lane can take a message each round
+        smallest = min(self.weights[p] for p in PRIORITIES)
+        self.quanta = {p: self.weights[p] / min(smallest, 1) for p in PRIORITIES}
+        self.capacities = {p: (lane_capacity or {}).get(p, maxsize) for p in PRIORITIES}
+        self.lanes: Dict[str, deque] = {p: deque() for p in PRIORITIES}  # [enqueued_at, message, key]
+        # A message of a coalesce type replaces the queued one with the same
+        # (priority, type, user_id) if that was enqueued within the window
+        self.coalesce_window = coalesce_window
+        self.coalesce_types = frozenset(coalesce_types)
+        self.coalesce_index: Dict[Tuple[str, str, Any], list] = {}
+        self.deficits = {p: 0.0 for p in PRIORITIES}
+        self.depth_gauges = {p: MAILBOX_DEPTH.labels(owner, p) for p in PRIORITIES}
+        self.wait_times = {p: MAILBOX_WAIT_SECONDS.labels(owner, p) for p in PRIORITIES}
+        self.listeners: List[Callable[[], None]] = []
+        self._not_empty = asyncio.Event()
+        self._not_full = {p: asyncio.Event() for p in PRIORITIES}
+        for event in self._not_full.values():
+            event.set()
+        self.size = 0
+        self.enqueued = {p: 0 for p in PRIORITIES}
+        self.dequeued = {p: 0 for p in PRIORITIES}
+        self.blocked_puts = {p: 0 for p in PRIORITIES}
+        self.coalesced = {p: 0 for p in PRIORITIES}
+        self.lane_high_watermarks = {p: 0 for p in PRIORITIES}
+        self.high_watermark = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def resolve_priority(self, priority: Optional[str]) -> str:
+        """Map message priority onto a lane"""
+        return priority if priority in self.lanes else DEFAULT_PRIORITY
+
+    def full(self, priority: str = DEFAULT_PRIORITY) -> bool:
+        """Check if priority lane is at capacity"""
+        capacity = self.capacities[priority]
+        return capacity > 0 and len(self.lanes[priority]) >= capacity
+
+    def coalesce_key(self, message: Dict[str, Any], priority: str) -> Optional[Tuple[str, str, Any]]:
+        """Get coalescing key, None if message must not be coalesced"""
+        if self.coalesce_window is None or message.get("type") not in self.coalesce_types:
+            return None
+        user_id = message.get("user_id")
+        if user_id is None:
+            return None
+        return (priority, message["type"], user_id)
+
+    async def put(self, message: Dict[str, Any], priority: Optional[str] = None) -> bool:
+        """Enqueue message in its priority lane, waiting while the lane is full.
+
+        Returns True if the message replaced a queued one instead.
+        """
+        priority = self.resolve_priority(priority)
+        now = time.monotonic()
+        key = self.coalesce_key(message, priority)
+        if key is not None:
+            entry = self.coalesce_index.get(key)
+            if entry is not None and now - entry[0] <= self.coalesce_window:
+                entry[1] = message  # Keeps queue position and original enqueue time
+                self.coalesced[priority] += 1
+                return True
+
+        if self.full(priority):
+            self.blocked_puts[priority] += 1
+        while self.full(priority):
+            self._not_full[priority].clear()
+            await self._not_full[priority].wait()
+
+        lane = self.lanes[priority]
+        entry = [time.monotonic(), message, key]
+        lane.append(entry)
+        if key is not None:
+            self.coalesce_index[key] = entry
+        self.size += 1
+        self.enqueued[priority] += 1
+        self.depth_gauges[priority].set(len(lane))
+        self.lane_high_watermarks[priority] = max(self.lane_high_watermarks[priority], len(lane))
+        self.high_watermark = max(self.high_watermark, self.size)
+        self._not_empty.set()
+        for listener in self.listeners:
+            listener()
+        return False
+
+    def add_listener(self, listener: Callable[[], None]):
+        """Register callback invoked whenever a message is enqueued"""
+        self.listeners.append(listener)
+
+    def get_batch(self, max_batch: int = 100) -> List[Dict[str, Any]]:
+        """Dequeue up to max_batch messages across lanes without waiting"""
+        now = time.monotonic()
+        if self.scheduling == "strict":
+            batch = []
+            for priority in PRIORITIES:
+                batch.extend(self._pop(priority, max_batch - len(batch), now))
+        else:
+            batch = self._get_weighted_batch(max_batch, now)
+
+        if not self.size:
+            self._not_empty.clear()
+        return batch
+
+    def _get_weighted_batch(self, max_batch: int, now: float) -> List[Dict[str, Any]]:
+        """Deficit round robin across lanes, credit carries over between batches"""
+        batch = []
+        while self.size and len(batch) < max_batch:
+            taken_in_round = 0
+            for priority in PRIORITIES:
+                if not self.lanes[priority]:
+                    self.deficits[priority] = 0.0  # Idle lanes do not bank credit
+                    continue
+                self.deficits[priority] += self.quanta[priority]
+                taken = self._pop(priority, min(int(self.deficits[priority]), max_batch - len(batch)), now)
+                self.deficits[priority] -= len(taken)
+                taken_in_round += len(taken)
+                batch.extend(taken)
+            if not taken_in_round:
+                break  # No lane could make progress
+        return batch
+
+    def _pop(self, priority: str, count: int, now: float) -> List[Dict[str, Any]]:
+        """Dequeue up to count messages from one lane"""
+        lane = self.lanes[priority]
+        wait_times = self.wait_times[priority]
+        messages = []
+        while lane and len(messages) < count:
+            entry = lane.popleft()
+            enqueued_at, message, key = entry
+            if key is not None and self.coalesce_index.get(key) is entry:
+                del self.coalesce_index[key]
+            wait_times.observe(now - enqueued_at)
+            messages.append(message)
+
+        if messages:
+            self.size -= len(messages)
+            self.dequeued[priority] += len(messages)
+            self.depth_gauges[priority].set(len(lane))
+            self._not_full[priority].set()
+        return messages
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the mailbox has messages, returns False on timeout"""
+        if self.size:
+            return True
+        try:
+            await asyncio.wait_for(self._not_empty.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get mailbox metrics, in total and per priority lane"""
+        return {
+            "depth": self.size,
+            "capacity": self.maxsize,
+            "scheduling": self.scheduling,
+            "high_watermark": self.high_watermark,
+            "enqueued": sum(self.enqueued.values()),
+            "dequeued": sum(self.dequeued.values()),
+            "blocked_puts": sum(self.blocked_puts.values()),
+            "coalesced": sum(self.coalesced.values()),
+            "priorities": {
+                priority: {
+                    "depth": len(self.lanes[priority]),
+                    "capacity": self.capacities[priority],
+                    "weight": self.weights[priority],
+                    "high_watermark": self.lane_high_watermarks[priority],
+                    "enqueued": self.enqueued[priority],
+                    "dequeued": self.dequeued[priority],
+                    "blocked_puts": self.blocked_puts[priority],
+                    "coalesced": self.coalesced[priority],
+                    "wait": self.wait_times[priority].get_metrics()
+                }
+                for priority in PRIORITIES
+            }
+        }
+
+class MessageBus:
+    def __init__(
+        self,
+        mailbox_size: int = 1000,
+        send_timeout: Optional[float] = None,
+        scheduling: str = "strict",
+        lane_weights: Optional[Dict[str, float]] = None,
+        lane_capacity: Optional[Dict[str, int]] = None,
+        coalesce_window: Optional[float] = DEFAULT_COALESCE_WINDOW,
+        coalesce_types: Iterable[str] = DEFAULT_COALESCE_TYPES
+    ):
+        self.logger = logging.getLogger("message_bus")
+        self.mailbox_size = mailbox_size
+        self.send_timeout = send_timeout  # None waits indefinitely on full mailboxes
+        self.scheduling = scheduling
+        self.lane_weights = lane_weights
+        self.lane_capacity = lane_capacity
+        self.coalesce_window = coalesce_window  # None disables coalescing
+        self.coalesce_types = frozenset(coalesce_types)
+        self.mailboxes: Dict[str, Mailbox] = {}
+        self.routes: Dict[str, Route] = {}
+        self.fallback_route: Optional[Route] = None
+        # Optional (target, envelope) -> bool check; messages this process does
+        # not own skip local mailboxes and take the fallback route
+        self.owns_message: Optional[Callable[[str, Dict[str, Any]], bool]] = None
+        self.started_at = time.monotonic()
+        self.stats = {
+            "sent": 0,
+            "delivered": 0,
+            "forwarded": 0,
+            "undeliverable": 0,
+            "coalesced": 0,
+            "send_timeouts": 0
+        }
+
+    def register(self, name: str, maxsize: Optional[int] = None) -> Mailbox:
+        """Create mailbox for agent"""
+        if name in self.mailboxes:
+            return self.mailboxes[name]
+
+        mailbox = Mailbox(
+            name,
+            maxsize if maxsize is not None else self.mailbox_size,
+            self.scheduling,
+            self.lane_weights,
+            self.lane_capacity,
+            self.coalesce_window,
+            self.coalesce_types
+        )
+        self.mailboxes[name] = mailbox
+        self.logger.debug(f"Registered mailbox: {name}")
+        return mailbox
+
+    def unregister(self, name: str):
+        """Remove agent mailbox"""
+        self.mailboxes.pop(name, None)
+
+    def add_route(self, name: str, route: Route):
+        """Forward messages for an agent hosted elsewhere"""
+        self.routes[name] = route
+
+    def remove_route(self, name: str):
+        """Remove forwarding route"""
+        self.routes.pop(name, None)
+
+    def set_fallback_route(self, route: Optional[Route]):
+        """Forward messages for unknown targets, e.g. to a parent process"""
+        self.fallback_route = route
+
+    def get_mailbox(self, name: str) -> Optional[Mailbox]:
+        """Get mailbox for agent"""
+        return self.mailboxes.get(name)
+
+    async def send(self, sender: str, target: str, message: Dict[str, Any]) -> bool:
+        """Deliver message to target mailbox lane, applying backpressure when full"""
+        self.stats["sent"] += 1
+        envelope = {"sender": sender, **message}
+        mailbox = self.mailboxes.get(target)
+        if mailbox is not None and self.owns_message is not None and not self.owns_message(target, envelope):
+            mailbox = None
+        if mailbox is None:
+            route = self.routes.get(target, self.fallback_route)
+            if route is not None and await route(target, envelope):
+                self.stats["forwarded"] += 1
+                BUS_MESSAGES.labels("forwarded").inc()
+                return True
+            self.stats["undeliverable"] += 1
+            BUS_MESSAGES.labels("undeliverable").inc()
+            self.logger.debug(f"No mailbox for {target}, dropping message from {sender}")
+            return False
+
+        priority = envelope.get("priority")
+        try:
+            if self.send_timeout is None:
+                coalesced = await mailbox.put(envelope, priority)
+            else:
+                coalesced = await asyncio.wait_for(mailbox.put(envelope, priority), self.send_timeout)
+        except asyncio.TimeoutError:
+            self.stats["send_timeouts"] += 1
+            BUS_MESSAGES.labels("timeout").inc()
+            self.logger.warning(f"Mailbox {target} full, message from {sender} timed out")
+            return False
+
+        if coalesced:
+            self.stats["coalesced"] += 1
+            BUS_MESSAGES.labels("coalesced").inc()
+            return True
+        self.stats["delivered"] += 1
+        BUS_MESSAGES.labels("delivered").inc()
+        return True
+
+    async def receive(
+        self,
+        name: str,
+        max_batch: int = 100,
+        timeout: Optional[float] = 0
+    ) -> List[Dict[str, Any]]:
+        """Receive a batch of messages, waiting up to timeout for the first one"""
+        mailbox = self.mailboxes.get(name)
+        if mailbox is None:
+            return []
+
+        if timeout != 0:
+            await mailbox.wait(timeout)
+        return mailbox.get_batch(max_batch)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get queue depth and throughput metrics"""
+        uptime = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            **self.stats,
+            "delivered_per_second": self.stats["delivered"] / uptime,
+            "total_depth": sum(len(m) for m in self.mailboxes.values()),
+            "mailboxes": {
+                name: mailbox.get_metrics()
+                for name, mailbox in self.mailboxes.items()
+            }
+        }
@@ -0,0 +1,269 @@
+import bisect
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterable, List, Tuple
+
+# Bucket upper bounds in seconds, from sub-millisecond phases to slow LLM calls
+DEFAULT_LATENCY_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+
+class LatencyHistogram:
+    def __init__(self, buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        """Record one observation"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if value < self.min or self.count == 1:
+            self.min = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate quantile by interpolating within its bucket"""
+        if self.count == 0:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count > 0:
+                # Observed extremes tighten the outermost buckets
+                lower = max(self.buckets[index - 1] if index > 0 else 0.0, self.min)
+                upper = min(self.buckets[index] if index < len(self.buckets) else self.max, self.max)
+                fraction = (rank - cumulative) / bucket_count
+                return lower + (upper - lower) * fraction
+            cumulative += bucket_count
+        return self.max
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get summary statistics"""
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+class CounterValue:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        """Increase counter"""
+        self.value += amount
+
+class GaugeValue:
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float):
+        """Set gauge value"""
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        """Increase gauge"""
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        """Decrease gauge"""
+        self.value -= amount
+
+class MetricFamily:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: Any, **labels: Any) -> Any:
+        """Get child metric for label values, creating it on first use"""
+        if labels:
+            values = tuple(labels[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self.children.setdefault(key, self.new_child())
+        return child
+
+    def render(self) -> List[str]:
+        """Render family in Prometheus text exposition format"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}"
+        ]
+        for key, child in list(self.children.items()):
+            lines.extend(self.render_child(key, child))
+        return lines
+
+    def render_child(self, key: Tuple[str, ...], child: Any) -> List[str]:
+        labels = format_labels(self.labelnames, key)
+        return [f"{self.name}{labels} {format_value(child.value)}"]
+
+class Counter(MetricFamily):
+    kind = "counter"
+
+    def new_child(self) -> CounterValue:
+        return CounterValue()
+
+    def inc(self, amount: float = 1.0):
+        """Increase unlabelled counter"""
+        self.labels().inc(amount)
+
+class Gauge(MetricFamily):
+    kind = "gauge"
+
+    def new_child(self) -> GaugeValue:
+        return GaugeValue()
+
+    def set(self, value: float):
+        """Set unlabelled gauge"""
+        self.labels().set(value)
+
+class Histogram(MetricFamily):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def new_child(self) -> LatencyHistogram:
+        return LatencyHistogram(self.buckets)
+
+    def observe(self, value: float):
+        """Record observation on unlabelled histogram"""
+        self.labels().observe(value)
+
+    @contextmanager
+    def time(self, **labels: Any):
+        """Time a block of code"""
+        child = self.labels(**labels)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            child.observe(time.perf_counter() - started)
+
+    def render_child(self, key: Tuple[str, ...], child: LatencyHistogram) -> List[str]:
+        lines = []
+        labels = format_labels(self.labelnames, key)
+        cumulative = 0
+        bounds = [format_value(bound) for bound in child.buckets] + ["+Inf"]
+        for bound, count in zip(bounds, child.counts):
+            cumulative += count
+            bucket_labels = format_labels(self.labelnames + ("le",), key + (bound,))
+            lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    def __init__(self):
+        self.families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def register(self, family: MetricFamily) -> MetricFamily:
+        """Register metric family, returning the existing one for known names"""
+        with self._lock:
+            return self.families.setdefault(family.name, family)
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render all metrics in Prometheus text exposition format"""
+        lines = []
+        for family in list(self.families.values()):
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def timed(histogram: Histogram, **labels: Any):
+    """Decorator recording duration of sync or async functions"""
+    def decorator(func):
+        child = histogram.labels(**labels)
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+# Process-wide registry exposed on the /metrics endpoint
+REGISTRY = MetricsRegistry()
+
+SQLITE_OPERATION_SECONDS = REGISTRY.histogram(
+    "sqlite_operation_duration_seconds",
+    "Duration of SQLite store operations",
+    ("store", "operation")
+)
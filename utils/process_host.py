@@ -0,0 +1,313 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import pickle
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from data.models import flush_metrics
+from utils.message_bus import MessageBus
+from utils.sharding import ShardAssignment
+
+def run_worker(
+    worker_name: str,
+    agent_specs: Dict[str, type],
+    inbound,
+    outbound,
+    log_level: int,
+    shard_config: Optional[Tuple[str, List[str]]] = None
+):
+    """Worker process entry point hosting agents on their own event loop"""
+    logging.basicConfig(level=log_level)
+    asyncio.run(serve_worker(worker_name, agent_specs, inbound, outbound, shard_config))
+
+async def serve_worker(
+    worker_name: str,
+    agent_specs: Dict[str, type],
+    inbound,
+    outbound,
+    shard_config: Optional[Tuple[str, List[str]]] = None
+):
+    """Run agents and bridge their messages to the parent process"""
+    # Imported here since AgentManager itself depends on this module
+    from utils.agent_manager import AgentManager
+    from llm.dispatcher import LLMDispatcher
+    from llm.providers import LLMProviderManager
+
+    logger = logging.getLogger(f"worker.{worker_name}")
+    loop = asyncio.get_running_loop()
+    # Hosted agents share a dispatcher within the worker; its usage is
+    # reported to the parent through the metrics request
+    llm_manager = LLMProviderManager()
+    llm_dispatcher = LLMDispatcher(llm_manager)
+    manager = AgentManager(llm_dispatcher=llm_dispatcher)
+
+    def put(item: Dict[str, Any]):
+        outbound.put(pickle.dumps(item, protocol=pickle.HIGHEST_PROTOCOL))
+
+    async def forward_to_parent(target: str, envelope: Dict[str, Any]) -> bool:
+        put({"kind": "message", "target": target, "envelope": envelope})
+        return True
+
+    async def deliver(item: Dict[str, Any]):
+        envelope = item["envelope"]
+        await manager.message_bus.send(envelope.get("sender", "parent"), item["target"], envelope)
+
+    async def handle_request(item: Dict[str, Any]):
+        try:
+            result = await manager.handle_worker_request(item["op"], item.get("payload"))
+            put({"kind": "reply", "id": item["id"], "result": result})
+        except Exception as e:
+            put({"kind": "reply", "id": item["id"], "error": f"{type(e).__name__}: {e}"})
+
+    manager.message_bus.set_fallback_route(forward_to_parent)
+    shard = ShardAssignment(*shard_config) if shard_config else None
+    if shard is not None:
+        # Messages for users owned by other shards go back through the parent
+        manager.message_bus.owns_message = lambda target, envelope: (
+            envelope.get("user_id") is None or shard.owns(envelope["user_id"])
+        )
+
+    for agent_id, agent_cls in agent_specs.items():
+        agent = agent_cls()
+        if shard is not None:
+            agent.assign_shard(shard)
+        await manager.register_agent(agent_id, agent)
+    await llm_dispatcher.start()
+    await manager.start_agents()
+    put({"kind": "ready", "pid": os.getpid()})
+    logger.info(f"Worker {worker_name} hosting {list(agent_specs)}")
+
+    requests = set()
+    deliveries = set()
+    while True:
+        data = await loop.run_in_executor(None, inbound.get)
+        if data is None:
+            break
+
+        item = pickle.loads(data)
+        if item["kind"] == "message":
+            # Delivered in the background so a full mailbox does not hold up
+            # messages for other agents, metrics requests or shutdown
+            task = asyncio.create_task(deliver(item))
+            deliveries.add(task)
+            task.add_done_callback(deliveries.discard)
+        elif item["kind"] == "request":
+            task = asyncio.create_task(handle_request(item))
+            requests.add(task)
+            task.add_done_callback(requests.discard)
+
+    if requests:
+        await asyncio.gather(*requests, return_exceptions=True)
+    if deliveries:
+        logger.warning(f"Worker {worker_name} dropping {len(deliveries)} messages blocked on full mailboxes")
+        for task in deliveries:
+            task.cancel()
+        await asyncio.gather(*deliveries, return_exceptions=True)
+    await manager.stop_agents()
+    await llm_dispatcher.stop()
+    await llm_manager.close()
+    # Worker processes exit without running atexit handlers
+    flush_metrics()
+
+class WorkerProcessHost:
+    def __init__(
+        self,
+        name: str,
+        message_bus: MessageBus,
+        start_method: str = "spawn",
+        request_timeout: float = 30.0,
+        restart_backoff: float = 1.0,
+        max_restart_backoff: float = 60.0
+    ):
+        self.logger = logging.getLogger(f"worker_host.{name}")
+        self.name = name
+        self.message_bus = message_bus
+        self.context = multiprocessing.get_context(start_method)
+        self.request_timeout = request_timeout
+        self.restart_backoff = restart_backoff
+        self.max_restart_backoff = max_restart_backoff
+        self.agent_specs: Dict[str, type] = {}
+        self.pending_state: Dict[str, Any] = {}
+        self.shard_config: Optional[Tuple[str, List[str]]] = None
+        self.process = None
+        self.pid: Optional[int] = None
+        self.restarts = 0
+        self.stopping = False
+        self.inbound = None
+        self.outbound = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_ids = itertools.count()
+        self._reader: Optional[threading.Thread] = None
+
+    def add_agent(self, agent_id: str, agent_cls: type):
+        """Add agent class to be instantiated inside the worker"""
+        self.agent_specs[agent_id] = agent_cls
+
+    def is_alive(self) -> bool:
+        """Check if worker process is running"""
+        return self.process is not None and self.process.is_alive()
+
+    async def start(self):
+        """Spawn worker process and wait until its agents are running"""
+        if self.is_alive():
+            return
+
+        self.stopping = False
+        self._loop = asyncio.get_running_loop()
+        self._ready = self._loop.create_future()
+        # Unbounded: mailbox backpressure applies within each process, so a
+        # flood across the process boundary buffers here (and in the worker's
+        # pending deliveries) instead of blocking the sender
+        self.inbound = self.context.Queue()
+        self.outbound = self.context.Queue()
+        self.process = self.context.Process(
+            target=run_worker,
+            args=(
+                self.name,
+                self.agent_specs,
+                self.inbound,
+                self.outbound,
+                logging.getLogger().level,
+                self.shard_config
+            ),
+            name=f"agent-worker-{self.name}",
+            daemon=True
+        )
+        self.process.start()
+        self._loop.add_reader(self.process.sentinel, self._on_process_exit)
+
+        self._reader = threading.Thread(
+            target=self._read_outbound,
+            args=(self.outbound,),
+            name=f"agent-worker-{self.name}-reader",
+            daemon=True
+        )
+        self._reader.start()
+
+        await asyncio.wait_for(self._ready, self.request_timeout)
+        self.logger.info(f"Started worker {self.name} (pid {self.pid})")
+
+    async def stop(self):
+        """Shut down worker process, stopping its agents first"""
+        self.stopping = True
+        if not self.is_alive():
+            return
+
+        try:
+            await self.request("shutdown")
+        except Exception as e:
+            self.logger.warning(f"Worker {self.name} shutdown request failed: {e}")
+
+        self.inbound.put(None)
+        await self._loop.run_in_executor(None, self.process.join, self.request_timeout)
+        if self.process.is_alive():
+            self.logger.warning(f"Worker {self.name} did not exit, terminating")
+            self.process.terminate()
+        self.outbound.put(None)
+        self.logger.info(f"Stopped worker {self.name}")
+
+    async def forward(self, target: str, envelope: Dict[str, Any]) -> bool:
+        """Forward message to an agent hosted in this worker"""
+        if not self.is_alive():
+            return False
+        self.inbound.put(pickle.dumps(
+            {"kind": "message", "target": target, "envelope": envelope},
+            protocol=pickle.HIGHEST_PROTOCOL
+        ))
+        return True
+
+    async def request(self, op: str, payload: Any = None) -> Any:
+        """Run an AgentManager operation inside the worker"""
+        if not self.is_alive():
+            raise RuntimeError(f"Worker {self.name} is not running")
+
+        request_id = next(self._request_ids)
+        future = self._loop.create_future()
+        self._pending[request_id] = future
+        self.inbound.put(pickle.dumps(
+            {"kind": "request", "id": request_id, "op": op, "payload": payload},
+            protocol=pickle.HIGHEST_PROTOCOL
+        ))
+        try:
+            return await asyncio.wait_for(future, self.request_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    def _read_outbound(self, outbound):
+        """Reader thread forwarding worker output into the event loop"""
+        while True:
+            data = outbound.get()
+            if data is None:
+                break
+            try:
+                asyncio.run_coroutine_threadsafe(self._dispatch(pickle.loads(data)), self._loop).result()
+            except RuntimeError:
+                break  # Event loop closed
+            except Exception as e:
+                self.logger.error(f"Failed to dispatch worker output: {e}")
+
+    async def _dispatch(self, item: Dict[str, Any]):
+        """Handle item received from the worker"""
+        kind = item["kind"]
+        if kind == "message":
+            envelope = item["envelope"]
+            await self.message_bus.send(envelope.get("sender", self.name), item["target"], envelope)
+        elif kind == "reply":
+            future = self._pending.get(item["id"])
+            if future is None or future.done():
+                return
+            if "error" in item:
+                future.set_exception(RuntimeError(item["error"]))
+            else:
+                future.set_result(item["result"])
+        elif kind == "ready":
+            self.pid = item["pid"]
+            if not self._ready.done():
+                self._ready.set_result(True)
+
+    def _on_process_exit(self):
+        """Handle worker process exit, restarting it unless stopping"""
+        self._loop.remove_reader(self.process.sentinel)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(RuntimeError(f"Worker {self.name} exited"))
+        self._pending.clear()
+
+        if not self._ready.done():
+            self._ready.set_exception(RuntimeError(f"Worker {self.name} exited during startup"))
+            self.outbound.put(None)
+            return
+        if self.stopping:
+            return
+        self.logger.error(f"Worker {self.name} exited unexpectedly with code {self.process.exitcode}")
+        self.outbound.put(None)
+        self._loop.create_task(self._restart())
+
+    async def _restart(self):
+        """Restart crashed worker with backoff"""
+        self.restarts += 1
+        backoff = min(self.restart_backoff * 2 ** (self.restarts - 1), self.max_restart_backoff)
+        await asyncio.sleep(backoff)
+        if self.stopping:
+            return
+        try:
+            await self.start()
+        except Exception as e:
+            self.logger.error(f"Failed to restart worker {self.name}: {e}")
+            self._loop.create_task(self._restart())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get worker process metrics"""
+        return {
+            "pid": self.pid,
+            "alive": self.is_alive(),
+            "restarts": self.restarts,
+            "agents": list(self.agent_specs),
+            "shard": self.shard_config[0] if self.shard_config else None,
+            "pending_requests": len(self._pending)
+        }
@@ -0,0 +1,79 @@
+import bisect
+import hashlib
+from typing import Dict, Any, List, Optional, Iterable
+
+def hash_key(key: str) -> int:
+    """Stable 64-bit hash, identical across processes"""
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+class ConsistentHashRing:
+    def __init__(self, nodes: Iterable[str] = (), replicas: int = 128):
+        self.replicas = replicas  # Virtual nodes per shard, smooths the distribution
+        self.nodes: List[str] = []
+        self._hashes: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes:
+            self.add_node(node)
+
+    def add_node(self, node: str):
+        """Add shard to the ring"""
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for replica in range(self.replicas):
+            point = hash_key(f"{node}#{replica}")
+            index = bisect.bisect(self._hashes, point)
+            self._hashes.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: str):
+        """Remove shard from the ring"""
+        if node not in self.nodes:
+            return
+        self.nodes.remove(node)
+        keep = [i for i, owner in enumerate(self._owners) if owner != node]
+        self._hashes = [self._hashes[i] for i in keep]
+        self._owners = [self._owners[i] for i in keep]
+
+    def get_node(self, key: str) -> Optional[str]:
+        """Get shard owning key"""
+        if not self._hashes:
+            return None
+        index = bisect.bisect(self._hashes, hash_key(key)) % len(self._hashes)
+        return self._owners[index]
+
+class ShardAssignment:
+    def __init__(self, shard: str, nodes: List[str], replicas: int = 128):
+        self.shard = shard
+        self.ring = ConsistentHashRing(nodes, replicas)
+
+    def owns(self, user_id: Any) -> bool:
+        """Check if user is assigned to this shard"""
+        return self.ring.get_node(str(user_id)) == self.shard
+
+class ShardRouter:
+    def __init__(self, hosts: Dict[str, Any], replicas: int = 128):
+        self.hosts = hosts  # Shard name -> WorkerProcessHost
+        self.replicas = replicas
+        self.ring = ConsistentHashRing(hosts, replicas)
+        self.stats = {"routed": 0, "broadcast": 0}
+
+    async def forward(self, target: str, envelope: Dict[str, Any]) -> bool:
+        """Route message to the shard owning its user, or to every shard"""
+        user_id = envelope.get("user_id")
+        if user_id is not None:
+            self.stats["routed"] += 1
+            return await self.hosts[self.ring.get_node(str(user_id))].forward(target, envelope)
+
+        self.stats["broadcast"] += 1
+        delivered = False
+        for host in self.hosts.values():
+            delivered = await host.forward(target, envelope) or delivered
+        return delivered
+
+    def get_distribution(self, user_ids: Iterable[Any]) -> Dict[str, int]:
+        """Count users per shard"""
+        counts = {node: 0 for node in self.ring.nodes}
+        for user_id in user_ids:
+            counts[self.ring.get_node(str(user_id))] += 1
+        return counts